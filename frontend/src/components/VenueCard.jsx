@@ -5,7 +5,7 @@ export default function VenueCard({ venue }) {
   const { t } = useLang()
 
   const amenities = Array.isArray(venue.amenities) ? venue.amenities.slice(0, 3) : []
-  const image = venue.images?.[0]?.image || null
+  const image = venue.primary_image || venue.images?.[0]?.image || null
 
   const formatPrice = (price) => {
     return Number(price).toLocaleString('uz-UZ')
@@ -1,5 +1,6 @@
 from django.contrib import admin
 
+from . import availability
 from .models import Booking
 
 
@@ -14,6 +15,7 @@ class BookingAdmin(admin.ModelAdmin):
         "end_time",
         "total_price",
         "status",
+        "expires_at",
         "created_at",
     )
     list_filter = ("status", "booking_date")
@@ -21,3 +23,24 @@ class BookingAdmin(admin.ModelAdmin):
     list_editable = ("status",)
     readonly_fields = ("total_price", "created_at", "updated_at")
     raw_id_fields = ("user", "venue")
+
+    # Admin edits bypass the API, so they invalidate the cached bitmaps of
+    # every day they touch themselves, including the one a booking moved from.
+
+    def save_model(self, request, obj, form, change):
+        if change:
+            previous = Booking.objects.filter(pk=obj.pk).values("venue_id", "booking_date").first()
+            if previous:
+                availability.invalidate(previous["venue_id"], previous["booking_date"])
+        super().save_model(request, obj, form, change)
+        availability.invalidate(obj.venue_id, obj.booking_date)
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        availability.invalidate(obj.venue_id, obj.booking_date)
+
+    def delete_queryset(self, request, queryset):
+        days = set(queryset.values_list("venue_id", "booking_date"))
+        super().delete_queryset(request, queryset)
+        for venue_id, booking_date in days:
+            availability.invalidate(venue_id, booking_date)
@@ -0,0 +1,290 @@
+"""
+Cached per-venue, per-day occupancy bitmaps.
+
+Each (venue, date) pair maps to a single integer in the cache. Bit ``i`` is
+set when minute ``OPENING_HOUR * 60 + i`` is covered by a confirmed booking
+or an unexpired hold, so checking a slot is one AND against a precomputed
+mask. An entry covering holds expires when the first of them lapses, so the
+slot frees up without waiting for the sweeper (see ``holds.py``).
+
+The bitmap is a derived view of the ``Booking`` table, cached under a
+per-day version counter. Entries are never modified: a missing one is
+rebuilt from the database on read and stored under the version read before
+the rebuild, and every write bumps the version once it commits. A bitmap
+built just before a write committed therefore lands under an outdated
+version and is never served.
+"""
+import math
+import time as clock
+from collections import defaultdict
+from datetime import time, timedelta
+from itertools import groupby
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils import timezone
+
+from config import async_cache
+from config.redis_client import get_redis_client
+
+from .models import Booking
+
+OPENING_HOUR = 9
+CLOSING_HOUR = 22
+
+AVAILABILITY_PREFIX = "availability:v2:"
+VERSION_PREFIX = "availability:version:"
+# A counter lost to expiry or eviction is reseeded past its old value, which
+# only costs a rebuild, so it need not outlive the entries by much.
+VERSION_TIMEOUT = 24 * 60 * 60
+
+DAY_START_MINUTE = OPENING_HOUR * 60
+DAY_MINUTES = (CLOSING_HOUR - OPENING_HOUR) * 60
+
+
+def _minute_of_day(value: time) -> int:
+    return value.hour * 60 + value.minute
+
+
+def interval_mask(start_time: time, end_time: time) -> int:
+    """Return the bitmask covering ``[start_time, end_time)`` within opening hours."""
+    start = max(_minute_of_day(start_time) - DAY_START_MINUTE, 0)
+    end = min(_minute_of_day(end_time) - DAY_START_MINUTE, DAY_MINUTES)
+    if end <= start:
+        return 0
+    return ((1 << (end - start)) - 1) << start
+
+
+# Hourly slots shown by the availability endpoint, with their masks precomputed.
+SLOTS = [
+    (time(hour, 0), time(hour + 1, 0), interval_mask(time(hour, 0), time(hour + 1, 0)))
+    for hour in range(OPENING_HOUR, CLOSING_HOUR)
+]
+
+
+def version_key(venue_id: int, booking_date) -> str:
+    return f"{VERSION_PREFIX}{venue_id}:{booking_date.isoformat()}"
+
+
+def availability_key(venue_id: int, booking_date, version: int) -> str:
+    return f"{AVAILABILITY_PREFIX}{venue_id}:{booking_date.isoformat()}:{version}"
+
+
+def cache_timeout() -> int:
+    return getattr(settings, "AVAILABILITY_CACHE_TIMEOUT", 600)
+
+
+def bitmap_from_intervals(intervals) -> int:
+    """Fold ``(start_time, end_time)`` pairs into a single occupancy bitmap."""
+    bitmap = 0
+    for start_time, end_time in intervals:
+        bitmap |= interval_mask(start_time, end_time)
+    return bitmap
+
+
+def _fold(rows) -> tuple:
+    """``(bitmap, expiry)`` for ``(start_time, end_time, expires_at)`` rows."""
+    rows = list(rows)
+    expiries = [expires_at for _, _, expires_at in rows if expires_at is not None]
+    return (
+        bitmap_from_intervals((start_time, end_time) for start_time, end_time, _ in rows),
+        min(expiries, default=None),
+    )
+
+
+def _timeout(expiry) -> int:
+    """Cache timeout for a bitmap whose first hold lapses at ``expiry``."""
+    if expiry is None:
+        return cache_timeout()
+    remaining = math.ceil((expiry - timezone.now()).total_seconds())
+    return max(min(remaining, cache_timeout()), 1)
+
+
+def build_bitmap(venue_id: int, booking_date) -> tuple:
+    """
+    Compute ``(bitmap, expiry)`` for one venue and day from the database,
+    ``expiry`` being when the first hold in the bitmap lapses, if any.
+    """
+    # One built from a lagging replica would be cached under the current
+    # version and stay wrong until the next write: always read the primary
+    rows = (
+        Booking.objects.using(DEFAULT_DB_ALIAS)
+        .filter(venue_id=venue_id, booking_date=booking_date)
+        .active()
+        .order_by()
+        .values_list("start_time", "end_time", "expires_at")
+    )
+    return _fold(rows)
+
+
+def _seed() -> int:
+    # Seeded from the clock so a lost counter never restarts at a value an
+    # older entry was stored under.
+    return clock.time_ns() // 1000
+
+
+def get_versions(venue_id: int, days) -> dict:
+    """``{date: version}`` for ``days``, seeding the missing counters."""
+    keys = {version_key(venue_id, day): day for day in days}
+    versions = cache.get_many(list(keys))
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        for key in missing:
+            cache.add(key, _seed(), timeout=VERSION_TIMEOUT)
+        versions.update(cache.get_many(missing))
+    return {keys[key]: version for key, version in versions.items()}
+
+
+async def aget_versions(venue_id: int, days) -> dict:
+    """``get_versions`` for async views."""
+    keys = {version_key(venue_id, day): day for day in days}
+    versions = await async_cache.aget_many(list(keys))
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        for key in missing:
+            await async_cache.aadd(key, _seed(), timeout=VERSION_TIMEOUT)
+        versions.update(await async_cache.aget_many(missing))
+    return {keys[key]: version for key, version in versions.items()}
+
+
+def get_bitmap(venue_id: int, booking_date) -> int:
+    """Return the cached bitmap, rebuilding it from the database on a miss."""
+    version = get_versions(venue_id, [booking_date])[booking_date]
+    key = availability_key(venue_id, booking_date, version)
+    bitmap = cache.get(key)
+    if bitmap is None:
+        bitmap, expiry = build_bitmap(venue_id, booking_date)
+        cache.add(key, bitmap, timeout=_timeout(expiry))
+    return bitmap
+
+
+async def aget_bitmap(venue_id: int, booking_date) -> int:
+    """``get_bitmap`` for async views."""
+    version = (await aget_versions(venue_id, [booking_date]))[booking_date]
+    key = availability_key(venue_id, booking_date, version)
+    bitmap = await async_cache.aget(key)
+    if bitmap is None:
+        bitmap, expiry = await sync_to_async(build_bitmap)(venue_id, booking_date)
+        await async_cache.aadd(key, bitmap, timeout=_timeout(expiry))
+    return bitmap
+
+
+def build_bitmaps(venue_id: int, days) -> dict:
+    """``{date: (bitmap, expiry)}`` for the sorted ``days``, from a single query."""
+    rows = (
+        Booking.objects.using(DEFAULT_DB_ALIAS)
+        .filter(
+            venue_id=venue_id,
+            booking_date__range=(days[0], days[-1]),
+        )
+        .active()
+        .order_by("booking_date", "start_time")
+        .values_list("booking_date", "start_time", "end_time", "expires_at")
+    )
+    built = dict.fromkeys(days, (0, None))
+    for booking_date, day_rows in groupby(rows, key=lambda row: row[0]):
+        if booking_date in built:
+            built[booking_date] = _fold(row[1:] for row in day_rows)
+    return built
+
+
+def _entries(venue_id: int, versions: dict, built: dict) -> dict:
+    """``{timeout: {key: bitmap}}`` for the days ``build_bitmaps`` returned."""
+    entries = defaultdict(dict)
+    for day, (bitmap, expiry) in built.items():
+        entries[_timeout(expiry)][availability_key(venue_id, day, versions[day])] = bitmap
+    return entries
+
+
+def _add_many(mapping, timeout):
+    """``cache.add`` for every item, in one round trip with django_redis."""
+    client = get_redis_client()
+    if client is None:
+        for key, value in mapping.items():
+            cache.add(key, value, timeout=timeout)
+        return
+    pipe = client.pipeline(transaction=False)
+    for key, value in mapping.items():
+        pipe.set(cache.make_key(key), cache.client.encode(value), px=timeout * 1000, nx=True)
+    pipe.execute()
+
+
+def _days(date_from, date_to) -> list:
+    return [date_from + timedelta(days=i) for i in range((date_to - date_from).days + 1)]
+
+
+def get_bitmaps(venue_id: int, date_from, date_to) -> dict:
+    """
+    Return ``{date: bitmap}`` for every day in ``[date_from, date_to]``.
+
+    Cached days cost nothing beyond two multi-gets (versions, then
+    bitmaps); the remaining days are filled from a single query ordered by
+    date and start time, folded into bitmaps in one pass and added to the
+    cache without replacing entries written meanwhile.
+    """
+    days = _days(date_from, date_to)
+    versions = get_versions(venue_id, days)
+    keys = {availability_key(venue_id, day, versions[day]): day for day in days}
+    cached = cache.get_many(list(keys))
+    bitmaps = {keys[key]: bitmap for key, bitmap in cached.items()}
+
+    missing = [day for day in days if day not in bitmaps]
+    if missing:
+        built = build_bitmaps(venue_id, missing)
+        for timeout, entries in _entries(venue_id, versions, built).items():
+            _add_many(entries, timeout=timeout)
+        bitmaps.update((day, bitmap) for day, (bitmap, _) in built.items())
+
+    return {day: bitmaps[day] for day in days}
+
+
+async def aget_bitmaps(venue_id: int, date_from, date_to) -> dict:
+    """``get_bitmaps`` for async views."""
+    days = _days(date_from, date_to)
+    versions = await aget_versions(venue_id, days)
+    keys = {availability_key(venue_id, day, versions[day]): day for day in days}
+    cached = await async_cache.aget_many(list(keys))
+    bitmaps = {keys[key]: bitmap for key, bitmap in cached.items()}
+
+    missing = [day for day in days if day not in bitmaps]
+    if missing:
+        built = await sync_to_async(build_bitmaps)(venue_id, missing)
+        for timeout, entries in _entries(venue_id, versions, built).items():
+            await async_cache.aadd_many(entries, timeout=timeout)
+        bitmaps.update((day, bitmap) for day, (bitmap, _) in built.items())
+
+    return {day: bitmaps[day] for day in days}
+
+
+def build_slots(bitmap: int) -> list:
+    """Render the hourly slot grid for a day's occupancy bitmap."""
+    return [
+        {
+            "start_time": slot_start.strftime("%H:%M"),
+            "end_time": slot_end.strftime("%H:%M"),
+            "is_available": not bitmap & mask,
+        }
+        for slot_start, slot_end, mask in SLOTS
+    ]
+
+
+def _bump(days):
+    for venue_id, booking_date in days:
+        try:
+            cache.incr(version_key(venue_id, booking_date))
+        except ValueError:
+            # No counter, so no reachable entry: the next read seeds a new one
+            pass
+
+
+def invalidate(venue_id: int, booking_date):
+    """Retire the cached bitmap once the transaction commits."""
+    transaction.on_commit(lambda: _bump([(venue_id, booking_date)]))
+
+
+def invalidate_bookings(bookings):
+    """``invalidate`` every venue and day the ``bookings`` touch."""
+    days = {(booking.venue_id, booking.booking_date) for booking in bookings}
+    transaction.on_commit(lambda: _bump(days))
@@ -0,0 +1,111 @@
+"""
+Creating many bookings of one venue at once.
+
+Every interval in a batch is checked against the venue's active bookings
+on the batch's days, fetched in one query, and against the batch's earlier
+intervals. The free ones are inserted with a single ``bulk_create`` in one
+transaction. The ``booking_no_overlap`` constraint still guards against a
+booking committed between the check and the insert, and against expired
+holds not swept yet: the transaction is then rolled back, expired holds on
+the batch's days are expired, and the whole batch checked again.
+"""
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+from rest_framework import serializers
+from rest_framework.settings import api_settings
+
+from . import availability, holds
+from .models import OVERLAP_ERROR, Booking, violates_overlap
+
+ALL_OR_NOTHING = "all_or_nothing"
+BEST_EFFORT = "best_effort"
+MODES = [ALL_OR_NOTHING, BEST_EFFORT]
+
+CREATED = "created"
+CONFLICT = "conflict"
+SKIPPED = "skipped"  # free, but another interval failed in all_or_nothing mode
+STATUSES = [CREATED, CONFLICT, SKIPPED]
+
+ATTEMPTS = 3
+
+
+def check_intervals(venue_id: int, intervals) -> list:
+    """Per interval, ``None`` if it is free or why it cannot be booked."""
+    taken = defaultdict(list)
+    existing = (
+        Booking.objects.filter(
+            venue_id=venue_id,
+            booking_date__in={interval["booking_date"] for interval in intervals},
+        )
+        .active()
+        .order_by()
+        .values_list("booking_date", "start_time", "end_time")
+    )
+    for booking_date, start_time, end_time in existing:
+        taken[booking_date].append((start_time, end_time, None))
+
+    problems = []
+    for index, interval in enumerate(intervals):
+        day = taken[interval["booking_date"]]
+        clash = next(
+            (
+                other
+                for start_time, end_time, other in day
+                if start_time < interval["end_time"] and end_time > interval["start_time"]
+            ),
+            False,
+        )
+        if clash is False:
+            day.append((interval["start_time"], interval["end_time"], index))
+            problems.append(None)
+        elif clash is None:
+            problems.append(OVERLAP_ERROR)
+        else:
+            problems.append(f"Overlaps item {clash} of this batch.")
+    return problems
+
+
+def create_batch(user_id, venue, intervals, mode=ALL_OR_NOTHING) -> list:
+    """Book ``intervals`` of ``venue`` for the user; returns one result per interval."""
+    for _ in range(ATTEMPTS):
+        try:
+            with transaction.atomic():
+                return _create(user_id, venue, intervals, mode)
+        except IntegrityError as exc:
+            if not violates_overlap(exc):
+                raise
+            holds.expire(
+                Booking.objects.filter(
+                    venue=venue,
+                    booking_date__in={interval["booking_date"] for interval in intervals},
+                )
+            )
+    raise serializers.ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [OVERLAP_ERROR]})
+
+
+def _create(user_id, venue, intervals, mode):
+    problems = check_intervals(venue.pk, intervals)
+    failed = any(problems)
+    results = []
+    bookings = []
+    expires_at = holds.hold_expiry()
+    for index, (interval, problem) in enumerate(zip(intervals, problems)):
+        result = {"index": index, **interval}
+        if problem:
+            result.update(status=CONFLICT, detail=problem)
+        elif failed and mode == ALL_OR_NOTHING:
+            result["status"] = SKIPPED
+        else:
+            booking = Booking(user_id=user_id, venue=venue, expires_at=expires_at, **interval)
+            booking.total_price = booking.calculate_total_price()
+            bookings.append((result, booking))
+        results.append(result)
+
+    Booking.objects.bulk_create([booking for _, booking in bookings])
+    for result, booking in bookings:
+        result.update(
+            status=CREATED, id=booking.pk, total_price=booking.total_price, expires_at=booking.expires_at
+        )
+    availability.invalidate_bookings([booking for _, booking in bookings])
+    return results
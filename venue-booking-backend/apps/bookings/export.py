@@ -0,0 +1,108 @@
+"""
+Streaming booking exports.
+
+Rows are read as tuples through a server-side cursor
+(``.iterator(chunk_size=...)``) and written out one chunk at a time as
+NDJSON or CSV, so an export of any size holds one chunk in memory. With
+server-side cursors disabled (``DB_POOL_MODE=pgbouncer``) the chunks are
+seeked on ``id`` instead, one short query each.
+
+``ExportResponse`` streams the chunks under both WSGI and ASGI; under ASGI
+Django would otherwise collect a synchronous iterator into a list before
+sending anything.
+"""
+import csv
+from io import StringIO
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.http import StreamingHttpResponse
+
+# column name: lookup
+COLUMNS = {
+    "id": "id",
+    "booking_date": "booking_date",
+    "start_time": "start_time",
+    "end_time": "end_time",
+    "status": "status",
+    "total_price": "total_price",
+    "venue_id": "venue_id",
+    "venue": "venue__name",
+    "user_id": "user_id",
+    "phone_number": "user__phone_number",
+    "created_at": "created_at",
+    "updated_at": "updated_at",
+    "expires_at": "expires_at",
+}
+
+
+def _ndjson(rows, header):
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    return "".join(encoder.encode(dict(zip(COLUMNS, row))) + "\n" for row in rows)
+
+
+def _csv(rows, header):
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(COLUMNS)
+    writer.writerows(rows)
+    return buffer.getvalue()
+
+
+# format: (write chunk, content type, file extension)
+FORMATS = {
+    "ndjson": (_ndjson, "application/x-ndjson", "ndjson"),
+    "csv": (_csv, "text/csv; charset=utf-8", "csv"),
+}
+
+
+def export_chunks(queryset, chunk_size=None):
+    """Lists of up to ``chunk_size`` row tuples of ``queryset``, in ``id`` order."""
+    chunk_size = chunk_size or getattr(settings, "BOOKING_EXPORT_CHUNK_SIZE", 2000)
+    rows = queryset.order_by("pk").values_list(*COLUMNS.values())
+    if connections[rows.db].settings_dict.get("DISABLE_SERVER_SIDE_CURSORS"):
+        last_id = None
+        while True:
+            chunk = list((rows if last_id is None else rows.filter(pk__gt=last_id))[:chunk_size])
+            if not chunk:
+                return
+            yield chunk
+            last_id = chunk[-1][0]
+    else:
+        iterator = rows.iterator(chunk_size=chunk_size)
+        while chunk := list(islice(iterator, chunk_size)):
+            yield chunk
+
+
+def export(queryset, fmt="ndjson", chunk_size=None):
+    """``queryset`` as NDJSON or CSV text, one string per chunk."""
+    write = FORMATS[fmt][0]
+    header = True
+    for chunk in export_chunks(queryset, chunk_size):
+        yield write(chunk, header)
+        header = False
+    if header and fmt == "csv":
+        yield write([], header)
+
+
+class ExportResponse(StreamingHttpResponse):
+    """Streams ``export()`` as an attachment named ``filename``."""
+
+    def __init__(self, queryset, fmt="ndjson", filename="bookings", chunk_size=None):
+        _, content_type, extension = FORMATS[fmt]
+        super().__init__(export(queryset, fmt, chunk_size), content_type=content_type)
+        self["Content-Disposition"] = f'attachment; filename="{filename}.{extension}"'
+        self["Cache-Control"] = "no-store"
+        # Let nginx pass chunks on as they come
+        self["X-Accel-Buffering"] = "no"
+
+    async def __aiter__(self):
+        # Each chunk is fetched on the request's sync thread, which owns
+        # its database connection and cursor
+        next_chunk = sync_to_async(next, thread_sensitive=True)
+        while (chunk := await next_chunk(self._iterator, None)) is not None:
+            yield self.make_bytes(chunk)
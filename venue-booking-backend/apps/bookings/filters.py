@@ -0,0 +1,30 @@
+import django_filters
+
+from .models import Booking
+
+
+class NumberInFilter(django_filters.BaseInFilter, django_filters.NumberFilter):
+    pass
+
+
+class ChoiceInFilter(django_filters.BaseInFilter, django_filters.ChoiceFilter):
+    pass
+
+
+class BookingExportFilter(django_filters.FilterSet):
+    date_from = django_filters.DateFilter(
+        field_name="booking_date",
+        lookup_expr="gte",
+        help_text="Bookings on or after this date",
+    )
+    date_to = django_filters.DateFilter(
+        field_name="booking_date",
+        lookup_expr="lte",
+        help_text="Bookings on or before this date",
+    )
+    venue = NumberInFilter(field_name="venue_id", help_text="Comma-separated venue ids")
+    status = ChoiceInFilter(choices=Booking.Status.choices, help_text="Comma-separated statuses")
+
+    class Meta:
+        model = Booking
+        fields = ["date_from", "date_to", "venue", "status"]
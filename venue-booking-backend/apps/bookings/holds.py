@@ -0,0 +1,60 @@
+"""
+Slot holds.
+
+With ``BOOKING_HOLD_MINUTES`` set, a new booking is pending and holds its
+slot until ``expires_at`` (that long after it was made) unless it is
+confirmed first. Active-booking queries ignore expired holds right away, and
+a cached bitmap expires with the first hold it covers. The rows themselves
+are marked expired in batches by ``manage.py expire_holds``. Until then the
+exclusion constraint still
+counts them, so a booking that collides with one expires the holds in its
+way and tries again.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import availability
+from .models import Booking
+
+
+def hold_expiry():
+    """``expires_at`` for a booking made now, or None if holds never expire."""
+    minutes = getattr(settings, "BOOKING_HOLD_MINUTES", 0)
+    return timezone.now() + timedelta(minutes=minutes) if minutes else None
+
+
+def expire(queryset=None, limit=None) -> int:
+    """Mark up to ``limit`` expired holds in ``queryset`` expired; returns how many."""
+    if queryset is None:
+        queryset = Booking.objects.all()
+    with transaction.atomic():
+        # Oldest first along booking_hold_expiry; rows another sweeper or
+        # a cancellation has locked are left to them
+        holds = (
+            queryset.expired_holds()
+            .order_by("expires_at")
+            .select_for_update(skip_locked=True)
+            .only("venue", "booking_date", "start_time", "end_time")
+        )
+        holds = list(holds[:limit] if limit else holds)
+        if holds:
+            Booking.objects.filter(pk__in=[hold.pk for hold in holds]).update(
+                status=Booking.Status.EXPIRED, updated_at=timezone.now()
+            )
+            availability.invalidate_bookings(holds)
+    return len(holds)
+
+
+def expire_overlapping(venue_id, booking_date, start_time, end_time) -> int:
+    """Expire the expired holds in the way of a new booking."""
+    return expire(
+        Booking.objects.filter(
+            venue_id=venue_id,
+            booking_date=booking_date,
+            start_time__lt=end_time,
+            end_time__gt=start_time,
+        )
+    )
@@ -0,0 +1,530 @@
+import json
+import platform
+import random
+import statistics
+import subprocess
+import time
+from collections import Counter
+from datetime import timedelta
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import URLResolver, get_resolver, resolve
+from django.utils import timezone
+from drf_spectacular.drainage import GENERATOR_STATS
+from rest_framework.settings import api_settings
+
+from apps.bookings import availability, synthetic
+from apps.bookings.availability import CLOSING_HOUR, OPENING_HOUR
+from apps.bookings.models import Booking
+from apps.users.models import User
+from apps.users.otp import store_otp
+from apps.users.tokens import UserRefreshToken
+from apps.venues.cache import LIST_GENERATION_KEY, bump_generation, venue_generation_key
+from apps.venues.management.commands.seed_venues import VENUES_DATA
+from apps.venues.models import VenueImage
+
+ADMIN_PHONE = "+998019999999"
+# Bookings written by the scenarios go this far ahead, clear of generated ones
+WRITE_DAYS_AHEAD = 700
+HOT_SET = 10  # venues the cached scenarios rotate over; the warmup fills them in
+PERCENTILES = {"p50": 50, "p90": 90, "p95": 95, "p99": 99}
+
+# Scenarios that would be too slow at the full iteration count
+MAX_ITERATIONS = {"schema": 10, "booking-export": 20}
+
+
+class Rollback(Exception):
+    """Raised to discard whatever the scenarios wrote."""
+
+
+def _routes(patterns, prefix=""):
+    for pattern in patterns:
+        route = prefix + str(pattern.pattern)
+        if isinstance(pattern, URLResolver) and not route.startswith("admin/"):
+            yield from _routes(pattern.url_patterns, route)
+        else:
+            # The admin is covered as a whole by its own scenarios
+            yield "admin/" if route.startswith("admin/") else route
+
+
+def _covered_route(path):
+    route = resolve(path.split("?")[0]).route
+    return "admin/" if route.startswith("admin/") else route
+
+
+def _git(*args):
+    try:
+        return subprocess.run(
+            ["git", *args], capture_output=True, text=True, check=True, cwd=settings.BASE_DIR
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _summary(samples, query_counts, statuses, errors):
+    quantiles = statistics.quantiles(samples, n=100, method="inclusive")
+    return {
+        "iterations": len(samples),
+        "errors": errors,
+        "status_codes": {str(code): count for code, count in sorted(statuses.items())},
+        "latency_ms": {
+            "mean": round(statistics.fmean(samples), 3),
+            **{name: round(quantiles[percentile - 1], 3) for name, percentile in PERCENTILES.items()},
+            "max": round(max(samples), 3),
+        },
+        "queries": {
+            "min": min(query_counts),
+            "median": statistics.median(query_counts),
+            "max": max(query_counts),
+        },
+    }
+
+
+def compare(baseline, current, max_regression=None):
+    """Rows of per-endpoint changes between two result files, and the regressions."""
+    rows, regressions = [], []
+    for name, result in current["endpoints"].items():
+        before = baseline["endpoints"].get(name)
+        if before is None:
+            continue
+        row = {"endpoint": name}
+        for key in ("p50", "p95"):
+            old, new = before["latency_ms"][key], result["latency_ms"][key]
+            row[key] = (new - old) / old * 100 if old else 0.0
+        row["queries"] = result["queries"]["median"] - before["queries"]["median"]
+        rows.append(row)
+        if row["queries"] > 0 or (max_regression is not None and row["p95"] > max_regression):
+            regressions.append(name)
+    return rows, regressions
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure latency percentiles and query counts of every endpoint in "
+        "config/urls.py against the data of generate_load_data. Requests go "
+        "through Django's test client in this process and read from the "
+        "primary; anything they write is rolled back, and the cache "
+        "generations the uncached scenarios bump are restored. Results are "
+        "written as JSON and can be compared with an earlier run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=50, help="Timed requests per scenario")
+        parser.add_argument("--warmup", type=int, default=10, help="Untimed requests per scenario first")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--only", action="append", metavar="SCENARIO", help="Repeatable")
+        parser.add_argument("--exclude", action="append", metavar="SCENARIO", help="Repeatable")
+        parser.add_argument(
+            "--send-otp",
+            action="store_true",
+            help="Also run send-otp, which queues real SMS messages to synthetic numbers",
+        )
+        parser.add_argument(
+            "--output",
+            help="Where to write the results (default: benchmarks/endpoints-<time>.json)",
+        )
+        parser.add_argument("--compare", metavar="BASELINE", help="Results file to compare with")
+        parser.add_argument(
+            "--results",
+            metavar="FILE",
+            help="Compare this results file with --compare instead of running the benchmark",
+        )
+        parser.add_argument(
+            "--max-regression",
+            type=float,
+            metavar="PERCENT",
+            help="With --compare, fail when a p95 grew by more than this or a query count grew",
+        )
+
+    def handle(self, *args, **options):
+        if options["results"]:
+            if not options["compare"]:
+                raise CommandError("--results needs --compare.")
+            results = self._load(options["results"])
+        else:
+            if options["iterations"] < 2:
+                raise CommandError("--iterations must be at least 2.")
+            results = self._benchmark(options)
+            output = Path(
+                options["output"] or f"benchmarks/endpoints-{timezone.now():%Y%m%d-%H%M%S}.json"
+            )
+            output.parent.mkdir(parents=True, exist_ok=True)
+            output.write_text(json.dumps(results, indent=2) + "\n")
+            self.stdout.write(self.style.SUCCESS(f"Results written to {output}"))
+
+        if options["compare"]:
+            rows, regressions = compare(self._load(options["compare"]), results, options["max_regression"])
+            self.stdout.write(f"\nCompared with {options['compare']}:")
+            for row in rows:
+                self.stdout.write(
+                    f"{row['endpoint']:28} p50 {row['p50']:+7.1f}%   p95 {row['p95']:+7.1f}%   "
+                    f"queries {row['queries']:+g}"
+                )
+            if regressions and options["max_regression"] is not None:
+                raise CommandError(f"Regressed: {', '.join(regressions)}")
+
+    def _load(self, path):
+        try:
+            return json.loads(Path(path).read_text())
+        except (OSError, ValueError) as exc:
+            raise CommandError(f"Cannot read {path}: {exc}")
+
+    def _benchmark(self, options):
+        if not synthetic.synthetic_venues().filter(is_active=True).exists() or not synthetic.synthetic_users().exists():
+            raise CommandError("No synthetic data; run generate_load_data first.")
+
+        self.touched = set()  # (venue id, date) whose bitmaps the writes changed
+        self.generations = {}  # generation key: [value before the run, bumps]
+        results = {
+            "meta": self._meta(options),
+            "endpoints": {},
+            "skipped": {},
+            "uncovered": [],
+        }
+        covered = set()
+        # The test client's host; throttles see a different address per
+        # request. Replica reads would miss the uncommitted writes and the
+        # query counts, so every read goes to the primary. Schema warnings
+        # would be printed on every generation
+        overrides = override_settings(
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+            DATABASE_REPLICAS=[],
+        )
+        with overrides, GENERATOR_STATS.silence():
+            try:
+                with transaction.atomic():
+                    scenarios, skipped = self._scenarios(options["seed"])
+                    if not options["send_otp"]:
+                        send_otp = scenarios.pop("send-otp")[0]
+                        skipped["send-otp"] = (send_otp(0)[2], "Queues SMS messages; run with --send-otp.")
+                    for name, (path, reason) in skipped.items():
+                        results["skipped"][name] = reason
+                        if path:
+                            covered.add(_covered_route(path))
+                    for name in [*(options["only"] or []), *(options["exclude"] or [])]:
+                        if name not in scenarios and name not in results["skipped"]:
+                            raise CommandError(f"Unknown scenario {name!r}.")
+                    for name, (build, expected) in scenarios.items():
+                        if options["only"] and name not in options["only"]:
+                            continue
+                        if options["exclude"] and name in options["exclude"]:
+                            continue
+                        # Parameters of one scenario do not depend on which others run
+                        self.rng = random.Random(f"{options['seed']}:{name}")
+                        iterations = min(options["iterations"], MAX_ITERATIONS.get(name, options["iterations"]))
+                        result = self._measure(build, expected, iterations, options["warmup"])
+                        covered.add(result.pop("route"))
+                        results["endpoints"][name] = result
+                        latency = result["latency_ms"]
+                        self.stdout.write(
+                            f"{name:28} p50 {latency['p50']:8.2f} ms   p95 {latency['p95']:8.2f} ms   "
+                            f"p99 {latency['p99']:8.2f} ms   queries {result['queries']['median']:g}"
+                            + (self.style.WARNING(f"   {result['errors']} errors") if result["errors"] else "")
+                        )
+                    raise Rollback
+            except Rollback:
+                pass
+            finally:
+                for venue_id, day in self.touched:
+                    availability.invalidate(venue_id, day)
+                self._restore_generations()
+
+        if not (options["only"] or options["exclude"]):
+            results["uncovered"] = sorted(set(_routes(get_resolver().url_patterns)) - covered)
+            for route in results["uncovered"]:
+                self.stdout.write(self.style.WARNING(f"No scenario for {route}"))
+        return results
+
+    def _bump(self, *keys):
+        """``bump_generation``, remembering the value to restore afterwards."""
+        for key in keys:
+            if key not in self.generations:
+                self.generations[key] = [cache.get(key), 0]
+            bump_generation(key)
+            self.generations[key][1] += 1
+
+    def _restore_generations(self):
+        # Responses cached under the old generations match the rolled-back
+        # data again. A counter something else bumped meanwhile is left be
+        for key, (original, bumps) in self.generations.items():
+            if original is not None and cache.get(key) == original + bumps:
+                cache.set(key, original, timeout=None)
+
+    def _meta(self, options):
+        return {
+            "created_at": timezone.now().isoformat(),
+            "git_commit": _git("rev-parse", "HEAD"),
+            "git_dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "postgresql": connection.pg_version,
+            "settings": {
+                "DB_POOL_MODE": getattr(settings, "DB_POOL_MODE", None),
+                "FAST_SERIALIZATION": getattr(settings, "FAST_SERIALIZATION", False),
+                "CACHE_BACKEND": settings.CACHES["default"]["BACKEND"],
+                "DEBUG": settings.DEBUG,
+            },
+            "data": {
+                "users": synthetic.synthetic_users().count(),
+                "venues": synthetic.synthetic_venues().count(),
+                "images": VenueImage.objects.filter(venue__in=synthetic.synthetic_venues()).count(),
+                "bookings": Booking.objects.filter(venue__in=synthetic.synthetic_venues()).count(),
+            },
+            "options": {key: options[key] for key in ("iterations", "warmup", "seed")},
+        }
+
+    def _measure(self, build, expected, iterations, warmup):
+        for index in range(warmup):
+            self._send(*build(index))
+        samples, query_counts, statuses = [], [], Counter()
+        route = None
+        for index in range(warmup, warmup + iterations):
+            request = build(index)
+            route = route or _covered_route(request[2])
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                status = self._send(*request)
+                samples.append((time.perf_counter() - started) * 1000)
+            query_counts.append(len(queries))
+            statuses[status] += 1
+        errors = sum(count for status, count in statuses.items() if status not in expected)
+        return {"route": route, **_summary(samples, query_counts, statuses, errors)}
+
+    def _send(self, client, method, path, body=None, token=None):
+        self.address += 1
+        extra = {"REMOTE_ADDR": f"10.{self.address >> 16 & 255}.{self.address >> 8 & 255}.{self.address & 255}"}
+        if token:
+            extra["HTTP_AUTHORIZATION"] = f"Bearer {token}"
+        response = client.generic(
+            method,
+            path,
+            json.dumps(body) if body is not None else "",
+            content_type="application/json",
+            **extra,
+        )
+        # Streamed bodies (exports, media) are part of the response time.
+        # The client closes responses itself, keeping the connection and
+        # with it the transaction open
+        if response.streaming:
+            b"".join(response.streaming_content)
+        return response.status_code
+
+    def _token(self, user):
+        if user.pk not in self.tokens:
+            self.tokens[user.pk] = UserRefreshToken.for_user(user)
+        return self.tokens[user.pk]
+
+    def _scenarios(self, seed):
+        """``{name: (build, expected statuses)}``, and ``{name: (example path, reason)}`` of skipped ones."""
+        rng = random.Random(seed)
+        client = Client(raise_request_exception=False)
+        self.address = 0
+        self.tokens = {}
+        today = timezone.localdate()
+        write_day = today + timedelta(days=WRITE_DAYS_AHEAD)
+
+        users = list(synthetic.synthetic_users().order_by("pk")[:500])
+        rng.shuffle(users)
+        busiest = list(
+            synthetic.synthetic_users()
+            .annotate(booking_count=Count("bookings"))
+            .order_by("-booking_count", "pk")[:20]
+        )
+        my_bookings = list(
+            Booking.objects.filter(user__in=busiest).order_by("-created_at").values_list("user_id", "pk")[:200]
+        )
+        by_id = {user.pk: user for user in busiest}
+        active = synthetic.synthetic_venues().filter(is_active=True)
+        pages = min(-(-active.count() // api_settings.PAGE_SIZE), 20)
+        venues = list(active.order_by("pk")[:500])
+        rng.shuffle(venues)
+        hot = venues[:HOT_SET]
+        amenities = sorted({amenity for venue in venues for amenity in venue.amenities_ru})
+        words = sorted(
+            {word for data in VENUES_DATA for word in data["name_en"].split() + data["name_ru"].split() if len(word) > 4}
+        )
+        admin = User.objects.create_superuser(ADMIN_PHONE)
+        admin_client = Client(raise_request_exception=False)
+        admin_client.force_login(admin)
+
+        def window(index):
+            length = self.rng.randint(1, 3)
+            start = self.rng.randrange(OPENING_HOUR, CLOSING_HOUR - length + 1)
+            return f"{start:02d}:00", f"{start + length:02d}:00"
+
+        def send_otp(index):
+            return client, "POST", "/api/auth/send-otp/", {"phone_number": users[index % len(users)].phone_number}
+
+        def verify_otp(index):
+            phone_number = users[index % len(users)].phone_number
+            store_otp(phone_number, "123456", timeout=300)
+            return client, "POST", "/api/auth/verify-otp/", {"phone_number": phone_number, "otp": "123456"}
+
+        def refresh(index):
+            return client, "POST", "/api/auth/refresh/", {"refresh": str(self._token(users[index % len(users)]))}
+
+        def me(index):
+            return client, "GET", "/api/auth/me/", None, self._token(users[index % len(users)]).access_token
+
+        def me_update(index):
+            user = users[index % len(users)]
+            return client, "PATCH", "/api/auth/me/", {"name": f"Benchmark {index}"}, self._token(user).access_token
+
+        def venue_list(index):
+            return client, "GET", "/api/venues/"
+
+        def venue_list_uncached(index):
+            self._bump(LIST_GENERATION_KEY)
+            return client, "GET", f"/api/venues/?page={index % pages + 1}"
+
+        def venue_list_authenticated(index):
+            user = users[index % len(users)]
+            return client, "GET", "/api/venues/?pagination=cursor", None, self._token(user).access_token
+
+        def venue_filter(index):
+            self._bump(LIST_GENERATION_KEY)
+            chosen = ",".join(self.rng.sample(amenities, min(2, len(amenities))))
+            return client, "GET", f"/api/venues/?amenities_any={chosen}&min_price=100000&max_price=800000"
+
+        def venue_search(index):
+            self._bump(LIST_GENERATION_KEY)
+            return client, "GET", f"/api/venues/?search={self.rng.choice(words)}"
+
+        def venue_available(index):
+            start, end = window(index)
+            day = today + timedelta(days=self.rng.randrange(30))
+            return client, "GET", f"/api/venues/available/?date={day}&start_time={start}&end_time={end}"
+
+        def venue_detail(index):
+            return client, "GET", f"/api/venues/{hot[index % len(hot)].pk}/"
+
+        def venue_detail_uncached(index):
+            venue = venues[index % len(venues)]
+            self._bump(LIST_GENERATION_KEY, venue_generation_key(venue.pk))
+            return client, "GET", f"/api/venues/{venue.pk}/"
+
+        def venue_availability(index):
+            return client, "GET", f"/api/venues/{hot[index % len(hot)].pk}/availability/?date={today}"
+
+        def venue_availability_uncached(index):
+            venue = venues[index % len(venues)]
+            day = today + timedelta(days=self.rng.randrange(30))
+            # invalidate() waits for a commit that never comes
+            version = availability.get_versions(venue.pk, [day])[day]
+            cache.delete(availability.availability_key(venue.pk, day, version))
+            return client, "GET", f"/api/venues/{venue.pk}/availability/?date={day}"
+
+        def venue_availability_range(index):
+            venue = venues[index % len(venues)]
+            return (
+                client,
+                "GET",
+                f"/api/venues/{venue.pk}/availability/?date_from={today}&date_to={today + timedelta(days=13)}",
+            )
+
+        def booking_list(index):
+            return client, "GET", "/api/bookings/", None, self._token(busiest[index % len(busiest)]).access_token
+
+        def booking_create(index):
+            venue, day = venues[index % len(venues)], write_day + timedelta(days=index)
+            self.touched.add((venue.pk, day))
+            body = {"venue": venue.pk, "booking_date": str(day), "start_time": "10:00", "end_time": "12:00"}
+            return client, "POST", "/api/bookings/", body, self._token(users[index % len(users)]).access_token
+
+        def booking_batch(index):
+            venue = venues[index % len(venues)]
+            days = [write_day + timedelta(days=index * 4 + offset) for offset in range(4)]
+            self.touched.update((venue.pk, day) for day in days)
+            body = {
+                "venue": venue.pk,
+                "items": [{"booking_date": str(day), "start_time": "14:00", "end_time": "15:00"} for day in days],
+            }
+            return client, "POST", "/api/bookings/batch/", body, self._token(users[index % len(users)]).access_token
+
+        def booking_detail(index):
+            user_id, booking_id = my_bookings[index % len(my_bookings)]
+            return client, "GET", f"/api/bookings/{booking_id}/", None, self._token(by_id[user_id]).access_token
+
+        def booking_cancel(index):
+            user, venue = users[index % len(users)], venues[index % len(venues)]
+            day = write_day + timedelta(days=index)
+            self.touched.add((venue.pk, day))
+            booking = Booking.objects.create(
+                user=user,
+                venue=venue,
+                booking_date=day,
+                start_time=f"{CLOSING_HOUR - 1}:00",
+                end_time=f"{CLOSING_HOUR}:00",
+                total_price=venue.price_per_hour,
+                status=Booking.Status.CONFIRMED,
+            )
+            return client, "PATCH", f"/api/bookings/{booking.pk}/cancel/", None, self._token(user).access_token
+
+        def booking_export(index):
+            date_from = today - timedelta(days=7 * (index % 4 + 1))
+            path = f"/api/bookings/export/?date_from={date_from}&date_to={date_from + timedelta(days=6)}"
+            return client, "GET", path, None, self._token(admin).access_token
+
+        def page(path):
+            return lambda index: (client, "GET", path)
+
+        def admin_page(path):
+            return lambda index: (admin_client, "GET", path)
+
+        scenarios = {
+            "send-otp": (send_otp, {200}),
+            "verify-otp": (verify_otp, {200}),
+            "token-refresh": (refresh, {200}),
+            "me": (me, {200}),
+            "me-update": (me_update, {200}),
+            "venue-list": (venue_list, {200}),
+            "venue-list-uncached": (venue_list_uncached, {200}),
+            "venue-list-authenticated": (venue_list_authenticated, {200}),
+            "venue-filter": (venue_filter, {200}),
+            "venue-search": (venue_search, {200}),
+            "venue-available": (venue_available, {200}),
+            "venue-detail": (venue_detail, {200}),
+            "venue-detail-uncached": (venue_detail_uncached, {200}),
+            "venue-availability": (venue_availability, {200}),
+            "venue-availability-uncached": (venue_availability_uncached, {200}),
+            "venue-availability-range": (venue_availability_range, {200}),
+            "booking-list": (booking_list, {200}),
+            "booking-create": (booking_create, {201}),
+            "booking-batch": (booking_batch, {201}),
+            "booking-detail": (booking_detail, {200}),
+            "booking-cancel": (booking_cancel, {200}),
+            "booking-export": (booking_export, {200}),
+            "schema": (page("/api/schema/"), {200}),
+            "swagger-ui": (page("/api/docs/"), {200}),
+            "redoc": (page("/api/redoc/"), {200}),
+            "admin-index": (admin_page("/admin/"), {200}),
+            "admin-bookings": (admin_page("/admin/bookings/booking/"), {200}),
+        }
+        skipped = {}
+        if not my_bookings:
+            del scenarios["booking-detail"]
+            skipped["booking-detail"] = ("/api/bookings/0/", "The synthetic users have no bookings.")
+        image = next(
+            (
+                name
+                for name in VenueImage.objects.filter(venue__in=venues).values_list("image", flat=True).distinct()[:20]
+                if VenueImage._meta.get_field("image").storage.exists(name)
+            ),
+            None,
+        )
+        if not settings.SERVE_MEDIA:
+            skipped["media"] = (None, "SERVE_MEDIA is off.")
+        elif image is None:
+            path = f"{settings.MEDIA_URL}venues/images/missing.jpg"
+            skipped["media"] = (path, "No image files; generate the data with --image-files.")
+        else:
+            scenarios["media"] = (page(f"{settings.MEDIA_URL}{image}"), {200})
+        return scenarios, skipped
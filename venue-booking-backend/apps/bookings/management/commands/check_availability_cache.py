@@ -0,0 +1,97 @@
+from collections import defaultdict
+from datetime import date, timedelta
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.bookings import availability
+from apps.bookings.models import Booking
+from apps.venues.models import Venue
+
+
+class Command(BaseCommand):
+    help = "Compare cached availability bitmaps against the bookings table"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--date",
+            type=date.fromisoformat,
+            default=None,
+            help="First day to check (YYYY-MM-DD, default: today)",
+        )
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=30,
+            help="Number of days to check (default: 30)",
+        )
+        parser.add_argument(
+            "--venue",
+            type=int,
+            action="append",
+            dest="venues",
+            help="Only check this venue id (repeatable)",
+        )
+        parser.add_argument(
+            "--fix",
+            action="store_true",
+            help="Invalidate mismatched entries so the next read rebuilds them",
+        )
+
+    def handle(self, *args, **options):
+        if options["days"] < 1:
+            raise CommandError("--days must be at least 1.")
+
+        date_from = options["date"] or date.today()
+        date_to = date_from + timedelta(days=options["days"] - 1)
+
+        venues = Venue.objects.all()
+        if options["venues"]:
+            venues = venues.filter(pk__in=options["venues"])
+        venue_ids = list(venues.values_list("pk", flat=True))
+
+        # Expected bitmaps for the whole range, built from a single query
+        intervals = defaultdict(list)
+        rows = Booking.objects.filter(
+            venue_id__in=venue_ids,
+            booking_date__range=(date_from, date_to),
+        ).active().values_list("venue_id", "booking_date", "start_time", "end_time")
+        for venue_id, booking_date, start_time, end_time in rows:
+            intervals[(venue_id, booking_date)].append((start_time, end_time))
+
+        days = [date_from + timedelta(days=i) for i in range(options["days"])]
+        version_keys = {
+            availability.version_key(venue_id, day): (venue_id, day)
+            for venue_id in venue_ids
+            for day in days
+        }
+        # Only entries under the current versions can still be served
+        versions = cache.get_many(list(version_keys))
+        keys = {
+            availability.availability_key(*version_keys[key], version): version_keys[key]
+            for key, version in versions.items()
+        }
+        cached = cache.get_many(list(keys))
+
+        mismatched = []
+        for key, bitmap in cached.items():
+            expected = availability.bitmap_from_intervals(intervals.get(keys[key], ()))
+            if bitmap != expected:
+                mismatched.append(keys[key])
+                venue_id, day = keys[key]
+                self.stdout.write(
+                    self.style.WARNING(f"Stale: venue {venue_id} on {day}")
+                )
+
+        if mismatched and options["fix"]:
+            for venue_id, day in mismatched:
+                availability.invalidate(venue_id, day)
+
+        summary = (
+            f"\nChecked {len(cached)} cached entries "
+            f"({len(version_keys)} venue-days), {len(mismatched)} stale"
+        )
+        if mismatched and options["fix"]:
+            summary += ", fixed"
+        style = self.style.WARNING if mismatched else self.style.SUCCESS
+        self.stdout.write(style(summary + "."))
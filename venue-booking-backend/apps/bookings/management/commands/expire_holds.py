@@ -0,0 +1,43 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.bookings import holds
+
+
+class Command(BaseCommand):
+    help = "Mark pending bookings whose hold has run out as expired and free their slots"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep sweeping every --interval seconds",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=getattr(settings, "BOOKING_HOLD_SWEEP_INTERVAL", 30),
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=getattr(settings, "BOOKING_HOLD_SWEEP_BATCH_SIZE", 1000),
+            help="Holds expired per transaction",
+        )
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            expired = holds.expire(limit=options["batch_size"])
+            total += expired
+            if expired == options["batch_size"]:
+                continue
+            if not options["loop"]:
+                break
+            if total:
+                self.stdout.write(self.style.SUCCESS(f"Expired {total} holds."))
+                total = 0
+            time.sleep(options["interval"])
+        self.stdout.write(self.style.SUCCESS(f"Expired {total} holds."))
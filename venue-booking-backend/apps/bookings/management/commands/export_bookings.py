@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.bookings import export
+from apps.bookings.filters import BookingExportFilter
+from apps.bookings.models import Booking
+
+
+class Command(BaseCommand):
+    help = "Write bookings as NDJSON or CSV, streamed through a server-side cursor"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=list(export.FORMATS), default="ndjson")
+        parser.add_argument("--date-from", help="YYYY-MM-DD, inclusive")
+        parser.add_argument("--date-to", help="YYYY-MM-DD, inclusive")
+        parser.add_argument("--venue", help="Comma-separated venue ids")
+        parser.add_argument("--status", help="Comma-separated statuses")
+        parser.add_argument("--chunk-size", type=int, default=None, help="Default: BOOKING_EXPORT_CHUNK_SIZE")
+        parser.add_argument("--output", "-o", default="-", help="File to write (default: stdout)")
+
+    def handle(self, *args, **options):
+        data = {name: options[name] for name in ("date_from", "date_to", "venue", "status") if options[name]}
+        filterset = BookingExportFilter(data, queryset=Booking.objects.all())
+        if not filterset.is_valid():
+            raise CommandError(
+                "; ".join(f"{name}: {' '.join(errors)}" for name, errors in filterset.errors.items())
+            )
+
+        chunks = export.export(filterset.qs, options["format"], options["chunk_size"])
+        if options["output"] == "-":
+            for chunk in chunks:
+                self.stdout.write(chunk, ending="")
+            return
+        with open(options["output"], "w", encoding="utf-8", newline="") as file:
+            file.writelines(chunks)
+        self.stdout.write(self.style.SUCCESS(f"Exported bookings to {options['output']}."))
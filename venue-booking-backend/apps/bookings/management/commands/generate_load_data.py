@@ -0,0 +1,69 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.bookings import synthetic
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a reproducible synthetic data set (users, venues, images and "
+        "bookings) for load tests and benchmark_endpoints. --purge removes a "
+        "previously generated one first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--venues", type=int, default=500)
+        parser.add_argument("--images", type=int, default=1500, help="Image rows, spread over the venues")
+        parser.add_argument(
+            "--image-files",
+            type=int,
+            default=4,
+            help="Distinct pictures stored and rendered for the image rows (0: no files)",
+        )
+        parser.add_argument("--bookings", type=int, default=50_000)
+        parser.add_argument("--days-back", type=int, default=90, help="Days of past bookings")
+        parser.add_argument("--days-ahead", type=int, default=60, help="Days of upcoming bookings")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--purge", action="store_true", help="Delete existing synthetic data first")
+        parser.add_argument("--purge-only", action="store_true", help="Only delete existing synthetic data")
+
+    def handle(self, *args, **options):
+        if options["purge"] or options["purge_only"]:
+            deleted = synthetic.purge()
+            self.stdout.write(self.style.SUCCESS("Purged " + ", ".join(f"{n} {kind}" for kind, n in deleted.items())))
+            if options["purge_only"]:
+                return
+        if min(options["users"], options["venues"], options["images"], options["bookings"], options["image_files"]) < 0:
+            raise CommandError("Volumes must not be negative.")
+        if options["days_back"] < 0 or options["days_ahead"] < 1:
+            raise CommandError("--days-back must not be negative and --days-ahead must be at least 1.")
+
+        started = time.perf_counter()
+        try:
+            counts = synthetic.generate(
+                users=options["users"],
+                venues=options["venues"],
+                images=options["images"],
+                bookings=options["bookings"],
+                days_back=options["days_back"],
+                days_ahead=options["days_ahead"],
+                image_files=options["image_files"],
+                seed=options["seed"],
+                progress=self.stdout.write,
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Generated " + ", ".join(f"{n} {kind}" for kind, n in counts.items())
+                + f" in {time.perf_counter() - started:.1f}s"
+            )
+        )
+        if counts["bookings"] < options["bookings"]:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"Only {counts['bookings']} of {options['bookings']} bookings fit the venues' free slots."
+                )
+            )
@@ -0,0 +1,25 @@
+# Generated by Django 5.0.14 on 2026-10-18 11:00
+
+import apps.bookings.models
+import django.contrib.postgres.constraints
+import django.contrib.postgres.operations
+import django.db.models.expressions
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0002_initial'),
+        ('venues', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        django.contrib.postgres.operations.BtreeGistExtension(),
+        migrations.AddConstraint(
+            model_name='booking',
+            constraint=django.contrib.postgres.constraints.ExclusionConstraint(condition=models.Q(('status__in', ['pending', 'confirmed'])), expressions=[('venue', '='), (apps.bookings.models.TsRange(models.ExpressionWrapper(django.db.models.expressions.CombinedExpression(models.F('booking_date'), '+', models.F('start_time')), output_field=models.DateTimeField()), models.ExpressionWrapper(django.db.models.expressions.CombinedExpression(models.F('booking_date'), '+', models.F('end_time')), output_field=models.DateTimeField())), '&&')], name='booking_no_overlap', violation_error_message='This time slot is already booked. Please choose a different time.'),
+        ),
+    ]
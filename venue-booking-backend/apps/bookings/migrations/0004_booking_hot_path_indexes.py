@@ -0,0 +1,28 @@
+# Generated by Django 5.0.14 on 2026-10-18 11:01
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction; building
+    # the indexes this way keeps the bookings table writable meanwhile.
+    atomic = False
+
+    dependencies = [
+        ('bookings', '0003_booking_no_overlap'),
+        ('venues', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='booking',
+            index=models.Index(condition=models.Q(('status__in', ['pending', 'confirmed'])), fields=['venue', 'booking_date', 'start_time'], include=('end_time',), name='booking_venue_date_active'),
+        ),
+        AddIndexConcurrently(
+            model_name='booking',
+            index=models.Index(fields=['user', '-created_at'], name='booking_user_created'),
+        ),
+    ]
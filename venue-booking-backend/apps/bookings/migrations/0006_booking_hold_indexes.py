@@ -0,0 +1,30 @@
+# Generated by Django 5.0.14 on 2026-10-18 11:42
+
+from django.contrib.postgres.operations import AddIndexConcurrently, RemoveIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # As in 0004: build the indexes concurrently. The widened active index is
+    # built under a temporary name and swapped in by 0007, so lookups never
+    # go without one.
+    atomic = False
+
+    dependencies = [
+        ('bookings', '0005_booking_holds'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='booking',
+            index=models.Index(condition=models.Q(('status__in', ['pending', 'confirmed'])), fields=['venue', 'booking_date', 'start_time'], include=('end_time', 'expires_at'), name='booking_venue_date_live'),
+        ),
+        RemoveIndexConcurrently(
+            model_name='booking',
+            name='booking_venue_date_active',
+        ),
+        AddIndexConcurrently(
+            model_name='booking',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['expires_at'], name='booking_hold_expiry'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-18 11:42
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0006_booking_hold_indexes'),
+    ]
+
+    operations = [
+        migrations.RenameIndex(
+            model_name='booking',
+            new_name='booking_venue_date_active',
+            old_name='booking_venue_date_live',
+        ),
+    ]
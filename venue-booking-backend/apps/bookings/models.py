@@ -1,8 +1,55 @@
 from django.conf import settings
+from django.contrib.postgres.constraints import ExclusionConstraint
+from django.contrib.postgres.fields import DateTimeRangeField, RangeOperators
 from django.db import models
+from django.utils import timezone
+
 
 from apps.venues.models import Venue
 
+OVERLAP_CONSTRAINT = "booking_no_overlap"
+OVERLAP_ERROR = "This time slot is already booked. Please choose a different time."
+
+
+def violates_overlap(exc) -> bool:
+    """Whether the ``IntegrityError`` ``exc`` was raised by the no-overlap constraint."""
+    diag = getattr(exc.__cause__, "diag", None)
+    return diag is not None and diag.constraint_name == OVERLAP_CONSTRAINT
+
+
+class TsRange(models.Func):
+    """PostgreSQL ``tsrange(lower, upper)`` with the default ``[)`` bounds."""
+
+    function = "TSRANGE"
+    output_field = DateTimeRangeField()
+
+
+def _booking_timestamp(time_field):
+    return models.ExpressionWrapper(
+        models.F("booking_date") + models.F(time_field),
+        output_field=models.DateTimeField(),
+    )
+
+
+class BookingQuerySet(models.QuerySet):
+    def active(self):
+        """Bookings that still hold their time slot: confirmed, or pending and not expired."""
+        return self.filter(status__in=Booking.ACTIVE_STATUSES).filter(
+            models.Q(expires_at__isnull=True) | models.Q(expires_at__gt=timezone.now())
+        )
+
+    def expired_holds(self):
+        """Pending bookings past their expiry that the sweeper has not reached yet."""
+        return self.filter(status=Booking.Status.PENDING, expires_at__lte=timezone.now())
+
+    def overlapping(self, booking_date, start_time, end_time):
+        """Active bookings on ``booking_date`` that intersect ``[start_time, end_time)``."""
+        return self.active().filter(
+            booking_date=booking_date,
+            start_time__lt=end_time,
+            end_time__gt=start_time,
+        )
+
 
 class Booking(models.Model):
     class Status(models.TextChoices):
@@ -10,6 +57,9 @@ class Booking(models.Model):
         CONFIRMED = "confirmed", "Confirmed"
         CANCELLED = "cancelled", "Cancelled"
         COMPLETED = "completed", "Completed"
+        EXPIRED = "expired", "Expired"
+
+    ACTIVE_STATUSES = (Status.PENDING, Status.CONFIRMED)
 
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -30,13 +80,64 @@ class Booking(models.Model):
         choices=Status.choices,
         default=Status.PENDING,
     )
+    # Until when a pending booking holds its slot; cleared on confirmation
+    expires_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = BookingQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Booking"
         verbose_name_plural = "Bookings"
         ordering = ["-created_at"]
+        indexes = [
+            # Availability and overlap lookups only ever touch active rows;
+            # end_time and expires_at are included so availability can scan
+            # the index alone.
+            models.Index(
+                fields=["venue", "booking_date", "start_time"],
+                include=["end_time", "expires_at"],
+                name="booking_venue_date_active",
+                condition=models.Q(status__in=["pending", "confirmed"]),
+            ),
+            # The sweeper's scan for expired holds.
+            models.Index(
+                fields=["expires_at"],
+                name="booking_hold_expiry",
+                condition=models.Q(status="pending"),
+            ),
+            # "My bookings" list: filter by user, newest first.
+            models.Index(
+                fields=["user", "-created_at"],
+                name="booking_user_created",
+            ),
+        ]
+        constraints = [
+            # Only holds expire, so an expired confirmed booking can never be
+            # mistaken for a free slot.
+            models.CheckConstraint(
+                check=~models.Q(status="confirmed") | models.Q(expires_at__isnull=True),
+                name="booking_confirmed_no_expiry",
+            ),
+            # Two active bookings of the same venue may not share any minute.
+            # Needs the btree_gist extension for the equality part on venue_id.
+            ExclusionConstraint(
+                name=OVERLAP_CONSTRAINT,
+                expressions=[
+                    ("venue", RangeOperators.EQUAL),
+                    (
+                        TsRange(
+                            _booking_timestamp("start_time"),
+                            _booking_timestamp("end_time"),
+                        ),
+                        RangeOperators.OVERLAPS,
+                    ),
+                ],
+                condition=models.Q(status__in=["pending", "confirmed"]),
+                violation_error_message=OVERLAP_ERROR,
+            ),
+        ]
 
     def __str__(self):
         return f"Booking #{self.pk} – {self.venue.name} on {self.booking_date}"
@@ -51,7 +152,14 @@ class Booking(models.Model):
         duration_hours = Decimal(str((end_dt - start_dt).total_seconds() / 3600))
         return round(self.venue.price_per_hour * duration_hours, 2)
 
+    def clean(self):
+        # Before validate_constraints, so confirming a hold in the admin passes
+        if self.status == self.Status.CONFIRMED:
+            self.expires_at = None
+
     def save(self, *args, **kwargs):
+        if self.status == self.Status.CONFIRMED:
+            self.expires_at = None
         if not self.total_price:
             self.total_price = self.calculate_total_price()
         super().save(*args, **kwargs)
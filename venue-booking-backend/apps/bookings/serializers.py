@@ -1,17 +1,46 @@
-from datetime import time
+from datetime import time, timedelta
 
+from django.conf import settings
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
+from rest_framework.settings import api_settings
 
-from apps.venues.serializers import VenueListSerializer
+from apps.venues.models import Venue
+from apps.venues.serializers import VenueCompactSerializer, VenueDetailSerializer
 
-from .models import Booking
+from . import availability, batch, holds
+from .availability import CLOSING_HOUR, OPENING_HOUR
+from .models import OVERLAP_ERROR, Booking, violates_overlap
 
-OPENING_HOUR = 9
-CLOSING_HOUR = 22
+
+def validate_hours(start_time, end_time):
+    """Reject intervals that end before they start or fall outside opening hours."""
+    # Ensure end_time > start_time
+    if end_time <= start_time:
+        raise serializers.ValidationError(
+            {"end_time": "End time must be after start time."}
+        )
+
+    # Validate booking hours (9 AM – 10 PM)
+    if start_time < time(OPENING_HOUR, 0):
+        raise serializers.ValidationError(
+            {"start_time": f"Bookings are only allowed from {OPENING_HOUR}:00."}
+        )
+    if end_time > time(CLOSING_HOUR, 0):
+        raise serializers.ValidationError(
+            {"end_time": f"Bookings are only allowed until {CLOSING_HOUR}:00."}
+        )
+
+
+def validate_venue(venue):
+    if not venue.is_active:
+        raise serializers.ValidationError(
+            {"venue": "This venue is not available for booking."}
+        )
 
 
 class BookingSerializer(serializers.ModelSerializer):
-    venue_detail = VenueListSerializer(source="venue", read_only=True)
+    venue_detail = VenueDetailSerializer(source="venue", read_only=True)
 
     class Meta:
         model = Booking
@@ -25,10 +54,17 @@ class BookingSerializer(serializers.ModelSerializer):
             "end_time",
             "total_price",
             "status",
+            "expires_at",
             "created_at",
             "updated_at",
         ]
-        read_only_fields = ["id", "user", "total_price", "status", "created_at", "updated_at"]
+        read_only_fields = ["id", "user", "total_price", "status", "expires_at", "created_at", "updated_at"]
+
+
+class BookingListSerializer(BookingSerializer):
+    """Booking list representation with a compact nested venue."""
+
+    venue_detail = VenueCompactSerializer(source="venue", read_only=True)
 
 
 class BookingCreateSerializer(serializers.ModelSerializer):
@@ -37,53 +73,131 @@ class BookingCreateSerializer(serializers.ModelSerializer):
         fields = ["venue", "booking_date", "start_time", "end_time"]
 
     def validate(self, attrs):
-        start_time = attrs["start_time"]
-        end_time = attrs["end_time"]
-        venue = attrs["venue"]
-        booking_date = attrs["booking_date"]
+        validate_hours(attrs["start_time"], attrs["end_time"])
+        validate_venue(attrs["venue"])
 
-        # Ensure end_time > start_time
-        if end_time <= start_time:
-            raise serializers.ValidationError(
-                {"end_time": "End time must be after start time."}
-            )
+        # Double-booking is prevented by the booking_no_overlap exclusion
+        # constraint at insert time (see create), not by a separate read here.
 
-        # Validate booking hours (9 AM – 10 PM)
-        if start_time < time(OPENING_HOUR, 0):
-            raise serializers.ValidationError(
-                {"start_time": f"Bookings are only allowed from {OPENING_HOUR}:00."}
-            )
-        if end_time > time(CLOSING_HOUR, 0):
-            raise serializers.ValidationError(
-                {"end_time": f"Bookings are only allowed until {CLOSING_HOUR}:00."}
-            )
+        return attrs
+
+    def create(self, validated_data):
+        # The id is enough; request.user may not have loaded the row
+        booking = Booking(user_id=self.context["request"].user.pk, **validated_data)
+        booking.total_price = booking.calculate_total_price()
+        booking.expires_at = holds.hold_expiry()
+        for retry in (True, False):
+            try:
+                with transaction.atomic():
+                    booking.save()
+                break
+            except IntegrityError as exc:
+                if not violates_overlap(exc):
+                    raise
+                # Retry once if the slot was only taken by expired holds
+                if not (retry and holds.expire_overlapping(
+                    booking.venue_id, booking.booking_date, booking.start_time, booking.end_time
+                )):
+                    raise serializers.ValidationError(
+                        {api_settings.NON_FIELD_ERRORS_KEY: [OVERLAP_ERROR]}
+                    )
+        availability.invalidate_bookings([booking])
+        return booking
+
+    def to_representation(self, instance):
+        return BookingSerializer(instance, context=self.context).data
 
-        # Ensure venue is active
-        if not venue.is_active:
+
+class BookingIntervalSerializer(serializers.Serializer):
+    booking_date = serializers.DateField()
+    start_time = serializers.TimeField()
+    end_time = serializers.TimeField()
+
+    def validate(self, attrs):
+        validate_hours(attrs["start_time"], attrs["end_time"])
+        return attrs
+
+
+class BookingRecurrenceSerializer(serializers.Serializer):
+    """The same slot on the given weekdays (Monday is 0) from start to end date."""
+
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+    weekdays = serializers.ListField(
+        child=serializers.IntegerField(min_value=0, max_value=6), min_length=1
+    )
+    start_time = serializers.TimeField()
+    end_time = serializers.TimeField()
+
+    def validate(self, attrs):
+        if attrs["end_date"] < attrs["start_date"]:
             raise serializers.ValidationError(
-                {"venue": "This venue is not available for booking."}
+                {"end_date": "End date must not be before start date."}
             )
+        validate_hours(attrs["start_time"], attrs["end_time"])
+        return attrs
 
-        # Prevent double-booking: check for overlapping bookings
-        overlapping = Booking.objects.filter(
-            venue=venue,
-            booking_date=booking_date,
-            status__in=["pending", "confirmed"],
-        ).filter(
-            start_time__lt=end_time,
-            end_time__gt=start_time,
-        )
+    @staticmethod
+    def expand(recurrence) -> list:
+        weekdays = set(recurrence["weekdays"])
+        days = (recurrence["end_date"] - recurrence["start_date"]).days + 1
+        return [
+            {
+                "booking_date": booking_date,
+                "start_time": recurrence["start_time"],
+                "end_time": recurrence["end_time"],
+            }
+            for booking_date in (recurrence["start_date"] + timedelta(days=n) for n in range(days))
+            if booking_date.weekday() in weekdays
+        ]
 
-        if overlapping.exists():
+
+class BookingBatchSerializer(serializers.Serializer):
+    """
+    Many bookings of one venue: an explicit list of ``items`` or a
+    ``recurrence``. ``all_or_nothing`` creates nothing if any interval is
+    taken; ``best_effort`` creates the free ones.
+    """
+
+    venue = serializers.PrimaryKeyRelatedField(queryset=Venue.objects.all())
+    mode = serializers.ChoiceField(choices=batch.MODES, default=batch.ALL_OR_NOTHING)
+    items = BookingIntervalSerializer(many=True, required=False)
+    recurrence = BookingRecurrenceSerializer(required=False)
+
+    def validate(self, attrs):
+        validate_venue(attrs["venue"])
+        if ("items" in attrs) == ("recurrence" in attrs):
+            raise serializers.ValidationError("Provide either items or a recurrence.")
+        if "recurrence" in attrs:
+            intervals = BookingRecurrenceSerializer.expand(attrs.pop("recurrence"))
+        else:
+            intervals = attrs.pop("items")
+
+        limit = getattr(settings, "BOOKING_BATCH_MAX_ITEMS", 100)
+        if not intervals:
+            raise serializers.ValidationError("The batch contains no bookings.")
+        if len(intervals) > limit:
             raise serializers.ValidationError(
-                "This time slot is already booked. Please choose a different time."
+                f"A batch may contain at most {limit} bookings, not {len(intervals)}."
             )
-
+        attrs["intervals"] = intervals
         return attrs
 
-    def create(self, validated_data):
-        user = self.context["request"].user
-        booking = Booking(user=user, **validated_data)
-        booking.total_price = booking.calculate_total_price()
-        booking.save()
-        return booking
+
+class BookingBatchResultSerializer(serializers.Serializer):
+    index = serializers.IntegerField()
+    booking_date = serializers.DateField()
+    start_time = serializers.TimeField()
+    end_time = serializers.TimeField()
+    status = serializers.ChoiceField(choices=batch.STATUSES)
+    id = serializers.IntegerField(required=False)
+    total_price = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
+    expires_at = serializers.DateTimeField(required=False)
+    detail = serializers.CharField(required=False)
+
+
+class BookingBatchResponseSerializer(serializers.Serializer):
+    mode = serializers.ChoiceField(choices=batch.MODES)
+    created = serializers.IntegerField()
+    failed = serializers.IntegerField()
+    results = BookingBatchResultSerializer(many=True)
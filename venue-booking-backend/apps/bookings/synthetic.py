@@ -0,0 +1,356 @@
+"""
+Synthetic load data.
+
+``generate()`` fills the database with production-like volumes of users,
+venues, venue images and bookings, the same rows for the same seed:
+
+* venues are variations of the ``seed_venues`` catalogue: log-normal
+  prices around the template's, a subset of its amenities, ~5% inactive;
+* a few distinct pictures are stored and rendered once and shared by all
+  image rows, like deduplicated uploads share files and variants;
+* bookings pick venues and users with Zipf-like popularity, weekends busier
+  than weekdays, evening-heavy start hours, mostly one or two hours, and
+  fewer bookings the further ahead a day is. Past bookings are completed,
+  cancelled or expired holds; upcoming ones confirmed, cancelled or
+  pending. A venue's active bookings never overlap.
+
+Generated rows are tagged (venue ``external_id`` ``synthetic-…``, phone
+numbers under ``PHONE_PREFIX``) so ``purge()`` can remove them again. They
+are written with ``bulk_create``, which skips the model signals, so the
+response cache is invalidated once at the end.
+"""
+import math
+import random
+import re
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from io import BytesIO
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from django.utils import timezone
+from PIL import Image
+
+from apps.users.models import User
+from apps.venues.cache import bump_venues
+from apps.venues.images import render_variants
+from apps.venues.management.commands.seed_venues import VENUES_DATA
+from apps.venues.models import Venue, VenueImage
+
+from .availability import CLOSING_HOUR, OPENING_HOUR
+from .models import Booking
+
+EXTERNAL_ID_PREFIX = "synthetic-"
+PHONE_PREFIX = "+99800"  # followed by 7 digits; not a real operator code
+BATCH_SIZE = 5000
+
+INACTIVE_SHARE = 0.05
+PRICE_SIGMA = 0.35  # spread of the log-normal price factor
+ZIPF_EXPONENT = 0.8  # popularity of the n-th venue or user ~ 1 / n ** exponent
+WEEKEND_WEIGHT = 1.8
+LEAD_HALF_LIFE_DAYS = 14  # bookings per upcoming day halve every two weeks
+MEAN_LEAD_DAYS = 7  # how long before the slot a booking is made, on average
+
+# start hour: relative weight; evenings are the busiest
+START_HOURS = {
+    hour: weight
+    for hour, weight in zip(range(OPENING_HOUR, CLOSING_HOUR), [2, 3, 4, 4, 4, 5, 5, 6, 8, 10, 10, 8, 5])
+}
+# hours: relative weight
+DURATIONS = {1: 45, 2: 30, 3: 15, 4: 10}
+# status: relative weight, for past and for upcoming days
+PAST_STATUSES = {
+    Booking.Status.COMPLETED: 85,
+    Booking.Status.CANCELLED: 12,
+    Booking.Status.EXPIRED: 3,
+}
+UPCOMING_STATUSES = {
+    Booking.Status.CONFIRMED: 75,
+    Booking.Status.CANCELLED: 12,
+    Booking.Status.PENDING: 13,
+}
+HOLDING_STATUSES = {Booking.Status.COMPLETED, Booking.Status.CONFIRMED, Booking.Status.PENDING}
+
+FIRST_NAMES = ["Aziz", "Dilnoza", "Jasur", "Madina", "Sardor", "Nilufar", "Bekzod", "Gulnora", "Timur", "Zarina"]
+IMAGE_SIZE = (1600, 1067)
+
+
+def synthetic_venues():
+    return Venue.objects.filter(external_id__startswith=EXTERNAL_ID_PREFIX)
+
+
+def synthetic_users():
+    return User.objects.filter(phone_number__startswith=PHONE_PREFIX)
+
+
+def _zipf_cum_weights(count):
+    total, cum_weights = 0.0, []
+    for rank in range(1, count + 1):
+        total += 1 / rank**ZIPF_EXPONENT
+        cum_weights.append(total)
+    return cum_weights
+
+
+def _cum_weights(weights):
+    total, cum_weights = 0.0, []
+    for weight in weights:
+        total += weight
+        cum_weights.append(total)
+    return cum_weights
+
+
+def _pick(rng, weights):
+    return rng.choices(list(weights), weights=list(weights.values()))[0]
+
+
+def _venue(rng, number):
+    template = VENUES_DATA[number % len(VENUES_DATA)]
+    house = str(rng.randint(1, 200))
+    amenity_count = len(template["amenities_ru"])
+    kept = sorted(rng.sample(range(amenity_count), rng.randint(max(amenity_count - 2, 1), amenity_count)))
+    price = max(round(float(template["price_per_hour"]) * math.exp(rng.gauss(0, PRICE_SIGMA)), -4), 10000)
+    fields = {
+        "external_id": f"{EXTERNAL_ID_PREFIX}{number}",
+        "price_per_hour": Decimal(int(price)).quantize(Decimal("0.01")),
+        "is_active": rng.random() >= INACTIVE_SHARE,
+    }
+    for lang in settings.MODELTRANSLATION_LANGUAGES:
+        suffix = f" №{number}" if lang == "ru" else f" #{number}"
+        fields[f"name_{lang}"] = template[f"name_{lang}"] + suffix
+        fields[f"address_{lang}"] = re.sub(r"\d+", house, template[f"address_{lang}"], count=1)
+        fields[f"description_{lang}"] = template[f"description_{lang}"]
+        fields[f"amenities_{lang}"] = [template[f"amenities_{lang}"][index] for index in kept]
+    default = settings.MODELTRANSLATION_DEFAULT_LANGUAGE
+    for field in ("name", "address", "description", "amenities"):
+        fields[field] = fields[f"{field}_{default}"]
+    return Venue(**fields)
+
+
+def _picture(rng) -> bytes:
+    """A deterministic, JPEG-compressible picture in a random tint."""
+    gradient = Image.linear_gradient("L")
+    picture = Image.merge("RGB", (gradient, Image.radial_gradient("L"), gradient.rotate(90)))
+    tint = Image.new("RGB", picture.size, tuple(rng.randrange(256) for _ in range(3)))
+    picture = Image.blend(picture, tint, 0.6).resize(IMAGE_SIZE, Image.BILINEAR)
+    buffer = BytesIO()
+    picture.save(buffer, "JPEG", quality=85)
+    return buffer.getvalue()
+
+
+def _image_sources(rng, count):
+    """``(name, variants)`` of ``count`` stored pictures, or of missing files if 0."""
+    if not count:
+        return [(f"venues/images/synthetic-{index}.jpg", {}) for index in range(4)]
+    storage = VenueImage._meta.get_field("image").storage
+    sources = []
+    for index in range(count):
+        name = storage.save(f"venues/images/synthetic-{index}.jpg", ContentFile(_picture(rng)))
+        sources.append((name, render_variants(name, storage)))
+    return sources
+
+
+def _set_created_at(table, ids, timestamps):
+    """``created_at`` / ``updated_at`` that ``auto_now_add`` would not let ``bulk_create`` write."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {connection.ops.quote_name(table)} AS t "
+            "SET created_at = v.stamp, updated_at = v.stamp "
+            "FROM (SELECT unnest(%s::bigint[]) AS id, unnest(%s::timestamptz[]) AS stamp) AS v "
+            "WHERE t.id = v.id",
+            [ids, timestamps],
+        )
+
+
+def _bookings(rng, count, venues, user_ids, days_back, days_ahead):
+    """Yields unsaved bookings with their ``created_at``."""
+    now = timezone.now()
+    today = timezone.localdate()
+    hold = timedelta(minutes=getattr(settings, "BOOKING_HOLD_MINUTES", 15) or 15)
+
+    offsets = list(range(-days_back, days_ahead))
+    day_weights = _cum_weights(
+        (WEEKEND_WEIGHT if (today + timedelta(days=offset)).weekday() >= 5 else 1)
+        * (0.5 ** (offset / LEAD_HALF_LIFE_DAYS) if offset > 0 else 1)
+        for offset in offsets
+    )
+    venues = list(venues)
+    rng.shuffle(venues)
+    venue_weights = _zipf_cum_weights(len(venues))
+    user_ids = list(user_ids)
+    rng.shuffle(user_ids)
+    user_weights = _zipf_cum_weights(len(user_ids))
+    hours, hour_weights = list(START_HOURS), _cum_weights(START_HOURS.values())
+    durations, duration_weights = list(DURATIONS), _cum_weights(DURATIONS.values())
+
+    taken = {}  # (venue id, day offset): bitmask of held hours
+    made, attempts = 0, 0
+    # Popular venues fill up; give up once most draws keep colliding
+    while made < count and attempts < count * 5:
+        attempts += 1
+        venue = rng.choices(venues, cum_weights=venue_weights)[0]
+        offset = rng.choices(offsets, cum_weights=day_weights)[0]
+        start = rng.choices(hours, cum_weights=hour_weights)[0]
+        length = min(rng.choices(durations, cum_weights=duration_weights)[0], CLOSING_HOUR - start)
+        status = _pick(rng, PAST_STATUSES if offset < 0 else UPCOMING_STATUSES)
+        # Cancelled and lapsed bookings were made for free slots too, but
+        # leave them free
+        mask = ((1 << length) - 1) << (start - OPENING_HOUR)
+        held = taken.get((venue.pk, offset), 0)
+        if held & mask:
+            continue
+        if status in HOLDING_STATUSES:
+            taken[(venue.pk, offset)] = held | mask
+
+        booking_date = today + timedelta(days=offset)
+        starts_at = timezone.make_aware(datetime.combine(booking_date, time(start)))
+        lead = timedelta(hours=rng.expovariate(1 / (MEAN_LEAD_DAYS * 24)))
+        created_at = min(starts_at - lead, now - timedelta(minutes=rng.randrange(1, 24 * 60)))
+        expires_at = None
+        if status == Booking.Status.PENDING:
+            created_at = now - timedelta(seconds=rng.randrange(int(hold.total_seconds())))
+            expires_at = created_at + hold
+        elif status == Booking.Status.EXPIRED:
+            expires_at = created_at + hold
+        made += 1
+        yield Booking(
+            user_id=rng.choices(user_ids, cum_weights=user_weights)[0],
+            venue_id=venue.pk,
+            booking_date=booking_date,
+            start_time=time(start),
+            end_time=time(start + length),
+            total_price=venue.price_per_hour * length,
+            status=status,
+            expires_at=expires_at,
+        ), created_at
+
+
+def _in_batches(items, write):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == BATCH_SIZE:
+            write(batch)
+            batch = []
+    if batch:
+        write(batch)
+
+
+def generate(
+    users=1000,
+    venues=500,
+    images=1500,
+    bookings=50_000,
+    days_back=90,
+    days_ahead=60,
+    image_files=0,
+    seed=42,
+    progress=None,
+) -> dict:
+    """
+    Create the synthetic data set; returns how many of each row were made.
+
+    ``image_files`` distinct pictures are stored and rendered for the image
+    rows to share; with 0 the rows name files that do not exist. Fewer
+    bookings than asked are made when the venues run out of free slots.
+    ``progress(message)`` is called as each kind of row is written.
+    """
+    if synthetic_venues().exists() or synthetic_users().exists():
+        raise ValueError("Synthetic data already exists; purge it first.")
+    if users > 10**7:
+        raise ValueError("At most 10,000,000 synthetic users fit the phone number range.")
+    if bookings and not (users and venues):
+        raise ValueError("Bookings need at least one user and one venue.")
+    rng = random.Random(seed)
+    progress = progress or (lambda message: None)
+    counts = {}
+
+    with transaction.atomic():
+        progress(f"Creating {users} users...")
+        password = make_password(None)
+        created_users = []
+        _in_batches(
+            (
+                User(
+                    phone_number=f"{PHONE_PREFIX}{number:07d}",
+                    name=rng.choice(FIRST_NAMES) if rng.random() < 0.7 else "",
+                    is_verified=True,
+                    password=password,
+                )
+                for number in range(users)
+            ),
+            lambda batch: created_users.extend(User.objects.bulk_create(batch)),
+        )
+        counts["users"] = len(created_users)
+
+        progress(f"Creating {venues} venues...")
+        created_venues = []
+        _in_batches(
+            (_venue(rng, number) for number in range(venues)),
+            lambda batch: created_venues.extend(Venue.objects.bulk_create(batch)),
+        )
+        counts["venues"] = len(created_venues)
+
+        progress(f"Creating {images} images ({image_files} distinct files)...")
+        sources = _image_sources(rng, image_files)
+        has_primary = set()
+
+        def image(venue):
+            name, variants = rng.choice(sources)
+            primary = venue.pk not in has_primary
+            has_primary.add(venue.pk)
+            return VenueImage(venue=venue, image=name, variants=variants, is_primary=primary)
+
+        counts["images"] = 0
+        if created_venues:
+            _in_batches(
+                (image(rng.choice(created_venues)) for _ in range(images)),
+                lambda batch: VenueImage.objects.bulk_create(batch),
+            )
+            counts["images"] = images
+
+        progress(f"Creating {bookings} bookings...")
+        counts["bookings"] = 0
+
+        def write_bookings(batch):
+            rows, created_at = zip(*batch)
+            rows = Booking.objects.bulk_create(rows)
+            _set_created_at(Booking._meta.db_table, [row.pk for row in rows], list(created_at))
+            counts["bookings"] += len(rows)
+
+        if bookings:
+            _in_batches(
+                _bookings(rng, bookings, created_venues, [user.pk for user in created_users], days_back, days_ahead),
+                write_bookings,
+            )
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "ANALYZE "
+                + ", ".join(
+                    connection.ops.quote_name(model._meta.db_table) for model in (User, Venue, VenueImage, Booking)
+                )
+            )
+    bump_venues([venue.pk for venue in created_venues])
+    return counts
+
+
+def purge() -> dict:
+    """Delete every synthetic row; returns how many of each kind were deleted."""
+    venues = synthetic_venues()
+    users = synthetic_users()
+    venue_ids = list(venues.values_list("pk", flat=True))
+    with transaction.atomic():
+        bookings, _ = Booking.objects.filter(venue__in=venues).delete()
+        bookings += Booking.objects.filter(user__in=users).delete()[0]
+        images, _ = VenueImage.objects.filter(venue__in=venues).delete()
+        Venue.objects.filter(pk__in=venue_ids).delete()
+        _, deleted = users.delete()
+    bump_venues(venue_ids)
+    return {
+        "users": deleted.get(User._meta.label, 0),
+        "venues": len(venue_ids),
+        "images": images,
+        "bookings": bookings,
+    }
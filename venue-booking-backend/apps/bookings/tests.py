@@ -1,20 +1,50 @@
-from datetime import date, time
+import csv
+import json
+import shutil
+import tempfile
+from datetime import date, time, timedelta
 from decimal import Decimal
+from io import StringIO
+from unittest.mock import patch
 
-from django.test import TestCase
-from rest_framework import status
+from django.contrib.auth.models import Permission
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import IntegrityError, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import permissions, status
 from rest_framework.test import APIClient
 from rest_framework_simplejwt.tokens import RefreshToken
 
-from apps.bookings.models import Booking
+from apps.bookings import availability, batch, export, holds, synthetic
+from apps.bookings.management.commands.benchmark_endpoints import compare
+from apps.bookings.models import OVERLAP_CONSTRAINT, Booking, violates_overlap
+from apps.bookings.serializers import BookingListSerializer, BookingSerializer
+from apps.bookings.throttling import BookingThrottle
+from apps.bookings.views import BookingDetailView
 from apps.users.models import User
-from apps.venues.models import Venue
+from apps.users.tokens import UserRefreshToken
+from apps.venues.cache import LIST_GENERATION_KEY, get_generation
+from apps.venues.models import Venue, VenueImage
+from config.fast_serialization import FastPlan
 
 
+LOCMEM_CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
 class BookingTests(TestCase):
     """Tests for booking endpoints."""
 
     def setUp(self):
+        cache.clear()  # throttle buckets
         self.client = APIClient()
         self.user = User.objects.create_user(phone_number="+998901234567")
         self.other_user = User.objects.create_user(phone_number="+998901234568")
@@ -74,6 +104,66 @@ class BookingTests(TestCase):
             format="json",
         )
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.data["non_field_errors"],
+            ["This time slot is already booked. Please choose a different time."],
+        )
+
+    def test_adjacent_and_cancelled_bookings_do_not_conflict(self):
+        Booking.objects.create(
+            user=self.other_user,
+            venue=self.venue,
+            booking_date=date(2026, 3, 15),
+            start_time=time(12, 0),
+            end_time=time(14, 0),
+            status="cancelled",
+        )
+        for start, end in (("10:00", "12:00"), ("12:00", "14:00")):
+            response = self.client.post(
+                "/api/bookings/",
+                {
+                    "venue": self.venue.pk,
+                    "booking_date": "2026-03-15",
+                    "start_time": start,
+                    "end_time": end,
+                },
+                format="json",
+            )
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_exclusion_constraint_rejects_overlap(self):
+        Booking.objects.create(
+            user=self.user,
+            venue=self.venue,
+            booking_date=date(2026, 3, 15),
+            start_time=time(10, 0),
+            end_time=time(12, 0),
+        )
+        with self.assertRaises(IntegrityError) as caught:
+            Booking.objects.create(
+                user=self.other_user,
+                venue=self.venue,
+                booking_date=date(2026, 3, 15),
+                start_time=time(11, 30),
+                end_time=time(13, 0),
+            )
+        self.assertTrue(violates_overlap(caught.exception))
+
+    def test_other_integrity_errors_not_taken_for_overlaps(self):
+        # Only the constraint name reported by the database counts, not the message
+        error = IntegrityError(f'value violates "{OVERLAP_CONSTRAINT}"')
+        self.assertFalse(violates_overlap(error))
+        with patch.object(Booking, "save", side_effect=error), self.assertRaises(IntegrityError):
+            self.client.post(
+                "/api/bookings/",
+                {
+                    "venue": self.venue.pk,
+                    "booking_date": "2026-03-15",
+                    "start_time": "10:00",
+                    "end_time": "12:00",
+                },
+                format="json",
+            )
 
     def test_booking_outside_hours(self):
         response = self.client.post(
@@ -124,6 +214,110 @@ class BookingTests(TestCase):
         # Should only see own bookings
         self.assertEqual(response.data["count"], 1)
 
+        self.assertEqual(
+            set(response.data["results"][0]["venue_detail"]),
+            {"id", "name", "address", "primary_image", "primary_image_srcset"},
+        )
+
+        response = self.client.get("/api/bookings/", {"pagination": "cursor"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertIsNone(response.data["next"])
+
+    def test_fast_list_and_detail_match_serializer_output(self):
+        FastPlan(BookingListSerializer())  # compiles, i.e. no silent fallback
+        FastPlan(BookingSerializer())
+        booking = Booking.objects.create(
+            user=self.user,
+            venue=self.venue,
+            booking_date=date(2026, 3, 15),
+            start_time=time(10, 30),
+            end_time=time(12, 0),
+            total_price=Decimal("150000"),
+        )
+        Booking.objects.create(
+            user=self.user,
+            venue=self.venue,
+            booking_date=date(2026, 3, 16),
+            start_time=time(10, 0),
+            end_time=time(11, 0),
+            total_price=Decimal("100000.00"),
+            status=Booking.Status.CANCELLED,
+        )
+        VenueImage.objects.create(venue=self.venue, image="venues/images/b.jpg")
+        VenueImage.objects.create(venue=self.venue, image="venues/images/a.jpg", is_primary=True)
+
+        for url, params in (
+            ("/api/bookings/", {}),
+            ("/api/bookings/", {"pagination": "cursor"}),
+            (f"/api/bookings/{booking.pk}/", {}),
+        ):
+            with self.settings(FAST_SERIALIZATION=True):
+                fast = self.client.get(url, params, HTTP_ACCEPT_LANGUAGE="en")
+            with self.settings(FAST_SERIALIZATION=False):
+                slow = self.client.get(url, params, HTTP_ACCEPT_LANGUAGE="en")
+            self.assertEqual(fast.status_code, status.HTTP_200_OK)
+            self.assertEqual(fast.content, slow.content, url)
+
+        response = self.client.get(f"/api/bookings/{booking.pk + 100}/")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_fast_detail_checks_object_permissions(self):
+        booking = Booking.objects.create(
+            user=self.user,
+            venue=self.venue,
+            booking_date=date(2026, 3, 15),
+            start_time=time(10, 0),
+            end_time=time(11, 0),
+        )
+
+        class OnlyCancelled(permissions.BasePermission):
+            def has_object_permission(self, request, view, obj):
+                return obj.status == Booking.Status.CANCELLED
+
+        with patch.object(BookingDetailView, "permission_classes", [permissions.IsAuthenticated, OnlyCancelled]):
+            with self.settings(FAST_SERIALIZATION=True):
+                response = self.client.get(f"/api/bookings/{booking.pk}/")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    @patch.dict(BookingThrottle.THROTTLE_RATES, {"bookings": "2/m"})
+    def test_booking_endpoint_throttled_per_user(self):
+        for _ in range(2):
+            self.assertEqual(self.client.get("/api/bookings/").status_code, status.HTTP_200_OK)
+        response = self.client.get("/api/bookings/")
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn(response["Retry-After"], {"30", "29"})
+
+        # Another user has their own bucket
+        other = APIClient()
+        other.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(self.other_user).access_token}")
+        self.assertEqual(other.get("/api/bookings/").status_code, status.HTTP_200_OK)
+
+    def test_token_claims_skip_user_query(self):
+        with CaptureQueriesContext(connection) as loaded:
+            self.client.get("/api/bookings/")
+
+        access = UserRefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+        with CaptureQueriesContext(connection) as claims:
+            response = self.client.get("/api/bookings/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(claims), len(loaded) - 1)
+        self.assertFalse(any('"users_user"' in query["sql"] for query in claims))
+
+        response = self.client.post(
+            "/api/bookings/",
+            {
+                "venue": self.venue.id,
+                "booking_date": str(date.today() + timedelta(days=1)),
+                "start_time": "10:00",
+                "end_time": "12:00",
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["user"], self.user.pk)
+
     def test_cancel_booking(self):
         booking = Booking.objects.create(
             user=self.user,
@@ -177,3 +371,628 @@ class BookingTests(TestCase):
             format="json",
         )
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class BookingBatchTests(TestCase):
+    """Tests for batch and recurring bookings."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(phone_number="+998901234567")
+        self.other_user = User.objects.create_user(phone_number="+998901234568")
+        token = UserRefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        self.venue = Venue.objects.create(
+            name_ru="Зал",
+            name_uz="Zal",
+            name_en="Hall",
+            address_ru="Адрес",
+            address_uz="Manzil",
+            address_en="Address",
+            price_per_hour=Decimal("100000.00"),
+            is_active=True,
+        )
+        # Mondays 2030-01-07 .. 2030-03-25
+        self.recurrence = {
+            "start_date": "2030-01-01",
+            "end_date": "2030-03-31",
+            "weekdays": [0],
+            "start_time": "10:00",
+            "end_time": "12:00",
+        }
+
+    def post(self, **data):
+        return self.client.post("/api/bookings/batch/", {"venue": self.venue.pk, **data}, format="json")
+
+    def book_existing(self, booking_date, start_time=time(11, 0), end_time=time(13, 0)):
+        Booking.objects.create(
+            user=self.other_user,
+            venue=self.venue,
+            booking_date=booking_date,
+            start_time=start_time,
+            end_time=end_time,
+        )
+
+    def test_recurrence_checks_once_and_inserts_once(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.post(recurrence=self.recurrence)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["created"], 12)
+        self.assertEqual(response.data["failed"], 0)
+
+        bookings = Booking.objects.filter(user=self.user).order_by("booking_date")
+        self.assertEqual(bookings.count(), 12)
+        self.assertTrue(all(booking.booking_date.weekday() == 0 for booking in bookings))
+        self.assertEqual(bookings[0].total_price, Decimal("200000.00"))
+        self.assertEqual(response.data["results"][0]["id"], bookings[0].pk)
+
+        sql = [query["sql"] for query in queries.captured_queries]
+        self.assertEqual(sum(q.startswith('INSERT INTO "bookings_booking"') for q in sql), 1)
+        self.assertEqual(sum(q.startswith("SELECT") and '"bookings_booking"' in q for q in sql), 1)
+
+    def test_all_or_nothing_creates_nothing_on_conflict(self):
+        self.book_existing(date(2030, 1, 14))
+        response = self.post(recurrence=self.recurrence)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["created"], 0)
+        statuses = [result["status"] for result in response.data["results"]]
+        self.assertEqual(statuses[1], batch.CONFLICT)
+        self.assertEqual(set(statuses[:1] + statuses[2:]), {batch.SKIPPED})
+        self.assertFalse(Booking.objects.filter(user=self.user).exists())
+
+    def test_best_effort_creates_free_intervals(self):
+        self.book_existing(date(2030, 1, 14))
+        response = self.post(recurrence=self.recurrence, mode=batch.BEST_EFFORT)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["created"], 11)
+        self.assertEqual(response.data["results"][1]["status"], batch.CONFLICT)
+        self.assertNotIn("id", response.data["results"][1])
+        self.assertEqual(Booking.objects.filter(user=self.user).count(), 11)
+
+    def test_items_are_checked_against_each_other(self):
+        items = [
+            {"booking_date": "2030-01-07", "start_time": "10:00", "end_time": "12:00"},
+            {"booking_date": "2030-01-07", "start_time": "11:00", "end_time": "13:00"},
+            {"booking_date": "2030-01-07", "start_time": "12:00", "end_time": "14:00"},
+        ]
+        response = self.post(items=items, mode=batch.BEST_EFFORT)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        results = response.data["results"]
+        self.assertEqual([result["status"] for result in results], [batch.CREATED, batch.CONFLICT, batch.CREATED])
+        self.assertEqual(results[1]["detail"], "Overlaps item 0 of this batch.")
+
+    def test_invalid_batches(self):
+        item = {"booking_date": "2030-01-07", "start_time": "10:00", "end_time": "12:00"}
+        response = self.post(items=[item], recurrence=self.recurrence)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.post(items=[item, {**item, "start_time": "08:00"}])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("start_time", response.data["items"][1])
+
+        with override_settings(BOOKING_BATCH_MAX_ITEMS=5):
+            response = self.post(recurrence=self.recurrence)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Booking.objects.exists())
+
+    def test_booking_committed_after_the_check_is_caught(self):
+        self.book_existing(date(2030, 1, 14))
+        checks = [lambda venue_id, intervals: [None] * len(intervals), batch.check_intervals]
+        with patch.object(batch, "check_intervals", side_effect=lambda *args: checks.pop(0)(*args)):
+            response = self.post(recurrence=self.recurrence, mode=batch.BEST_EFFORT)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["created"], 11)
+
+    def test_batch_invalidates_cached_bitmaps(self):
+        monday = date(2030, 1, 7)
+        self.assertEqual(availability.get_bitmap(self.venue.pk, monday), 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post(recurrence=self.recurrence)
+        self.assertEqual(
+            availability.get_bitmap(self.venue.pk, monday),
+            availability.interval_mask(time(10, 0), time(12, 0)),
+        )
+
+
+@override_settings(CACHES=LOCMEM_CACHES, BOOKING_HOLD_MINUTES=15)
+class BookingHoldTests(TestCase):
+    """Tests for pending-booking expiry."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(phone_number="+998901234567")
+        self.other_user = User.objects.create_user(phone_number="+998901234568")
+        token = UserRefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        self.venue = Venue.objects.create(
+            name_ru="Зал",
+            name_uz="Zal",
+            name_en="Hall",
+            address_ru="Адрес",
+            address_uz="Manzil",
+            address_en="Address",
+            price_per_hour=Decimal("100000.00"),
+            is_active=True,
+        )
+        self.day = date(2030, 1, 7)
+
+    def hold(self, start_time=time(10, 0), end_time=time(12, 0), minutes=-1, **kwargs):
+        return Booking.objects.create(
+            user=self.other_user,
+            venue=self.venue,
+            booking_date=self.day,
+            start_time=start_time,
+            end_time=end_time,
+            expires_at=timezone.now() + timedelta(minutes=minutes),
+            **kwargs,
+        )
+
+    def post(self, start_time="10:00", end_time="12:00"):
+        return self.client.post(
+            "/api/bookings/",
+            {"venue": self.venue.pk, "booking_date": self.day.isoformat(), "start_time": start_time, "end_time": end_time},
+            format="json",
+        )
+
+    def test_new_booking_holds_its_slot_until_expiry(self):
+        response = self.post()
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        booking = Booking.objects.get(pk=response.data["id"])
+        remaining = booking.expires_at - timezone.now()
+        self.assertTrue(timedelta(minutes=14) < remaining <= timedelta(minutes=15))
+
+        booking.status = Booking.Status.CONFIRMED
+        booking.full_clean()
+        booking.save()
+        booking.refresh_from_db()
+        self.assertIsNone(booking.expires_at)
+
+        with override_settings(BOOKING_HOLD_MINUTES=0):
+            response = self.post("14:00", "15:00")
+        self.assertIsNone(response.data["expires_at"])
+
+    def test_expired_holds_are_not_active(self):
+        self.hold()
+        live = self.hold(time(14, 0), time(15, 0), minutes=5)
+        self.assertEqual(list(Booking.objects.active()), [live])
+        slots = {s["start_time"]: s["is_available"] for s in availability.build_slots(
+            availability.get_bitmap(self.venue.pk, self.day)
+        )}
+        self.assertTrue(slots["10:00"])
+        self.assertFalse(slots["14:00"])
+
+    def test_cached_bitmap_expires_with_its_first_hold(self):
+        self.hold(time(14, 0), time(15, 0), minutes=5)
+        self.hold(time(16, 0), time(17, 0), minutes=8)
+        version = availability.get_versions(self.venue.pk, [self.day])[self.day]
+        key = availability.availability_key(self.venue.pk, self.day, version)
+        self.assertTrue(availability.get_bitmap(self.venue.pk, self.day))
+
+        now = timezone.now().timestamp()
+        with patch("django.core.cache.backends.locmem.time.time", return_value=now + 4 * 60):
+            self.assertIsNotNone(cache.get(key))
+        with patch("django.core.cache.backends.locmem.time.time", return_value=now + 5 * 60 + 1):
+            self.assertIsNone(cache.get(key))
+
+    def test_booking_over_an_expired_hold(self):
+        expired = self.hold(time(9, 0), time(11, 0))
+        self.hold(time(13, 0), time(14, 0))  # not in the way: left to the sweeper
+        response = self.post()
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        expired.refresh_from_db()
+        self.assertEqual(expired.status, Booking.Status.EXPIRED)
+        self.assertEqual(Booking.objects.expired_holds().count(), 1)
+
+        live = self.hold(time(15, 0), time(16, 0), minutes=5)
+        response = self.post("15:00", "17:00")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        live.refresh_from_db()
+        self.assertEqual(live.status, Booking.Status.PENDING)
+
+    def test_sweeper_expires_in_batches_and_frees_bitmaps(self):
+        for hour in (9, 11, 13):
+            self.hold(time(hour, 0), time(hour + 1, 0))
+        live = self.hold(time(15, 0), time(16, 0), minutes=5)
+        confirmed = self.hold(time(17, 0), time(18, 0), status=Booking.Status.CONFIRMED)
+        # A bitmap cached while the holds were live
+        version = availability.get_versions(self.venue.pk, [self.day])[self.day]
+        cache.set(
+            availability.availability_key(self.venue.pk, self.day, version),
+            availability.bitmap_from_intervals((time(h, 0), time(h + 1, 0)) for h in (9, 11, 13, 15, 17)),
+        )
+
+        out = StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("expire_holds", batch_size=2, stdout=out)
+        self.assertIn("Expired 3 holds.", out.getvalue())
+        self.assertEqual(Booking.objects.filter(status=Booking.Status.EXPIRED).count(), 3)
+        live.refresh_from_db()
+        confirmed.refresh_from_db()
+        self.assertEqual(live.status, Booking.Status.PENDING)
+        self.assertEqual(confirmed.status, Booking.Status.CONFIRMED)
+        self.assertEqual(
+            availability.get_bitmap(self.venue.pk, self.day),
+            availability.bitmap_from_intervals([(time(15, 0), time(16, 0)), (time(17, 0), time(18, 0))]),
+        )
+        self.assertEqual(holds.expire(), 0)
+
+    def test_batch_over_expired_holds(self):
+        self.hold()
+        response = self.client.post(
+            "/api/bookings/batch/",
+            {
+                "venue": self.venue.pk,
+                "items": [{"booking_date": self.day.isoformat(), "start_time": "10:00", "end_time": "12:00"}],
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertIsNotNone(response.data["results"][0]["expires_at"])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class AvailabilityCacheTests(TestCase):
+    """Tests for the cached occupancy bitmaps."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(phone_number="+998901234567")
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {refresh.access_token}"
+        )
+        self.venue = Venue.objects.create(
+            name_ru="Зал",
+            address_ru="Адрес",
+            price_per_hour=Decimal("100000.00"),
+        )
+        self.day = date(2026, 3, 15)
+
+    def _slot_availability(self):
+        bitmap = availability.get_bitmap(self.venue.pk, self.day)
+        return {s["start_time"]: s["is_available"] for s in availability.build_slots(bitmap)}
+
+    def test_interval_mask(self):
+        self.assertEqual(availability.interval_mask(time(9, 0), time(9, 1)), 1)
+        self.assertEqual(
+            availability.interval_mask(time(10, 0), time(11, 0)),
+            ((1 << 60) - 1) << 60,
+        )
+        # Clamped to opening hours
+        self.assertEqual(availability.interval_mask(time(7, 0), time(9, 0)), 0)
+
+    def test_miss_rebuilds_from_database(self):
+        Booking.objects.create(
+            user=self.user,
+            venue=self.venue,
+            booking_date=self.day,
+            start_time=time(10, 30),
+            end_time=time(11, 15),
+        )
+        slots = self._slot_availability()
+        self.assertFalse(slots["10:00"])
+        self.assertFalse(slots["11:00"])
+        self.assertTrue(slots["12:00"])
+
+    def _book(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                "/api/bookings/",
+                {
+                    "venue": self.venue.pk,
+                    "booking_date": "2026-03-15",
+                    "start_time": "10:00",
+                    "end_time": "12:00",
+                },
+                format="json",
+            )
+
+    def test_create_and_cancel_invalidate_cached_bitmap(self):
+        self.assertTrue(all(self._slot_availability().values()))
+        with self.assertNumQueries(0):
+            self._slot_availability()
+
+        response = self._book()
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        slots = self._slot_availability()
+        self.assertFalse(slots["10:00"])
+        self.assertFalse(slots["11:00"])
+
+        booking = Booking.objects.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(f"/api/bookings/{booking.pk}/cancel/")
+        self.assertTrue(all(self._slot_availability().values()))
+
+    def test_bitmap_built_before_a_commit_is_not_served(self):
+        build_bitmap = availability.build_bitmap
+
+        def build_then_book(venue_id, booking_date):
+            built = build_bitmap(venue_id, booking_date)
+            self._book()
+            return built
+
+        with patch.object(availability, "build_bitmap", side_effect=build_then_book):
+            self.assertTrue(self._slot_availability()["10:00"])
+        self.assertFalse(self._slot_availability()["10:00"])
+
+    def test_range_rebuild_keeps_entries_written_meanwhile(self):
+        version = availability.get_versions(self.venue.pk, [self.day])[self.day]
+        key = availability.availability_key(self.venue.pk, self.day, version)
+        build_bitmaps = availability.build_bitmaps
+
+        def build_while_cached(venue_id, days):
+            built = build_bitmaps(venue_id, days)
+            cache.set(key, 1)  # a concurrent single-day read
+            return built
+
+        with patch.object(availability, "build_bitmaps", side_effect=build_while_cached):
+            availability.get_bitmaps(self.venue.pk, self.day, self.day + timedelta(days=1))
+        self.assertEqual(cache.get(key), 1)
+
+    def test_check_command_fixes_stale_entries(self):
+        version = availability.get_versions(self.venue.pk, [self.day])[self.day]
+        key = availability.availability_key(self.venue.pk, self.day, version)
+        cache.set(key, availability.interval_mask(time(9, 0), time(10, 0)))
+
+        out = StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command(
+                "check_availability_cache", "--date", "2026-03-15", "--days", "1", "--fix",
+                stdout=out,
+            )
+        self.assertIn("1 stale", out.getvalue())
+        self.assertEqual(availability.get_bitmap(self.venue.pk, self.day), 0)
+
+
+class BookingIndexTests(TestCase):
+    """The planner should serve the hot booking queries from their indexes."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(phone_number="+998901234567")
+        self.venue = Venue.objects.create(
+            name_ru="Зал",
+            address_ru="Адрес",
+            price_per_hour=Decimal("100000.00"),
+        )
+        other_venues = [
+            Venue.objects.create(name_ru=f"Зал {i}", address_ru="Адрес", price_per_hour=Decimal("1"))
+            for i in range(4)
+        ]
+        # A few hundred rows spread over venues and days so that the
+        # selective indexes are clearly cheaper than the alternatives
+        Booking.objects.bulk_create(
+            Booking(
+                user=self.user,
+                venue=venue,
+                booking_date=date(2026, 3, 1) + timedelta(days=day),
+                start_time=time(hour, 0),
+                end_time=time(hour + 1, 0),
+                total_price=Decimal("100000.00"),
+            )
+            for venue in [self.venue, *other_venues]
+            for day in range(30)
+            for hour in (10, 12, 14)
+        )
+        with connection.cursor() as cursor:
+            # Tiny test tables would otherwise always be scanned sequentially
+            cursor.execute("ANALYZE bookings_booking")
+            cursor.execute("SET LOCAL enable_seqscan = off")
+
+    def test_availability_query_uses_partial_index(self):
+        queryset = (
+            Booking.objects.filter(venue=self.venue, booking_date=date(2026, 3, 15))
+            .active()
+            .values_list("start_time", "end_time")
+        )
+        self.assertIn("booking_venue_date_active", queryset.explain())
+
+    def test_overlap_query_uses_partial_index(self):
+        queryset = Booking.objects.filter(venue=self.venue).overlapping(
+            date(2026, 3, 15), time(11, 0), time(13, 0)
+        )
+        self.assertIn("booking_venue_date_active", queryset.explain())
+
+    def test_user_list_query_uses_user_created_index(self):
+        queryset = Booking.objects.filter(user=self.user)[:10]
+        self.assertIn("booking_user_created", queryset.explain())
+
+
+@override_settings(CACHES=LOCMEM_CACHES, BOOKING_EXPORT_CHUNK_SIZE=2)
+class BookingExportTests(TestCase):
+    """Tests for the streaming booking export."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(phone_number="+998901234567")
+        self.partner = User.objects.create_user(phone_number="+998901234568")
+        self.partner.user_permissions.add(Permission.objects.get(codename="view_booking"))
+        self.venue, self.other_venue = (
+            Venue.objects.create(
+                name_ru=name, name_uz=name, name_en=name,
+                address_ru="Адрес", address_uz="Manzil", address_en="Address",
+                price_per_hour=Decimal("100000.00"),
+            )
+            for name in ("Hall", "Yard")
+        )
+        self.bookings = [
+            Booking.objects.create(
+                user=self.user,
+                venue=venue,
+                booking_date=date(2030, 1, day),
+                start_time=time(10, 0),
+                end_time=time(12, 0),
+                status=booking_status,
+            )
+            for venue, day, booking_status in [
+                (self.venue, 1, Booking.Status.CONFIRMED),
+                (self.venue, 2, Booking.Status.CANCELLED),
+                (self.other_venue, 3, Booking.Status.CONFIRMED),
+                (self.venue, 31, Booking.Status.PENDING),
+                (self.venue, 15, Booking.Status.CONFIRMED),
+            ]
+        ]
+
+    def authenticate(self, user):
+        token = UserRefreshToken.for_user(user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def get(self, **params):
+        self.authenticate(self.partner)
+        response = self.client.get("/api/bookings/export/", params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, b"".join(response.streaming_content).decode()
+
+    def test_needs_view_permission(self):
+        self.assertEqual(self.client.get("/api/bookings/export/").status_code, status.HTTP_401_UNAUTHORIZED)
+        self.authenticate(self.user)
+        self.assertEqual(self.client.get("/api/bookings/export/").status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_ndjson(self):
+        response, body = self.get()
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([row["id"] for row in rows], sorted(booking.pk for booking in self.bookings))
+        self.assertEqual(list(rows[0]), list(export.COLUMNS))
+        self.assertEqual(rows[0]["booking_date"], "2030-01-01")
+        self.assertEqual(rows[0]["total_price"], "200000.00")
+        self.assertEqual(rows[0]["phone_number"], "+998901234567")
+
+    def test_csv_with_filters(self):
+        response, body = self.get(
+            output="csv", date_from="2030-01-01", date_to="2030-01-30", venue=self.venue.pk, status="confirmed,pending"
+        )
+        self.assertIn('filename="bookings-', response["Content-Disposition"])
+        header, *rows = csv.reader(StringIO(body))
+        self.assertEqual(header, list(export.COLUMNS))
+        self.assertEqual([row[1] for row in rows], ["2030-01-01", "2030-01-15"])
+
+    def test_empty_csv_has_header(self):
+        _, body = self.get(output="csv", date_from="2031-01-01")
+        self.assertEqual(body, ",".join(export.COLUMNS) + "\r\n")
+
+    def test_invalid_parameters(self):
+        self.authenticate(self.partner)
+        for params in ({"status": "lost"}, {"output": "xml"}, {"date_from": "soon"}):
+            response = self.client.get("/api/bookings/export/", params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, params)
+
+    def test_keyset_chunks_without_server_side_cursors(self):
+        with patch.dict(connection.settings_dict, DISABLE_SERVER_SIDE_CURSORS=True):
+            chunks = list(export.export_chunks(Booking.objects.all()))
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 2, 1])
+        self.assertEqual([row[0] for chunk in chunks for row in chunk], sorted(booking.pk for booking in self.bookings))
+
+    def test_command(self):
+        out = StringIO()
+        call_command("export_bookings", format="csv", venue=str(self.other_venue.pk), stdout=out)
+        self.assertEqual(len(out.getvalue().splitlines()), 2)
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHES,
+    # The admin's templates without a collectstatic manifest
+    STORAGES={
+        "default": {"BACKEND": "config.media.ContentHashStorage"},
+        "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+    },
+)
+class LoadDataTests(TestCase):
+    """Tests for the synthetic data generator and the endpoint benchmark."""
+
+    VOLUMES = {"users": 6, "venues": 5, "images": 8, "bookings": 80, "days_back": 10, "days_ahead": 10}
+
+    def setUp(self):
+        cache.clear()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+    def rows(self):
+        return list(
+            Booking.objects.filter(venue__in=synthetic.synthetic_venues())
+            .order_by("venue__external_id", "booking_date", "start_time", "status")
+            .values_list("venue__external_id", "user__phone_number", "booking_date", "start_time", "end_time", "status")
+        )
+
+    def test_generate_and_purge(self):
+        counts = synthetic.generate(**self.VOLUMES, seed=1)
+        self.assertEqual(counts, {"users": 6, "venues": 5, "images": 8, "bookings": 80})
+        today = timezone.localdate()
+        bookings = Booking.objects.filter(venue__in=synthetic.synthetic_venues())
+        self.assertFalse(bookings.filter(booking_date__lt=today, status__in=Booking.ACTIVE_STATUSES).exists())
+        self.assertFalse(bookings.filter(booking_date__gte=today, status=Booking.Status.COMPLETED).exists())
+        self.assertFalse(bookings.filter(created_at__gt=timezone.now()).exists())
+        self.assertFalse(bookings.filter(status=Booking.Status.PENDING, expires_at__isnull=True).exists())
+        self.assertEqual(
+            VenueImage.objects.filter(venue__in=synthetic.synthetic_venues(), is_primary=True).count(),
+            synthetic.synthetic_venues().filter(images__isnull=False).distinct().count(),
+        )
+        for booking in bookings.exclude(status__in=[Booking.Status.CANCELLED, Booking.Status.EXPIRED]):
+            self.assertFalse(
+                bookings.exclude(pk=booking.pk)
+                .exclude(status__in=[Booking.Status.CANCELLED, Booking.Status.EXPIRED])
+                .filter(
+                    venue=booking.venue_id,
+                    booking_date=booking.booking_date,
+                    start_time__lt=booking.end_time,
+                    end_time__gt=booking.start_time,
+                )
+                .exists()
+            )
+        with self.assertRaises(ValueError):
+            synthetic.generate(**self.VOLUMES, seed=1)
+
+        first = self.rows()
+        self.assertEqual(synthetic.purge(), counts)
+        self.assertFalse(synthetic.synthetic_users().exists())
+        synthetic.generate(**self.VOLUMES, seed=1)
+        self.assertEqual(self.rows(), first)
+
+    def test_benchmark_covers_every_route(self):
+        call_command("generate_load_data", **self.VOLUMES, image_files=1, stdout=StringIO())
+        bookings = Booking.objects.count()
+        output = f"{tempfile.mkdtemp()}/results.json"
+        self.addCleanup(shutil.rmtree, output.rsplit("/", 1)[0], ignore_errors=True)
+
+        generation = get_generation(LIST_GENERATION_KEY)
+        # Reads stay on the primary, so an unreachable replica does not matter
+        with override_settings(DATABASE_REPLICAS=["replica_1"]):
+            call_command("benchmark_endpoints", iterations=2, warmup=1, output=output, stdout=StringIO())
+
+        with open(output) as file:
+            results = json.load(file)
+        self.assertEqual(results["uncovered"], [])
+        self.assertEqual(list(results["skipped"]), ["send-otp"])
+        self.assertEqual(results["meta"]["data"]["bookings"], 80)
+        self.assertIn("media", results["endpoints"])
+        for name, result in results["endpoints"].items():
+            self.assertEqual(result["errors"], 0, (name, result["status_codes"]))
+            self.assertEqual(set(result["latency_ms"]), {"mean", "p50", "p90", "p95", "p99", "max"})
+        self.assertEqual(results["endpoints"]["venue-list"]["queries"]["max"], 0)  # cached
+        self.assertGreater(results["endpoints"]["booking-create"]["queries"]["min"], 0)
+        # What the scenarios wrote is rolled back
+        self.assertEqual(Booking.objects.count(), bookings)
+        self.assertFalse(User.objects.filter(is_superuser=True).exists())
+        self.assertEqual(cache.get(LIST_GENERATION_KEY), generation)
+
+    def test_benchmark_needs_data(self):
+        with self.assertRaises(CommandError):
+            call_command("benchmark_endpoints", iterations=2, stdout=StringIO())
+
+    def test_compare(self):
+        def results(p95, queries):
+            return {"endpoints": {"venue-list": {"latency_ms": {"p50": 1.0, "p95": p95}, "queries": {"median": queries}}}}
+
+        rows, regressions = compare(results(10.0, 2), results(12.0, 2), max_regression=50)
+        self.assertEqual(rows, [{"endpoint": "venue-list", "p50": 0.0, "p95": 20.0, "queries": 0}])
+        self.assertEqual(regressions, [])
+        self.assertEqual(compare(results(10.0, 2), results(16.0, 2), max_regression=50)[1], ["venue-list"])
+        # An extra query is a regression whatever the timings
+        self.assertEqual(compare(results(10.0, 2), results(10.0, 3))[1], ["venue-list"])
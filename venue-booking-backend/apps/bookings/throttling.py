@@ -0,0 +1,5 @@
+from config.throttling import UserRateThrottle
+
+
+class BookingThrottle(UserRateThrottle):
+    scope = "bookings"
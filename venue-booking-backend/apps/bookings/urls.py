@@ -4,6 +4,8 @@ from . import views
 
 urlpatterns = [
     path("", views.BookingListCreateView.as_view(), name="booking-list-create"),
+    path("batch/", views.BookingBatchView.as_view(), name="booking-batch"),
+    path("export/", views.BookingExportView.as_view(), name="booking-export"),
     path("<int:pk>/", views.BookingDetailView.as_view(), name="booking-detail"),
     path("<int:pk>/cancel/", views.BookingCancelView.as_view(), name="booking-cancel"),
 ]
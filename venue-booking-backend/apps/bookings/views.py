@@ -1,31 +1,47 @@
-from drf_spectacular.utils import extend_schema
-from rest_framework import generics, permissions, status
+from django.utils import timezone
+from django_filters.rest_framework import DjangoFilterBackend
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, extend_schema
+from rest_framework import generics, permissions, serializers, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from config.db_router import PrimaryPinMixin
+from config.fast_serialization import FastListMixin, FastRetrieveMixin
+
+from . import availability, batch, export
+from .filters import BookingExportFilter
 from .models import Booking
-from .serializers import BookingCreateSerializer, BookingSerializer
+from .serializers import (
+    BookingBatchResponseSerializer,
+    BookingBatchSerializer,
+    BookingCreateSerializer,
+    BookingListSerializer,
+    BookingSerializer,
+)
+from .throttling import BookingThrottle
 
 
-class BookingListCreateView(generics.ListCreateAPIView):
+class BookingListCreateView(PrimaryPinMixin, FastListMixin, generics.ListCreateAPIView):
     """List current user's bookings or create a new booking."""
 
     permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [BookingThrottle]
 
     def get_serializer_class(self):
         if self.request.method == "POST":
             return BookingCreateSerializer
-        return BookingSerializer
+        return BookingListSerializer
 
     def get_queryset(self):
         return (
-            Booking.objects.filter(user=self.request.user)
+            Booking.objects.filter(user_id=self.request.user.pk)
             .select_related("venue")
             .prefetch_related("venue__images")
         )
 
 
-class BookingDetailView(generics.RetrieveAPIView):
+class BookingDetailView(FastRetrieveMixin, generics.RetrieveAPIView):
     """Get booking details. Users can only view their own bookings."""
 
     serializer_class = BookingSerializer
@@ -33,13 +49,13 @@ class BookingDetailView(generics.RetrieveAPIView):
 
     def get_queryset(self):
         return (
-            Booking.objects.filter(user=self.request.user)
+            Booking.objects.filter(user_id=self.request.user.pk)
             .select_related("venue")
             .prefetch_related("venue__images")
         )
 
 
-class BookingCancelView(APIView):
+class BookingCancelView(PrimaryPinMixin, APIView):
     """Cancel a booking. Only pending/confirmed bookings can be cancelled."""
 
     permission_classes = [permissions.IsAuthenticated]
@@ -47,7 +63,7 @@ class BookingCancelView(APIView):
     @extend_schema(responses={200: BookingSerializer})
     def patch(self, request, pk):
         try:
-            booking = Booking.objects.get(pk=pk, user=request.user)
+            booking = Booking.objects.get(pk=pk, user_id=request.user.pk)
         except Booking.DoesNotExist:
             return Response(
                 {"detail": "Booking not found."},
@@ -62,6 +78,71 @@ class BookingCancelView(APIView):
 
         booking.status = Booking.Status.CANCELLED
         booking.save(update_fields=["status", "updated_at"])
+        availability.invalidate_bookings([booking])
 
         serializer = BookingSerializer(booking)
         return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class BookingBatchView(PrimaryPinMixin, APIView):
+    """Create many bookings of one venue at once, e.g. a weekly slot for a quarter."""
+
+    permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [BookingThrottle]
+
+    @extend_schema(
+        request=BookingBatchSerializer,
+        responses={201: BookingBatchResponseSerializer, 400: BookingBatchResponseSerializer},
+    )
+    def post(self, request):
+        serializer = BookingBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        mode = serializer.validated_data["mode"]
+        results = batch.create_batch(
+            request.user.pk,
+            serializer.validated_data["venue"],
+            serializer.validated_data["intervals"],
+            mode,
+        )
+
+        created = sum(result["status"] == batch.CREATED for result in results)
+        data = BookingBatchResponseSerializer(
+            {"mode": mode, "created": created, "failed": len(results) - created, "results": results}
+        ).data
+        code = status.HTTP_201_CREATED if created else status.HTTP_400_BAD_REQUEST
+        return Response(data, status=code)
+
+
+class CanExportBookings(permissions.BasePermission):
+    """Staff and partners granted ``bookings.view_booking`` (directly or by group)."""
+
+    def has_permission(self, request, view):
+        user = request.user
+        return bool(user and user.is_authenticated and user.has_perm("bookings.view_booking"))
+
+
+class BookingExportView(generics.GenericAPIView):
+    """Stream all bookings matching the filters as NDJSON (default) or CSV."""
+
+    queryset = Booking.objects.all()
+    permission_classes = [CanExportBookings]
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = BookingExportFilter
+    pagination_class = None
+
+    @extend_schema(
+        filters=True,
+        parameters=[
+            OpenApiParameter("output", enum=list(export.FORMATS), default="ndjson", description="File format"),
+        ],
+        responses={
+            (200, "application/x-ndjson"): OpenApiTypes.STR,
+            (200, "text/csv"): OpenApiTypes.STR,
+        },
+    )
+    def get(self, request):
+        fmt = request.query_params.get("output", "ndjson")
+        if fmt not in export.FORMATS:
+            raise serializers.ValidationError({"output": [f"Choose one of: {', '.join(export.FORMATS)}."]})
+        queryset = self.filter_queryset(self.get_queryset())
+        return export.ExportResponse(queryset, fmt, filename=f"bookings-{timezone.localdate():%Y%m%d}")
@@ -0,0 +1,67 @@
+"""
+JWT authentication without a user query per request.
+
+Access tokens carry ``is_active`` and ``is_verified`` claims (see
+``tokens.py``). ``TokenUserAuthentication`` trusts them and sets
+``request.user`` to a ``LazyUser``: the id, those flags and the
+authentication checks come from the token, and the ``User`` itself is only
+loaded (through ``cache.get_user``) when a view touches anything else.
+Claims are refreshed from the user whenever the access token is.
+"""
+from django.utils.functional import SimpleLazyObject, empty
+from django.utils.translation import gettext_lazy as _
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .cache import get_user
+from .models import User
+
+
+class LazyUser(SimpleLazyObject):
+    """``request.user`` answered from token claims until the row is needed."""
+
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, user_id, is_active, is_verified):
+        self.__dict__.update(id=user_id, pk=user_id, is_active=is_active, is_verified=is_verified)
+        super().__init__(lambda: self._load())
+
+    def _load(self):
+        user = get_user(self.pk)
+        if user is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        return user
+
+    def __bool__(self):
+        return True
+
+    def __copy__(self):
+        if self._wrapped is empty:
+            return type(self)(self.pk, self.is_active, self.is_verified)
+        return super().__copy__()
+
+
+class TokenUserAuthentication(JWTAuthentication):
+    """``JWTAuthentication`` that builds ``request.user`` from the token's claims."""
+
+    def get_user(self, validated_token):
+        if "is_active" not in validated_token:
+            # Issued before the claims were added
+            return super().get_user(validated_token)
+        try:
+            # simplejwt stores the id as a string
+            user_id = User._meta.pk.to_python(validated_token[api_settings.USER_ID_CLAIM])
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+        if not validated_token["is_active"]:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        return LazyUser(user_id, validated_token["is_active"], validated_token.get("is_verified", False))
+
+
+class TokenUserAuthenticationScheme(SimpleJWTScheme):
+    """Documents ``TokenUserAuthentication`` as the same bearer scheme."""
+
+    target_class = TokenUserAuthentication
@@ -0,0 +1,43 @@
+"""
+Cached ``User`` rows for token-authenticated requests.
+
+Lookups go through a short-lived in-process cache, then the shared cache
+(Redis), then the database. Saving or deleting a user drops both copies
+(see ``signals.py``); other processes may serve their local copy for up to
+``USER_LOCAL_CACHE_TIMEOUT`` seconds.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import DEFAULT_DB_ALIAS
+
+from .models import User
+
+USER_PREFIX = "users:user:"
+
+local_cache = LocMemCache("users", {"OPTIONS": {"MAX_ENTRIES": 10000}})
+
+
+def user_cache_key(user_id) -> str:
+    return f"{USER_PREFIX}{user_id}"
+
+
+def get_user(user_id):
+    """The user with ``user_id``, or None if there is none."""
+    key = user_cache_key(user_id)
+    user = local_cache.get(key)
+    if user is None:
+        user = cache.get(key)
+        if user is None:
+            user = User.objects.using(DEFAULT_DB_ALIAS).filter(pk=user_id).first()
+            if user is None:
+                return None
+            cache.set(key, user, timeout=getattr(settings, "USER_CACHE_TIMEOUT", 300))
+        local_cache.set(key, user, timeout=getattr(settings, "USER_LOCAL_CACHE_TIMEOUT", 5))
+    return user
+
+
+def invalidate_user(user_id):
+    key = user_cache_key(user_id)
+    cache.delete(key)
+    local_cache.delete(key)
@@ -0,0 +1,78 @@
+import statistics
+import time
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.users.sms import FakeGateway, SMSQueue, SMSWorker, build_message
+from config.redis_client import get_redis_client
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare sending SMS inside the request with queueing them for a worker, "
+        "using the fake gateway. Runs on a throwaway queue."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--messages", type=int, default=1000)
+        parser.add_argument("--latency-ms", type=int, default=200, help="Fake gateway latency")
+        parser.add_argument("--failure-rate", type=float, default=0.0, help="Fake gateway failure rate")
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument("--concurrency", type=int, default=32)
+
+    def handle(self, *args, **options):
+        client = get_redis_client()
+        if client is None:
+            raise CommandError("The SMS queue needs the django_redis cache backend.")
+
+        gateway = FakeGateway(options["latency_ms"], options["failure_rate"])
+        queue = SMSQueue(client, namespace=f"sms-benchmark-{uuid.uuid4().hex}")
+        messages = options["messages"]
+        try:
+            self._run(queue, gateway, messages, options)
+        finally:
+            client.delete(queue.ready, queue.retry, queue.dead)
+
+    def _run(self, queue, gateway, messages, options):
+        # Inline: each request waits for the provider
+        inline = []
+        for _ in range(min(messages, 20)):
+            start = time.perf_counter()
+            gateway.send("+998900000000", "Your verification code: 000000")
+            inline.append(time.perf_counter() - start)
+
+        # Queued: each request only appends to the list
+        enqueue = []
+        for n in range(messages):
+            message = build_message(f"+99890{n:07d}", "Your verification code: 000000")
+            start = time.perf_counter()
+            queue.push(message)
+            enqueue.append(time.perf_counter() - start)
+
+        worker = SMSWorker(
+            queue,
+            gateway=gateway,
+            name="benchmark",
+            batch_size=options["batch_size"],
+            concurrency=options["concurrency"],
+        )
+        start = time.perf_counter()
+        totals = worker.run(once=True)
+        drain = time.perf_counter() - start
+
+        self.stdout.write(
+            f"Request latency  inline: {statistics.median(inline) * 1000:8.2f} ms   "
+            f"queued: {statistics.median(enqueue) * 1000:8.3f} ms (median)"
+        )
+        self.stdout.write(
+            f"Worker drained {messages} messages in {drain:.2f}s "
+            f"({messages / drain:.0f}/s; inline one-at-a-time: {1 / statistics.median(inline):.1f}/s per worker)"
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Sent {totals['sent']}, scheduled {totals['retried']} retries, "
+                f"dead-lettered {totals['dead']}, dropped {totals['expired']} expired; "
+                f"{queue.stats()['retrying']} still waiting to retry."
+            )
+        )
@@ -0,0 +1,58 @@
+import signal
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.users.sms import SMSQueue, SMSWorker
+from config.redis_client import get_redis_client
+
+
+class Command(BaseCommand):
+    help = "Deliver queued SMS messages (OTP codes) through the configured gateway"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--name",
+            default=None,
+            help="Worker name, unique per running worker (default: hostname)",
+        )
+        parser.add_argument("--batch-size", type=int, default=None, help="Default: SMS_BATCH_SIZE")
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=None,
+            help="Sends in flight at once (default: SMS_WORKER_CONCURRENCY)",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit once no messages are ready instead of waiting for more",
+        )
+
+    def handle(self, *args, **options):
+        client = get_redis_client()
+        if client is None:
+            raise CommandError("The SMS queue needs the django_redis cache backend.")
+
+        worker = SMSWorker(
+            SMSQueue(client),
+            name=options["name"],
+            batch_size=options["batch_size"],
+            concurrency=options["concurrency"],
+        )
+
+        def stop(signum, frame):
+            worker.stopping = True
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+
+        recovered = worker.recover()
+        if recovered:
+            self.stdout.write(f"Requeued {recovered} message(s) from an interrupted batch.")
+        totals = worker.run(once=options["once"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Sent {totals['sent']}, scheduled {totals['retried']} retries, "
+                f"dead-lettered {totals['dead']}, dropped {totals['expired']} expired."
+            )
+        )
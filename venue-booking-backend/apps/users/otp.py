@@ -1,14 +1,45 @@
-import logging
+"""
+OTP issue and verification.
+
+With the Redis cache backend both operations run as server-side Lua
+scripts: one round trip each, and atomic, so concurrent requests cannot
+redeem the same code twice. Sending also queues the SMS in the same script
+(see sms.py), so a stored code always has its message on the way. Other
+cache backends (local development, tests) fall back to the plain cache API
+and deliver the SMS synchronously.
+
+How often a phone may request a code is limited by the view's
+``SendOTPPhoneThrottle`` alone.
+"""
 import random
 import string
+import time
 
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.core.cache import cache
 
-logger = logging.getLogger(__name__)
+from config.redis_client import get_async_redis_client, get_redis_client
+
+from .sms import SMSQueue, build_message, send_sms
 
 OTP_PREFIX = "otp:"
-OTP_COUNT_PREFIX = "otp_count:"
+
+# KEYS: otp, sms queue. ARGV: code, code ttl ms, sms.
+SEND_SCRIPT = """
+redis.call('SET', KEYS[1], ARGV[1], 'PX', ARGV[2])
+redis.call('RPUSH', KEYS[2], ARGV[3])
+return 1
+"""
+
+# KEYS: otp. ARGV: code. Deletes the code only when it matches.
+VERIFY_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    redis.call('DEL', KEYS[1])
+    return 1
+end
+return 0
+"""
 
 
 def generate_otp() -> str:
@@ -17,57 +48,95 @@ def generate_otp() -> str:
     return "".join(random.choices(string.digits, k=length))
 
 
-def send_otp(phone_number: str) -> dict:
+def store_otp(phone_number: str, otp: str, timeout: int):
+    """Store ``otp`` for ``phone_number`` without sending it."""
+    otp_key = f"{OTP_PREFIX}{phone_number}"
+    client = get_redis_client()
+    if client is not None:
+        client.set(cache.make_key(otp_key), otp, ex=timeout)
+    else:
+        cache.set(otp_key, otp, timeout=timeout)
+
+
+def otp_message(otp: str) -> str:
+    return f"Your verification code: {otp}"
+
+
+def _run_send_script(client, phone_number: str, otp: str):
+    """Run SEND_SCRIPT; awaitable when ``client`` is a ``redis.asyncio`` client."""
+    expiry = getattr(settings, "OTP_EXPIRY_SECONDS", 300)
+    send = client.register_script(SEND_SCRIPT)
+    return send(
+        keys=[cache.make_key(f"{OTP_PREFIX}{phone_number}"), SMSQueue(client).ready],
+        args=[
+            otp,
+            expiry * 1000,
+            build_message(phone_number, otp_message(otp), expires_at=time.time() + expiry, secret=otp),
+        ],
+    )
+
+
+def _run_verify_script(client, phone_number: str, otp: str):
+    verify = client.register_script(VERIFY_SCRIPT)
+    return verify(keys=[cache.make_key(f"{OTP_PREFIX}{phone_number}")], args=[otp])
+
+
+def _issue(phone_number: str, otp: str):
+    """Store and send ``otp``."""
+    client = get_redis_client()
+    if client is not None:
+        _run_send_script(client, phone_number, otp)
+        return
+
+    cache.set(f"{OTP_PREFIX}{phone_number}", otp, timeout=getattr(settings, "OTP_EXPIRY_SECONDS", 300))
+    send_sms(phone_number, otp_message(otp))
+
+
+def send_otp(phone_number: str):
     """
-    Generate OTP, store in Redis, and mock-send via console logging.
-    Returns dict with success status. Enforces rate limiting (3 per 10 min).
+    Generate OTP, store in Redis, and queue the SMS.
+    Callers limit how often a phone number may ask (``SendOTPPhoneThrottle``).
     """
     # Bypass for test phone numbers — use fixed OTP "000000"
     bypass_phones = getattr(settings, "OTP_TEST_BYPASS_PHONES", [])
     if phone_number in bypass_phones:
-        otp_key = f"{OTP_PREFIX}{phone_number}"
-        cache.set(otp_key, "000000", timeout=86400)  # 24h expiry
+        store_otp(phone_number, "000000", timeout=86400)  # 24h expiry
         print(f"\n{'=' * 50}")
         print(f"🔓  TEST BYPASS for {phone_number}: OTP is 000000")
         print(f"{'=' * 50}\n")
-        return {"success": True}
-
-    count_key = f"{OTP_COUNT_PREFIX}{phone_number}"
-    current_count = cache.get(count_key, 0)
-
-    if current_count >= 3:
-        return {"success": False, "error": "Rate limit exceeded. Try again later."}
-
-    otp = generate_otp()
-    otp_key = f"{OTP_PREFIX}{phone_number}"
-    expiry = getattr(settings, "OTP_EXPIRY_SECONDS", 300)
-
-    # Store OTP in Redis
-    cache.set(otp_key, otp, timeout=expiry)
+        return
 
-    # Increment rate limit counter (10-minute window)
-    if current_count == 0:
-        cache.set(count_key, 1, timeout=600)
-    else:
-        cache.incr(count_key)
+    _issue(phone_number, generate_otp())
 
-    # Mock SMS – log to console
-    logger.info("=" * 50)
-    logger.info(f"📱  OTP for {phone_number}: {otp}")
-    logger.info("=" * 50)
-    print(f"\n{'=' * 50}")
-    print(f"📱  OTP for {phone_number}: {otp}")
-    print(f"{'=' * 50}\n")
 
-    return {"success": True}
+async def asend_otp(phone_number: str):
+    """``send_otp`` for async views: the script runs on the asyncio Redis client."""
+    client = get_async_redis_client()
+    if client is None or phone_number in getattr(settings, "OTP_TEST_BYPASS_PHONES", []):
+        await sync_to_async(send_otp)(phone_number)
+        return
+    await _run_send_script(client, phone_number, generate_otp())
 
 
 def verify_otp(phone_number: str, otp: str) -> bool:
     """Verify the OTP against the value stored in Redis."""
     otp_key = f"{OTP_PREFIX}{phone_number}"
+
+    client = get_redis_client()
+    if client is not None:
+        return bool(_run_verify_script(client, phone_number, otp))
+
     stored_otp = cache.get(otp_key)
 
     if stored_otp and stored_otp == otp:
         cache.delete(otp_key)  # one-time use
         return True
     return False
+
+
+async def averify_otp(phone_number: str, otp: str) -> bool:
+    """``verify_otp`` for async views."""
+    client = get_async_redis_client()
+    if client is None:
+        return await sync_to_async(verify_otp)(phone_number, otp)
+    return bool(await _run_verify_script(client, phone_number, otp))
@@ -0,0 +1,248 @@
+"""
+Outbound SMS.
+
+Requests never wait on the SMS provider. With Redis, ``send_sms`` appends
+the message to a list and returns; ``manage.py run_sms_worker`` drains it in
+batches, sending each batch concurrently, retrying failures with exponential
+backoff and parking messages that keep failing on a dead-letter list. Other
+cache backends (local development, tests) deliver synchronously.
+
+Redis keys, all passed through ``cache.make_key``:
+
+* ``sms:queue`` — ready messages, oldest first;
+* ``sms:retry`` — sorted set of failed messages scored by their next attempt
+  (epoch ms);
+* ``sms:processing:<worker>`` — the batch a worker is delivering, put back on
+  the queue when that worker restarts, so delivery is at-least-once;
+* ``sms:dead`` — the latest ``SMS_DEAD_LETTER_MAX`` messages that failed
+  ``SMS_MAX_ATTEMPTS`` times, with their secret masked.
+
+A message may carry an ``expires_at`` (epoch seconds), e.g. the end of its
+code's validity; once past it the message is dropped instead of being sent,
+retried or dead-lettered.
+"""
+import json
+import logging
+import random
+import socket
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+
+from config.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+# KEYS: queue, retry, processing. ARGV: now ms, batch size.
+# Promotes due retries, then moves up to a batch of messages to processing.
+CLAIM_SCRIPT = """
+local size = math.max(tonumber(ARGV[2]), 1)
+local due = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', ARGV[1], 'LIMIT', 0, size)
+if #due > 0 then
+    redis.call('ZREM', KEYS[2], unpack(due))
+    redis.call('RPUSH', KEYS[1], unpack(due))
+end
+local batch = redis.call('LRANGE', KEYS[1], 0, size - 1)
+if #batch > 0 then
+    redis.call('LTRIM', KEYS[1], #batch, -1)
+    redis.call('RPUSH', KEYS[3], unpack(batch))
+end
+return batch
+"""
+
+
+class SMSDeliveryError(Exception):
+    """Raised by gateways when a message could not be delivered."""
+
+
+class ConsoleGateway:
+    """Mock SMS: logs the message to the console."""
+
+    def send(self, phone_number: str, text: str):
+        logger.info("=" * 50)
+        logger.info(f"📱  SMS to {phone_number}: {text}")
+        logger.info("=" * 50)
+        print(f"\n{'=' * 50}")
+        print(f"📱  SMS to {phone_number}: {text}")
+        print(f"{'=' * 50}\n")
+
+
+class FakeGateway:
+    """Stands in for a provider's HTTP API when benchmarking the queue."""
+
+    def __init__(self, latency_ms=None, failure_rate=None):
+        if latency_ms is None:
+            latency_ms = getattr(settings, "SMS_FAKE_GATEWAY_LATENCY_MS", 200)
+        if failure_rate is None:
+            failure_rate = getattr(settings, "SMS_FAKE_GATEWAY_FAILURE_RATE", 0.0)
+        self.latency = latency_ms / 1000
+        self.failure_rate = failure_rate
+
+    def send(self, phone_number: str, text: str):
+        time.sleep(self.latency)
+        if random.random() < self.failure_rate:
+            raise SMSDeliveryError("Fake gateway failure")
+
+
+def get_gateway():
+    return import_string(getattr(settings, "SMS_GATEWAY", "apps.users.sms.ConsoleGateway"))()
+
+
+def build_message(phone_number: str, text: str, expires_at=None, secret=None) -> str:
+    """
+    Serialize a queued message. ``secret`` is the part of ``text`` to mask in
+    the dead-letter copy; ``expires_at`` is when the message stops mattering.
+    """
+    message = {"id": uuid.uuid4().hex, "to": phone_number, "text": text, "attempts": 0}
+    if expires_at is not None:
+        message["expires_at"] = expires_at
+    if secret is not None:
+        message["secret"] = secret
+    return json.dumps(message)
+
+
+def is_expired(message: dict, now: float) -> bool:
+    return message.get("expires_at") is not None and message["expires_at"] <= now
+
+
+def redact(message: dict) -> dict:
+    """``message`` without its secret, for keeping around."""
+    secret = message.pop("secret", None)
+    if secret:
+        message["text"] = message["text"].replace(secret, "*" * len(secret))
+    return message
+
+
+class SMSQueue:
+    """Key names for one queue; ``namespace`` keeps benchmarks off the real one."""
+
+    def __init__(self, client, namespace="sms"):
+        self.client = client
+        self.ready = cache.make_key(f"{namespace}:queue")
+        self.retry = cache.make_key(f"{namespace}:retry")
+        self.dead = cache.make_key(f"{namespace}:dead")
+        self.processing_prefix = cache.make_key(f"{namespace}:processing:")
+
+    def push(self, *messages):
+        self.client.rpush(self.ready, *messages)
+
+    def stats(self) -> dict:
+        pipe = self.client.pipeline(transaction=False)
+        pipe.llen(self.ready).zcard(self.retry).llen(self.dead)
+        ready, retrying, dead = pipe.execute()
+        return {"ready": ready, "retrying": retrying, "dead": dead}
+
+
+def send_sms(phone_number: str, text: str):
+    """Queue an SMS for the worker, or deliver it now without Redis."""
+    client = get_redis_client()
+    if client is not None:
+        SMSQueue(client).push(build_message(phone_number, text))
+    else:
+        get_gateway().send(phone_number, text)
+
+
+def retry_delay(attempts: int) -> float:
+    """Seconds before the next attempt after ``attempts`` failures."""
+    base = getattr(settings, "SMS_RETRY_BACKOFF_SECONDS", 2)
+    ceiling = getattr(settings, "SMS_RETRY_BACKOFF_MAX_SECONDS", 300)
+    return min(base * 2 ** (attempts - 1), ceiling)
+
+
+class SMSWorker:
+    """Drains an ``SMSQueue`` through a gateway; see ``run_sms_worker``."""
+
+    def __init__(self, queue, gateway=None, name=None, batch_size=None, concurrency=None, max_attempts=None):
+        self.queue = queue
+        self.client = queue.client
+        self.gateway = gateway or get_gateway()
+        self.processing = f"{queue.processing_prefix}{name or socket.gethostname()}"
+        self.batch_size = batch_size or getattr(settings, "SMS_BATCH_SIZE", 100)
+        self.concurrency = concurrency or getattr(settings, "SMS_WORKER_CONCURRENCY", 16)
+        self.max_attempts = max_attempts or getattr(settings, "SMS_MAX_ATTEMPTS", 5)
+        self.max_dead = getattr(settings, "SMS_DEAD_LETTER_MAX", 1000)
+        self.claim_script = self.client.register_script(CLAIM_SCRIPT)
+        self.pool = ThreadPoolExecutor(max_workers=self.concurrency)
+        self.stopping = False
+
+    def recover(self) -> int:
+        """Requeue, ahead of newer messages, a batch this worker left behind."""
+        count = 0
+        while self.client.lmove(self.processing, self.queue.ready, "RIGHT", "LEFT") is not None:
+            count += 1
+        return count
+
+    def claim(self, timeout=0) -> list:
+        batch = self.claim_script(
+            keys=[self.queue.ready, self.queue.retry, self.processing],
+            args=[int(time.time() * 1000), self.batch_size],
+        )
+        if batch or not timeout:
+            return batch
+        # Idle: block until a message arrives instead of polling
+        first = self.client.blmove(self.queue.ready, self.processing, timeout, "LEFT", "RIGHT")
+        if first is None:
+            return []
+        if self.batch_size == 1:
+            return [first]
+        return [first] + self.claim_script(
+            keys=[self.queue.ready, self.queue.retry, self.processing],
+            args=[int(time.time() * 1000), self.batch_size - 1],
+        )
+
+    def _deliver(self, message):
+        try:
+            self.gateway.send(message["to"], message["text"])
+        except Exception as exc:
+            message["attempts"] += 1
+            message["error"] = str(exc)
+            return message
+        return None
+
+    def run_batch(self, timeout=0) -> dict:
+        """Deliver one batch; returns counts of sent, retried, dead and expired messages."""
+        batch = self.claim(timeout)
+        result = {"sent": 0, "retried": 0, "dead": 0, "expired": 0}
+        if not batch:
+            return result
+
+        messages = [json.loads(raw) for raw in batch]
+        live = [message for message in messages if not is_expired(message, time.time())]
+        result["expired"] = len(messages) - len(live)
+        failed = [message for message in self.pool.map(self._deliver, live) if message is not None]
+        result["sent"] = len(live) - len(failed)
+
+        now = time.time()
+        pipe = self.client.pipeline()
+        for message in failed:
+            if is_expired(message, now):
+                result["expired"] += 1
+            elif message["attempts"] >= self.max_attempts:
+                logger.error("SMS %s to %s dead after %d attempts: %s",
+                             message["id"], message["to"], message["attempts"], message["error"])
+                pipe.rpush(self.queue.dead, json.dumps(redact(message)))
+                pipe.ltrim(self.queue.dead, -self.max_dead, -1)
+                result["dead"] += 1
+            else:
+                due = int((now + retry_delay(message["attempts"])) * 1000)
+                pipe.zadd(self.queue.retry, {json.dumps(message): due})
+                result["retried"] += 1
+        pipe.delete(self.processing)
+        pipe.execute()
+        return result
+
+    def run(self, once=False, timeout=1):
+        """Deliver until stopped; with ``once``, until nothing is ready."""
+        self.recover()
+        totals = {"sent": 0, "retried": 0, "dead": 0, "expired": 0}
+        while not self.stopping:
+            result = self.run_batch(timeout=0 if once else timeout)
+            for key, value in result.items():
+                totals[key] += value
+            if once and not any(result.values()):
+                break
+        return totals
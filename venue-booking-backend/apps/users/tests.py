@@ -1,11 +1,34 @@
-from unittest.mock import patch
+import asyncio
+import json
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from unittest import skipUnless
+from unittest.mock import Mock, patch
 
-from django.test import TestCase, override_settings
+import redis
+from django.conf import settings
+from django.core.cache import cache
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
 from rest_framework import status
 from rest_framework.test import APIClient
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
 
+from apps.users import cache as user_cache
+from apps.users import otp, sms
 from apps.users.models import User
+from apps.users.throttling import SendOTPIPThrottle
+from apps.users.tokens import UserRefreshToken
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+
+def redis_available() -> bool:
+    try:
+        return redis.Redis.from_url(REDIS_URL, socket_connect_timeout=0.5).ping()
+    except redis.RedisError:
+        return False
 
 
 @override_settings(
@@ -19,6 +42,8 @@ class AuthTests(TestCase):
     """Tests for OTP authentication flow."""
 
     def setUp(self):
+        cache.clear()  # throttle buckets, cached users
+        user_cache.local_cache.clear()
         self.client = APIClient()
         self.phone_number = "+998901234567"
 
@@ -31,6 +56,12 @@ class AuthTests(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertIn("detail", response.data)
 
+    @patch("apps.users.sms.ConsoleGateway.send")
+    def test_send_otp_delivers_inline_without_redis(self, send):
+        with patch("apps.users.otp.generate_otp", return_value="123456"):
+            otp.send_otp(self.phone_number)
+        send.assert_called_once_with(self.phone_number, "Your verification code: 123456")
+
     def test_send_otp_invalid_phone(self):
         response = self.client.post(
             "/api/auth/send-otp/",
@@ -64,6 +95,24 @@ class AuthTests(TestCase):
         )
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
+    def test_verify_attempts_limited_per_phone(self):
+        for _ in range(5):
+            response = self.client.post(
+                "/api/auth/verify-otp/",
+                {"phone_number": self.phone_number, "otp": "000000"},
+                format="json",
+            )
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.post(
+            "/api/auth/verify-otp/",
+            {"phone_number": self.phone_number, "otp": "000000"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertGreater(int(response["Retry-After"]), 0)
+        self.assertFalse(User.objects.exists())
+
     def test_user_me_unauthenticated(self):
         response = self.client.get("/api/auth/me/")
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -103,3 +152,282 @@ class AuthTests(TestCase):
         )
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertIn("access", response.data)
+
+    def test_verify_otp_issues_user_claims(self):
+        with patch("apps.users.otp.generate_otp", return_value="123456"):
+            otp.send_otp(self.phone_number)
+        response = self.client.post(
+            "/api/auth/verify-otp/",
+            {"phone_number": self.phone_number, "otp": "123456"},
+            format="json",
+        )
+        access = AccessToken(response.data["access"])
+        self.assertEqual((access["is_active"], access["is_verified"]), (True, True))
+
+    def test_user_me_loaded_lazily_and_cached(self):
+        user = User.objects.create_user(phone_number=self.phone_number, name="Old")
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {UserRefreshToken.for_user(user).access_token}"
+        )
+        with self.assertNumQueries(1):
+            self.client.get("/api/auth/me/")
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/auth/me/")
+        self.assertEqual(response.data["name"], "Old")
+
+        # Saving the user drops the cached copy
+        self.client.patch("/api/auth/me/", {"name": "New"}, format="json")
+        self.assertEqual(self.client.get("/api/auth/me/").data["name"], "New")
+
+    def test_inactive_claim_rejected(self):
+        user = User.objects.create_user(phone_number=self.phone_number, is_active=False)
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {UserRefreshToken.for_user(user).access_token}"
+        )
+        response = self.client.get("/api/auth/me/")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_refresh_renews_claims(self):
+        user = User.objects.create_user(phone_number=self.phone_number)
+        refresh = UserRefreshToken.for_user(user)
+        user.is_verified = True
+        user.save()
+        response = self.client.post("/api/auth/refresh/", {"refresh": str(refresh)}, format="json")
+        self.assertTrue(AccessToken(response.data["access"])["is_verified"])
+
+        user.is_active = False
+        user.save()
+        response = self.client.post("/api/auth/refresh/", {"refresh": str(refresh)}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class ClientAddressTests(SimpleTestCase):
+    """Throttles must not trust X-Forwarded-For entries a client wrote itself."""
+
+    def ident(self, forwarded=None):
+        request = RequestFactory().get("/", REMOTE_ADDR="10.0.0.1")
+        if forwarded is not None:
+            request.META["HTTP_X_FORWARDED_FOR"] = forwarded
+        return SendOTPIPThrottle().get_ident(request)
+
+    def test_header_ignored_without_proxies(self):
+        self.assertEqual(self.ident(), "10.0.0.1")
+        self.assertEqual(self.ident("1.2.3.4"), "10.0.0.1")
+
+    @override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, "NUM_PROXIES": 1})
+    def test_entry_added_by_the_proxy(self):
+        self.assertEqual(self.ident("1.2.3.4, 5.6.7.8"), "5.6.7.8")
+        self.assertEqual(self.ident(), "10.0.0.1")
+
+    @override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, "NUM_PROXIES": 2})
+    def test_short_header_falls_back_to_the_peer(self):
+        self.assertEqual(self.ident("1.2.3.4, 5.6.7.8, 9.9.9.9"), "5.6.7.8")
+        self.assertEqual(self.ident("5.6.7.8"), "10.0.0.1")
+
+
+class RedisCacheMixin:
+    """Points the default cache at a real Redis under a throwaway key prefix."""
+
+    def setUp(self):
+        caches = {
+            "default": {
+                "BACKEND": "django_redis.cache.RedisCache",
+                "LOCATION": REDIS_URL,
+                "KEY_PREFIX": f"test-{uuid.uuid4().hex}",
+                "OPTIONS": {"CLIENT_CLASS": "django_redis.client.DefaultClient"},
+            }
+        }
+        override = override_settings(CACHES=caches)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.addCleanup(lambda: cache.delete_pattern("*"))
+
+
+@skipUnless(redis_available(), "Redis is not reachable")
+@patch("apps.users.otp.print", create=True)
+class OTPRedisTests(RedisCacheMixin, SimpleTestCase):
+    """Load tests for the OTP scripts against a real Redis."""
+
+    def _burst(self, func, calls, workers=32):
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(lambda _: func(), range(calls)))
+
+    def _send(self, phone_number):
+        return APIClient().post(
+            "/api/auth/send-otp/", {"phone_number": phone_number}, format="json"
+        ).status_code
+
+    @patch.dict(SendOTPIPThrottle.THROTTLE_RATES, {"otp_send_ip": "1000/m"})
+    def test_concurrent_sends_respect_limit(self, _print):
+        codes = self._burst(lambda: self._send("+998901111111"), 100)
+        self.assertEqual(codes.count(status.HTTP_200_OK), 3)
+        # Only the sends let through store a code and queue its SMS
+        self.assertEqual(sms.SMSQueue(otp.get_redis_client()).stats()["ready"], 3)
+
+    def test_code_redeemed_once_under_concurrency(self, _print):
+        with patch("apps.users.otp.generate_otp", return_value="424242"):
+            otp.send_otp("+998902222222")
+        results = self._burst(lambda: otp.verify_otp("+998902222222", "424242"), 50)
+        self.assertEqual(results.count(True), 1)
+
+    def test_wrong_code_does_not_burn_the_real_one(self, _print):
+        with patch("apps.users.otp.generate_otp", return_value="111111"):
+            otp.send_otp("+998903333333")
+        self.assertFalse(otp.verify_otp("+998903333333", "999999"))
+        self.assertTrue(otp.verify_otp("+998903333333", "111111"))
+
+    @patch.dict(SendOTPIPThrottle.THROTTLE_RATES, {"otp_send_ip": "1000/m"})
+    def test_mixed_load_keeps_invariants(self, _print):
+        phones = [f"+99890{n:07d}" for n in range(50)]
+        with ThreadPoolExecutor(max_workers=32) as pool:
+            codes = list(pool.map(self._send, phones * 5))
+        # Exactly the limit per phone, whatever the interleaving
+        for index, phone in enumerate(phones):
+            self.assertEqual(codes[index::len(phones)].count(status.HTTP_200_OK), 3, phone)
+
+    @patch.dict(SendOTPIPThrottle.THROTTLE_RATES, {"otp_send_ip": "10/m"})
+    def test_ip_throttle_under_concurrent_burst(self, _print):
+        def post(n):
+            return APIClient().post(
+                "/api/auth/send-otp/", {"phone_number": f"+99891{n:07d}"}, format="json"
+            )
+
+        with ThreadPoolExecutor(max_workers=32) as pool:
+            responses = list(pool.map(post, range(50)))
+        codes = [response.status_code for response in responses]
+        self.assertEqual(codes.count(status.HTTP_200_OK), 10)
+        for response in responses:
+            if response.status_code == status.HTTP_429_TOO_MANY_REQUESTS:
+                # One token refills every 6 seconds
+                self.assertIn(response["Retry-After"], {"6", "5"})
+
+    @patch.dict(SendOTPIPThrottle.THROTTLE_RATES, {"otp_send_ip": "1000/m"})
+    async def test_async_view_sends_respect_limit(self, _print):
+        responses = await asyncio.gather(*(
+            self.async_client.post(
+                "/api/auth/send-otp/", {"phone_number": "+998908888888"}, content_type="application/json"
+            )
+            for _ in range(30)
+        ))
+        codes = [response.status_code for response in responses]
+        self.assertEqual(codes.count(status.HTTP_200_OK), 3)
+        self.assertEqual(codes.count(status.HTTP_429_TOO_MANY_REQUESTS), 27)
+
+    def test_one_round_trip_each(self, _print):
+        # The first call per script may also SCRIPT LOAD after a NOSCRIPT
+        otp.send_otp("+998905555555")
+        otp.verify_otp("+998905555555", "000000")
+        client = otp.get_redis_client()
+        with patch.object(client, "execute_command", wraps=client.execute_command) as execute:
+            otp.send_otp("+998904444444")
+            self.assertEqual(execute.call_count, 1)
+            execute.reset_mock()
+            otp.verify_otp("+998904444444", "000000")
+            self.assertEqual(execute.call_count, 1)
+
+
+class FailingGateway:
+    def send(self, phone_number, text):
+        raise sms.SMSDeliveryError("provider down")
+
+
+class SlowFailingGateway:
+    def send(self, phone_number, text):
+        time.sleep(0.3)
+        raise sms.SMSDeliveryError("timed out")
+
+
+@skipUnless(redis_available(), "Redis is not reachable")
+@override_settings(SMS_RETRY_BACKOFF_SECONDS=0)
+class SMSQueueTests(RedisCacheMixin, SimpleTestCase):
+    """The outbound SMS queue and worker against a real Redis."""
+
+    def setUp(self):
+        super().setUp()
+        self.queue = sms.SMSQueue(otp.get_redis_client())
+
+    def test_send_otp_queues_instead_of_sending(self):
+        with patch("apps.users.otp.generate_otp", return_value="654321"), \
+                patch("apps.users.sms.ConsoleGateway.send") as send:
+            otp.send_otp("+998906666666")
+        send.assert_not_called()
+        [raw] = self.queue.client.lrange(self.queue.ready, 0, -1)
+        message = json.loads(raw)
+        self.assertEqual(message["to"], "+998906666666")
+        self.assertEqual(message["text"], "Your verification code: 654321")
+
+    def test_worker_delivers_in_batches(self):
+        gateway = Mock()
+        self.queue.push(*(sms.build_message(f"+99890{n:07d}", "hi") for n in range(25)))
+        worker = sms.SMSWorker(self.queue, gateway=gateway, name="test", batch_size=10)
+        self.assertEqual(worker.run_batch(), {"sent": 10, "retried": 0, "dead": 0, "expired": 0})
+        self.assertEqual(worker.run(once=True), {"sent": 15, "retried": 0, "dead": 0, "expired": 0})
+        self.assertEqual(gateway.send.call_count, 25)
+        self.assertEqual(self.queue.stats(), {"ready": 0, "retrying": 0, "dead": 0})
+
+    def test_idle_worker_claims_one_at_a_time_with_batch_size_one(self):
+        worker = sms.SMSWorker(self.queue, gateway=Mock(), name="test", batch_size=1)
+        self.assertEqual(worker.claim(timeout=0.1), [])
+        self.queue.push(*(sms.build_message(f"+99890{n:07d}", "hi") for n in range(3)))
+        with patch.object(worker, "claim_script", return_value=[]):
+            # The ready messages only show up once the worker is blocked
+            self.assertEqual(len(worker.claim(timeout=0.1)), 1)
+        self.assertEqual(self.queue.stats()["ready"], 2)
+        self.assertEqual(self.queue.client.llen(worker.processing), 1)
+
+        # The script alone never claims more than one either
+        self.assertEqual(len(worker.claim_script(
+            keys=[self.queue.ready, self.queue.retry, worker.processing], args=[0, 0],
+        )), 1)
+        self.assertEqual(self.queue.stats()["ready"], 1)
+
+    def test_failures_retried_then_dead_lettered(self):
+        self.queue.push(sms.build_message("+998907777777", "hi"))
+        worker = sms.SMSWorker(self.queue, gateway=FailingGateway(), name="test", max_attempts=2)
+        self.assertEqual(worker.run_batch(), {"sent": 0, "retried": 1, "dead": 0, "expired": 0})
+        self.assertEqual(self.queue.stats(), {"ready": 0, "retrying": 1, "dead": 0})
+        # Zero backoff: the retry is due immediately
+        self.assertEqual(worker.run_batch(), {"sent": 0, "retried": 0, "dead": 1, "expired": 0})
+        [raw] = self.queue.client.lrange(self.queue.dead, 0, -1)
+        dead = json.loads(raw)
+        self.assertEqual((dead["attempts"], dead["error"]), (2, "provider down"))
+
+    def test_dead_letters_masked_and_capped(self):
+        self.queue.push(*(
+            sms.build_message("+998907777777", f"Your verification code: {code}", secret=code)
+            for code in ("111111", "222222", "333333")
+        ))
+        with override_settings(SMS_DEAD_LETTER_MAX=2):
+            worker = sms.SMSWorker(self.queue, gateway=FailingGateway(), name="test", max_attempts=1)
+            self.assertEqual(worker.run_batch(), {"sent": 0, "retried": 0, "dead": 3, "expired": 0})
+        dead = [json.loads(raw) for raw in self.queue.client.lrange(self.queue.dead, 0, -1)]
+        self.assertEqual([message["text"] for message in dead], ["Your verification code: ******"] * 2)
+        self.assertFalse(any("secret" in message for message in dead))
+
+    def test_expired_messages_dropped(self):
+        gateway = Mock()
+        self.queue.push(
+            sms.build_message("+998907777777", "late", expires_at=time.time() - 1),
+            sms.build_message("+998908888888", "on time", expires_at=time.time() + 60),
+        )
+        worker = sms.SMSWorker(self.queue, gateway=gateway, name="test")
+        self.assertEqual(worker.run_batch(), {"sent": 1, "retried": 0, "dead": 0, "expired": 1})
+        gateway.send.assert_called_once_with("+998908888888", "on time")
+
+        # A code that expires while failing is neither retried nor dead-lettered
+        self.queue.push(sms.build_message("+998907777777", "hi", expires_at=time.time() + 0.2))
+        worker = sms.SMSWorker(self.queue, gateway=SlowFailingGateway(), name="test")
+        self.assertEqual(worker.run_batch(), {"sent": 0, "retried": 0, "dead": 0, "expired": 1})
+        self.assertEqual(self.queue.stats(), {"ready": 0, "retrying": 0, "dead": 0})
+
+    def test_interrupted_batch_requeued_in_order(self):
+        self.queue.push(*(sms.build_message(f"+99890{n:07d}", "hi") for n in range(5)))
+        crashed = sms.SMSWorker(self.queue, gateway=Mock(), name="worker-1", batch_size=3)
+        claimed = crashed.claim()
+        self.assertEqual(len(claimed), 3)
+
+        restarted = sms.SMSWorker(self.queue, gateway=Mock(), name="worker-1")
+        self.assertEqual(restarted.recover(), 3)
+        ready = self.queue.client.lrange(self.queue.ready, 0, -1)
+        self.assertEqual(ready[:3], claimed)
+        self.assertEqual(len(ready), 5)
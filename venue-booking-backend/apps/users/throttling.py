@@ -0,0 +1,19 @@
+from config.throttling import IPRateThrottle, PhoneRateThrottle
+
+
+class SendOTPIPThrottle(IPRateThrottle):
+    scope = "otp_send_ip"
+
+
+class SendOTPPhoneThrottle(PhoneRateThrottle):
+    scope = "otp_send_phone"
+
+
+class VerifyOTPIPThrottle(IPRateThrottle):
+    scope = "otp_verify_ip"
+
+
+class VerifyOTPPhoneThrottle(PhoneRateThrottle):
+    """Caps guesses per code: 5 attempts cover typos, not a 10^6 keyspace."""
+
+    scope = "otp_verify_phone"
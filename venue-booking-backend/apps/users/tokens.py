@@ -0,0 +1,16 @@
+from rest_framework_simplejwt.tokens import RefreshToken
+
+
+class UserRefreshToken(RefreshToken):
+    """Refresh token whose access tokens carry the claims ``TokenUserAuthentication`` trusts."""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        set_user_claims(token, user)
+        return token
+
+
+def set_user_claims(token, user):
+    token["is_active"] = user.is_active
+    token["is_verified"] = user.is_verified
@@ -2,36 +2,42 @@ from drf_spectacular.utils import extend_schema
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
 
+from config.async_views import AsyncAPIView
+from config.db_router import PrimaryPinMixin
+
+from .cache import get_user
 from .models import User
-from .otp import send_otp, verify_otp
+from .otp import asend_otp, averify_otp
 from .serializers import (
     SendOTPSerializer,
     UserSerializer,
     UserUpdateSerializer,
     VerifyOTPSerializer,
 )
+from .throttling import (
+    SendOTPIPThrottle,
+    SendOTPPhoneThrottle,
+    VerifyOTPIPThrottle,
+    VerifyOTPPhoneThrottle,
+)
+from .tokens import UserRefreshToken, set_user_claims
 
 
-class SendOTPView(APIView):
+class SendOTPView(AsyncAPIView):
     """Send OTP to the given phone number."""
 
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [SendOTPIPThrottle, SendOTPPhoneThrottle]
 
     @extend_schema(request=SendOTPSerializer, responses={200: dict})
-    def post(self, request):
+    async def post(self, request):
         serializer = SendOTPSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         phone_number = serializer.validated_data["phone_number"]
 
-        result = send_otp(phone_number)
-
-        if not result["success"]:
-            return Response(
-                {"detail": result["error"]},
-                status=status.HTTP_429_TOO_MANY_REQUESTS,
-            )
+        await asend_otp(phone_number)
 
         return Response(
             {"detail": "OTP sent successfully."},
@@ -39,33 +45,34 @@ class SendOTPView(APIView):
         )
 
 
-class VerifyOTPView(APIView):
+class VerifyOTPView(AsyncAPIView):
     """Verify OTP and return JWT tokens."""
 
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [VerifyOTPIPThrottle, VerifyOTPPhoneThrottle]
 
     @extend_schema(request=VerifyOTPSerializer, responses={200: dict})
-    def post(self, request):
+    async def post(self, request):
         serializer = VerifyOTPSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
         phone_number = serializer.validated_data["phone_number"]
         otp = serializer.validated_data["otp"]
 
-        if not verify_otp(phone_number, otp):
+        if not await averify_otp(phone_number, otp):
             return Response(
                 {"detail": "Invalid or expired OTP."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
         # Get or create user
-        user, created = User.objects.get_or_create(phone_number=phone_number)
+        user, created = await User.objects.aget_or_create(phone_number=phone_number)
         if not user.is_verified:
             user.is_verified = True
-            user.save(update_fields=["is_verified"])
+            await user.asave(update_fields=["is_verified"])
 
         # Generate JWT tokens
-        refresh = RefreshToken.for_user(user)
+        refresh = UserRefreshToken.for_user(user)
 
         return Response(
             {
@@ -91,10 +98,16 @@ class RefreshTokenView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
         try:
-            refresh = RefreshToken(refresh_token)
+            refresh = UserRefreshToken(refresh_token)
+            user = get_user(refresh[jwt_settings.USER_ID_CLAIM])
+            if user is None or not user.is_active:
+                raise ValueError("User missing or inactive")
+            # Access tokens carry the user's current flags (see authentication.py)
+            access = refresh.access_token
+            set_user_claims(access, user)
             return Response(
                 {
-                    "access": str(refresh.access_token),
+                    "access": str(access),
                     "refresh": str(refresh),
                 },
                 status=status.HTTP_200_OK,
@@ -106,7 +119,7 @@ class RefreshTokenView(APIView):
             )
 
 
-class UserMeView(generics.RetrieveUpdateAPIView):
+class UserMeView(PrimaryPinMixin, generics.RetrieveUpdateAPIView):
     """Get or update the current user's profile."""
 
     permission_classes = [permissions.IsAuthenticated]
@@ -117,4 +130,7 @@ class UserMeView(generics.RetrieveUpdateAPIView):
         return UserSerializer
 
     def get_object(self):
+        if self.request.method in ("PUT", "PATCH"):
+            # Update the row itself, not a cached copy
+            return User.objects.get(pk=self.request.user.pk)
         return self.request.user
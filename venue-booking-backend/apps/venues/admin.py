@@ -13,7 +13,7 @@ class VenueImageInline(admin.TabularInline):
 class VenueAdmin(TranslationAdmin):
     list_display = ("name", "address", "price_per_hour", "is_active", "created_at")
     list_filter = ("is_active",)
-    search_fields = ("name", "address")
+    search_fields = ("name", "address", "external_id")
     inlines = [VenueImageInline]
 
 
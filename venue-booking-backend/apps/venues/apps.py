@@ -5,3 +5,6 @@ class VenuesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.venues"
     verbose_name = "Venues"
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,129 @@
+"""
+Versioned response cache for the public venue endpoints.
+
+Responses are cached under a key built from the active language, the host,
+the query string and a generation counter. Any change to a venue or its
+images bumps the counters (see ``signals.py``), so stale entries are never
+read again and simply expire. The same key doubles as the response ETag,
+which lets clients revalidate with ``If-None-Match`` for a ``304``.
+
+The views are async: cache hits and ``304`` answers never leave the event
+loop, and only a miss renders the page (and queries the database) in a
+thread. Misses read from a replica, except right after a venue changed,
+when a lagging replica would get its old data cached under the new
+generation.
+"""
+import hashlib
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import translation
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+from config import async_cache
+from config.db_router import ais_pinned, pin_primary, primary_reads, replicas_enabled
+
+RESPONSE_PREFIX = "venues:response:"
+GENERATION_PREFIX = "venues:generation:"
+LIST_GENERATION_KEY = f"{GENERATION_PREFIX}list"
+PIN_SCOPE = "venues"
+
+
+def venue_generation_key(venue_id) -> str:
+    return f"{GENERATION_PREFIX}{venue_id}"
+
+
+def get_generation(key: str) -> int:
+    generation = cache.get(key)
+    if generation is None:
+        # Seed from the clock so a counter lost to eviction never restarts
+        # at a value an older cached response was stored under.
+        cache.add(key, time.time_ns() // 1000, timeout=None)
+        generation = cache.get(key)
+    return generation
+
+
+async def aget_generation(key: str) -> int:
+    generation = await async_cache.aget(key)
+    if generation is None:
+        await async_cache.aadd(key, time.time_ns() // 1000, timeout=None)
+        generation = await async_cache.aget(key)
+    return generation
+
+
+def bump_generation(key: str):
+    try:
+        cache.incr(key)
+    except ValueError:
+        get_generation(key)
+
+
+def bump_venue(venue_id):
+    """Invalidate every cached list page plus the venue's own detail."""
+    bump_generation(LIST_GENERATION_KEY)
+    bump_generation(venue_generation_key(venue_id))
+    pin_primary(PIN_SCOPE)
+
+
+def bump_venues(venue_ids):
+    """``bump_venue`` for many venues at once, e.g. after a bulk import."""
+    bump_generation(LIST_GENERATION_KEY)
+    # Dropped counters are reseeded from the clock, past any value they had
+    cache.delete_many([venue_generation_key(venue_id) for venue_id in venue_ids])
+    pin_primary(PIN_SCOPE)
+
+
+class CachedResponseMixin:
+    """
+    Serve anonymous GETs from the cache and answer conditional requests.
+
+    Views set ``response_cache_enabled`` and implement
+    ``get_generation_key()`` to name the counter their output depends on.
+    They must dispatch asynchronously (``config.async_views.AsyncAPIView``).
+    """
+
+    response_cache_enabled = True
+
+    def get_generation_key(self) -> str:
+        raise NotImplementedError
+
+    def get_response_cache_key(self, request, generation) -> str:
+        query = sorted(request.query_params.lists())
+        fingerprint = hashlib.sha1(
+            f"{request.get_host()}|{request.path}|{query}".encode()
+        ).hexdigest()
+        return f"{translation.get_language()}:{generation}:{fingerprint}"
+
+    async def get(self, request, *args, **kwargs):
+        render = sync_to_async(super().get)
+        if not self.response_cache_enabled or request.user.is_authenticated:
+            return await render(request, *args, **kwargs)
+
+        generation = await aget_generation(self.get_generation_key())
+        key = self.get_response_cache_key(request, generation)
+        etag = f'"{hashlib.sha1(key.encode()).hexdigest()}"'
+        if etag in parse_etags(request.headers.get("If-None-Match", "")):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+        data = await async_cache.aget(f"{RESPONSE_PREFIX}{key}")
+        if data is not None:
+            response = Response(data)
+        else:
+            if replicas_enabled() and await ais_pinned(PIN_SCOPE):
+                with primary_reads():
+                    response = await render(request, *args, **kwargs)
+            else:
+                response = await render(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            await async_cache.aset(
+                f"{RESPONSE_PREFIX}{key}",
+                response.data,
+                timeout=getattr(settings, "VENUE_RESPONSE_CACHE_TIMEOUT", 300),
+            )
+        response["ETag"] = etag
+        return response
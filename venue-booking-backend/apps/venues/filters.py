@@ -1,6 +1,29 @@
+from functools import reduce
+from operator import or_
+
 import django_filters
+from django.conf import settings
+from django.db import connections
+from django.db.models import Case, CharField, F, Func, JSONField, Q, Value, When
+from django.utils.translation import get_language
+from modeltranslation.utils import build_localized_fieldname, resolution_order
+from rest_framework.filters import SearchFilter
 
 from .models import Venue
+from .search import search_venues
+
+AMENITY_COLUMNS = [
+    build_localized_fieldname("amenities", lang) for lang in settings.MODELTRANSLATION_LANGUAGES
+]
+
+
+class CharInFilter(django_filters.BaseInFilter, django_filters.CharFilter):
+    pass
+
+
+def has_amenity(name):
+    """Venues listing ``name`` in any translation; each ``@>`` uses a GIN index."""
+    return reduce(or_, (Q(**{f"{column}__contains": [name]}) for column in AMENITY_COLUMNS))
 
 
 class VenueFilter(django_filters.FilterSet):
@@ -10,7 +33,70 @@ class VenueFilter(django_filters.FilterSet):
     max_price = django_filters.NumberFilter(
         field_name="price_per_hour", lookup_expr="lte"
     )
+    amenities_all = CharInFilter(
+        method="filter_amenities_all",
+        help_text="Comma-separated amenities the venue must all have",
+    )
+    amenities_any = CharInFilter(
+        method="filter_amenities_any",
+        help_text="Comma-separated amenities, at least one of which the venue must have",
+    )
 
     class Meta:
         model = Venue
-        fields = ["is_active", "min_price", "max_price"]
+        fields = ["is_active", "min_price", "max_price", "amenities_all", "amenities_any"]
+
+    def filter_amenities_all(self, queryset, name, value):
+        for amenity in filter(None, value):
+            queryset = queryset.filter(has_amenity(amenity))
+        return queryset
+
+    def filter_amenities_any(self, queryset, name, value):
+        amenities = [amenity for amenity in value if amenity]
+        if not amenities:
+            return queryset
+        return queryset.filter(reduce(or_, map(has_amenity, amenities)))
+
+
+def amenity_facets(queryset):
+    """
+    Per-amenity venue counts over ``queryset`` in a single query.
+
+    Amenities are counted as displayed in the active language, falling back
+    like modeltranslation does when a translation is empty.
+    """
+    fallback_languages = Venue.__dict__["amenities"].fallback_languages
+    displayed = Case(
+        *(
+            When(
+                Q(**{f"{column}__isnull": False}) & ~Q(**{column: []}),
+                then=F(column),
+            )
+            for column in (
+                build_localized_fieldname("amenities", lang)
+                for lang in resolution_order(get_language() or settings.LANGUAGE_CODE, fallback_languages)
+            )
+        ),
+        default=Value([], output_field=JSONField()),
+        output_field=JSONField(),
+    )
+    rows = (
+        queryset.order_by()
+        .annotate(facet=Func(displayed, function="jsonb_array_elements_text", output_field=CharField()))
+        .values("pk", "facet")
+    )
+    sql, params = rows.query.sql_with_params()
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(
+            f"SELECT facet, COUNT(DISTINCT id) FROM ({sql}) AS amenities "
+            "GROUP BY facet ORDER BY COUNT(DISTINCT id) DESC, facet",
+            params,
+        )
+        return [{"name": name, "count": count} for name, count in cursor.fetchall()]
+
+
+class VenueSearchFilter(SearchFilter):
+    """``?search=`` backed by ranked full-text and trigram matching (see search.py)."""
+
+    def filter_queryset(self, request, queryset, view):
+        return search_venues(queryset, request.query_params.get(self.search_param, ""))
@@ -0,0 +1,181 @@
+"""
+Resized copies of venue images.
+
+Each uploaded original gets WebP and JPEG variants at the widths in
+``VENUE_IMAGE_WIDTHS`` (never wider than the original), stored next to it
+as ``<name>.w320.webp``, ``<name>.w320.jpg`` and so on (content-hashed by
+the default storage like the original, see config/media.py).
+``VenueImage.variants`` maps format and width to the stored names, plus
+the ``source`` they were made from, and the serializers turn it into a
+``srcset`` map. Rows sharing a deduplicated original share its variants.
+
+Rendering is CPU-bound and stays off the request path. Saving an image
+pushes its id onto a Redis list (``images:queue``) and
+``manage.py run_image_worker`` renders queued images across a process pool.
+Other cache backends (local development, tests) render synchronously once
+the transaction commits. ``manage.py backfill_image_variants`` renders
+every image whose variants are missing or stale, which also picks up jobs
+a crashed worker lost.
+"""
+import logging
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+import django
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db import transaction
+from PIL import Image, ImageOps
+
+from config.redis_client import get_redis_client
+
+from .cache import bump_venue
+from .models import VenueImage
+
+logger = logging.getLogger(__name__)
+
+QUEUE_KEY = "images:queue"
+
+# format: (Pillow format, file extension, save options)
+FORMATS = {
+    "webp": ("WEBP", "webp", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", "jpg", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+# EXIF orientations that swap width and height
+_TRANSPOSED = {5, 6, 7, 8}
+
+
+def image_widths() -> list:
+    return sorted(getattr(settings, "VENUE_IMAGE_WIDTHS", [320, 640, 1280]), reverse=True)
+
+
+def variant_name(name: str, width: int, extension: str) -> str:
+    return f"{os.path.splitext(name)[0]}.w{width}.{extension}"
+
+
+def is_current(image: VenueImage) -> bool:
+    return bool(image.variants) and image.variants.get("source") == image.image.name
+
+
+def _open(storage, name, widest):
+    with storage.open(name, "rb") as file:
+        original = Image.open(file)
+        width, height = original.size
+        shown_width = height if original.getexif().get(0x0112) in _TRANSPOSED else width
+        if shown_width > widest:
+            # JPEGs decode straight to a smaller scale that is still at
+            # least as wide as the widest variant
+            scale = widest / shown_width
+            original.draft("RGB", (math.ceil(width * scale), math.ceil(height * scale)))
+        original.load()
+    image = ImageOps.exif_transpose(original)
+    if image.mode not in ("RGB", "RGBA"):
+        has_alpha = "A" in image.getbands() or "transparency" in image.info
+        image = image.convert("RGBA" if has_alpha else "RGB")
+    return image
+
+
+def render_variants(name: str, storage=None) -> dict:
+    """Write every variant of the stored image ``name``; returns its ``variants`` map."""
+    storage = storage or VenueImage._meta.get_field("image").storage
+    widths = image_widths()
+    image = _open(storage, name, widths[0])
+    widths = [width for width in widths if width <= image.width] or [image.width]
+
+    variants = {"source": name, **{fmt: {} for fmt in FORMATS}}
+    for width in widths:
+        if width != image.width:
+            # Each size is scaled down from the previous, larger one
+            image = image.resize((width, max(round(image.height * width / image.width), 1)), Image.LANCZOS)
+        for fmt, (pillow_format, extension, options) in FORMATS.items():
+            output = image
+            if pillow_format == "JPEG" and image.mode == "RGBA":
+                output = Image.alpha_composite(Image.new("RGBA", image.size, "white"), image).convert("RGB")
+            buffer = BytesIO()
+            output.save(buffer, pillow_format, **options)
+            # Stored under its content hash: a re-render of the same bytes
+            # keeps the existing file
+            variants[fmt][str(width)] = storage.save(
+                variant_name(name, width, extension), ContentFile(buffer.getvalue())
+            )
+    return variants
+
+
+def process(image_id) -> bool:
+    """Render and record the variants of one ``VenueImage``; False if it could not be."""
+    image = VenueImage.objects.filter(pk=image_id).first()
+    if image is None or not image.image:
+        return False
+    twin = (
+        VenueImage.objects.filter(image=image.image.name, variants__source=image.image.name)
+        .exclude(pk=image.pk)
+        .values_list("variants", flat=True)
+        .first()
+    )
+    try:
+        variants = twin or render_variants(image.image.name)
+    except (OSError, Image.DecompressionBombError):
+        logger.exception("Could not render variants of venue image %s (%s)", image.pk, image.image.name)
+        return False
+    # Unless the image was replaced meanwhile; its own job renders the new one
+    if VenueImage.objects.filter(pk=image.pk, image=image.image.name).update(variants=variants):
+        bump_venue(image.venue_id)
+    return True
+
+
+def enqueue(image_id):
+    """Render an image's variants once the current transaction commits."""
+    client = get_redis_client()
+    if client is None:
+        transaction.on_commit(lambda: process(image_id))
+    else:
+        transaction.on_commit(lambda: client.rpush(cache.make_key(QUEUE_KEY), image_id))
+
+
+def process_pool(processes=None) -> ProcessPoolExecutor:
+    # Spawned rather than forked, so children open their own database and
+    # Redis connections instead of sharing the parent's sockets
+    return ProcessPoolExecutor(
+        max_workers=processes,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=django.setup,
+    )
+
+
+class ImageWorker:
+    """Renders queued images; see ``run_image_worker``."""
+
+    def __init__(self, client, processes=None):
+        self.client = client
+        self.queue = cache.make_key(QUEUE_KEY)
+        self.processes = processes or os.cpu_count()
+        self.pool = process_pool(self.processes)
+        self.stopping = False
+
+    def claim(self, timeout=0) -> list:
+        ids = self.client.lpop(self.queue, self.processes * 4) or []
+        if ids or not timeout:
+            return ids
+        popped = self.client.blpop([self.queue], timeout)
+        return [popped[1]] if popped else []
+
+    def run(self, once=False, timeout=1) -> dict:
+        totals = {"rendered": 0, "failed": 0}
+        while not self.stopping:
+            ids = [int(image_id) for image_id in self.claim(timeout=0 if once else timeout)]
+            if not ids:
+                if once:
+                    break
+                continue
+            started = time.monotonic()
+            for rendered in self.pool.map(process, ids):
+                totals["rendered" if rendered else "failed"] += 1
+            logger.info("Rendered %d image(s) in %.2fs", len(ids), time.monotonic() - started)
+        self.pool.shutdown()
+        return totals
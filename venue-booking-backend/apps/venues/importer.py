@@ -0,0 +1,212 @@
+"""
+Bulk venue import.
+
+Records (CSV, JSON or NDJSON; see ``read_records``) carry every translation
+column (``name_ru``, ``name_uz``, ``name_en``, ...) and are upserted on
+``external_id``, the venue's id in the partner's own system, so importing
+the same file again updates the venues instead of duplicating them.
+
+Records are cleaned by the model fields and written in batches, one
+transaction each, either with ``bulk_create(update_conflicts=True)`` or,
+with ``use_copy``, by ``COPY``-ing the batch into a temporary table and
+upserting from it with one ``INSERT ... ON CONFLICT``. Either way each
+batch costs a couple of statements, and the response cache is invalidated
+once per batch instead of once per venue.
+"""
+import csv
+import json
+from decimal import Decimal
+from io import StringIO
+from itertools import islice
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from modeltranslation.utils import build_localized_fieldname
+
+from .cache import bump_venues
+from .models import Venue
+
+FORMATS = ["csv", "json", "ndjson"]
+
+TRANSLATED = ["name", "address", "description", "amenities"]
+DEFAULT_LANGUAGE = settings.MODELTRANSLATION_DEFAULT_LANGUAGE
+
+# Fields read from a record; the untranslated columns are copied from the
+# default language like modeltranslation does on save
+FIELDS = [
+    "external_id",
+    *(
+        build_localized_fieldname(field, lang)
+        for field in TRANSLATED
+        for lang in settings.MODELTRANSLATION_LANGUAGES
+    ),
+    "price_per_hour",
+    "is_active",
+]
+REQUIRED = [
+    "external_id",
+    build_localized_fieldname("name", DEFAULT_LANGUAGE),
+    build_localized_fieldname("address", DEFAULT_LANGUAGE),
+    "price_per_hour",
+]
+COLUMNS = [*FIELDS, *TRANSLATED]
+UPDATE_FIELDS = [field for field in COLUMNS if field != "external_id"] + ["updated_at"]
+
+_TRUE = {"1", "true", "yes", "y", "t"}
+_FALSE = {"0", "false", "no", "n", "f"}
+
+
+def read_records(file, fmt):
+    """``(line or item number, dict)`` for each record of an open text file."""
+    if fmt == "csv":
+        reader = csv.DictReader(file)
+        for record in reader:
+            yield reader.line_num, record
+    elif fmt == "json":
+        records = json.load(file)
+        if not isinstance(records, list):
+            raise ValueError("A JSON import must be an array of venue objects.")
+        yield from enumerate(records, 1)
+    elif fmt == "ndjson":
+        for number, line in enumerate(file, 1):
+            if line.strip():
+                yield number, json.loads(line)
+    else:
+        raise ValueError(f"Unknown format {fmt!r}.")
+
+
+def _parse(field, value):
+    if isinstance(value, str):
+        value = value.strip()
+        if field.startswith("amenities"):
+            if value.startswith("["):
+                return json.loads(value)
+            # CSV cells list amenities separated by semicolons
+            return [amenity.strip() for amenity in value.split(";") if amenity.strip()]
+        if field == "is_active":
+            if value.lower() in _TRUE:
+                return True
+            if value.lower() in _FALSE:
+                return False
+            raise ValidationError(f"{value!r} is not a boolean.")
+    return value
+
+
+def clean_record(record) -> dict:
+    """Model-ready values of one record; raises ValidationError."""
+    if not isinstance(record, dict):
+        raise ValidationError("Expected an object.")
+    row = {}
+    for name in FIELDS:
+        value = record.get(name)
+        if value in (None, ""):
+            if name in REQUIRED:
+                raise ValidationError(f"{name}: this field is required.")
+            continue
+        try:
+            row[name] = Venue._meta.get_field(name).clean(_parse(name, value), None)
+        except (ValidationError, ValueError) as exc:
+            messages = exc.messages if isinstance(exc, ValidationError) else [str(exc)]
+            raise ValidationError(f"{name}: {' '.join(messages)}")
+    row.setdefault("is_active", True)
+    for field in TRANSLATED:
+        default = build_localized_fieldname(field, DEFAULT_LANGUAGE)
+        if field == "description":
+            row.setdefault(default, "")
+        elif field == "amenities":
+            row.setdefault(default, [])
+        row[field] = row[default]
+    return row
+
+
+def _upsert_bulk(rows):
+    keys = [row["external_id"] for row in rows]
+    existing = set(Venue.objects.filter(external_id__in=keys).order_by().values_list("external_id", flat=True))
+    venues = Venue.objects.bulk_create(
+        [Venue(**row) for row in rows],
+        update_conflicts=True,
+        unique_fields=["external_id"],
+        update_fields=UPDATE_FIELDS,
+    )
+    return len(rows) - len(existing), [venue.pk for venue in venues]
+
+
+def _copy_value(value):
+    if value is None:
+        return r"\N"
+    if isinstance(value, list):
+        value = json.dumps(value, ensure_ascii=False)
+    elif isinstance(value, bool):
+        value = "t" if value else "f"
+    elif not isinstance(value, (str, Decimal)):
+        value = str(value)
+    return str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+
+def _upsert_copy(rows):
+    quote = connection.ops.quote_name
+    table = quote(Venue._meta.db_table)
+    columns = [Venue._meta.get_field(field).column for field in COLUMNS]
+    column_list = ", ".join(map(quote, columns))
+    data = StringIO()
+    for row in rows:
+        data.write("\t".join(_copy_value(row.get(field)) for field in COLUMNS) + "\n")
+    data.seek(0)
+
+    with connection.cursor() as cursor:
+        # Already there if the batches share an outer transaction
+        cursor.execute("DROP TABLE IF EXISTS pg_temp.venue_import")
+        cursor.execute(
+            f"CREATE TEMPORARY TABLE venue_import ON COMMIT DROP AS "
+            f"SELECT {column_list} FROM {table} WITH NO DATA"
+        )
+        copy = f"COPY venue_import ({column_list}) FROM STDIN"
+        if hasattr(cursor, "copy_expert"):  # psycopg2
+            cursor.copy_expert(copy, data)
+        else:
+            with cursor.copy(copy) as writer:
+                writer.write(data.getvalue())
+        updates = ", ".join(
+            f"{quote(column)} = EXCLUDED.{quote(column)}"
+            for column in columns
+            if column != "external_id"
+        )
+        cursor.execute(
+            f"INSERT INTO {table} ({column_list}, created_at, updated_at) "
+            f"SELECT {column_list}, now(), now() FROM venue_import "
+            f"ON CONFLICT (external_id) DO UPDATE SET {updates}, updated_at = EXCLUDED.updated_at "
+            # xmax is only 0 on rows that were inserted
+            "RETURNING id, xmax = 0"
+        )
+        results = cursor.fetchall()
+    return sum(inserted for _, inserted in results), [pk for pk, _ in results]
+
+
+def import_venues(records, batch_size=1000, use_copy=False, on_error=None) -> dict:
+    """
+    Upsert ``(number, record)`` pairs; returns counts of created, updated and
+    invalid records. ``on_error(number, message)`` is called per invalid one.
+    """
+    totals = {"created": 0, "updated": 0, "invalid": 0}
+    upsert = _upsert_copy if use_copy else _upsert_bulk
+
+    def cleaned():
+        for number, record in records:
+            try:
+                yield clean_record(record)
+            except ValidationError as exc:
+                totals["invalid"] += 1
+                if on_error:
+                    on_error(number, " ".join(exc.messages))
+
+    rows = cleaned()
+    while batch := list(islice(rows, batch_size)):
+        # One row per key; a later record for the same venue wins
+        batch = list({row["external_id"]: row for row in batch}.values())
+        with transaction.atomic():
+            created, ids = upsert(batch)
+        totals["created"] += created
+        totals["updated"] += len(batch) - created
+        bump_venues(ids)
+    return totals
@@ -0,0 +1,50 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import F, Q
+from django.db.models.fields.json import KT
+
+from apps.venues import images
+from apps.venues.models import VenueImage
+
+
+class Command(BaseCommand):
+    help = "Render the variants of venue images that have none or were made from an older file"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Render every image again, e.g. after VENUE_IMAGE_WIDTHS changed",
+        )
+        parser.add_argument("--venue", type=int, default=None, help="Only this venue's images")
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=None,
+            help="Images rendered in parallel (default: CPU count; 1 renders in this process)",
+        )
+
+    def handle(self, *args, **options):
+        queryset = VenueImage.objects.exclude(image="")
+        if options["venue"]:
+            queryset = queryset.filter(venue_id=options["venue"])
+        if not options["all"]:
+            queryset = queryset.annotate(source=KT("variants__source")).filter(
+                Q(source__isnull=True) | ~Q(source=F("image"))
+            )
+        ids = list(queryset.order_by("pk").values_list("pk", flat=True))
+
+        started = time.monotonic()
+        if options["processes"] == 1:
+            results = [images.process(image_id) for image_id in ids]
+        else:
+            with images.process_pool(options["processes"]) as pool:
+                results = list(pool.map(images.process, ids, chunksize=4))
+        rendered = sum(results)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rendered {rendered} image(s), {len(ids) - rendered} failed, "
+                f"in {time.monotonic() - started:.1f}s."
+            )
+        )
@@ -0,0 +1,134 @@
+import statistics
+import time as timer
+from datetime import date, time, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import translation
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from apps.bookings.availability import CLOSING_HOUR, OPENING_HOUR
+from apps.bookings.models import Booking
+from apps.bookings.serializers import BookingListSerializer, BookingSerializer
+from apps.users.models import User
+from apps.venues.models import Venue, VenueImage
+from apps.venues.serializers import VenueListSerializer
+from config.fast_serialization import FastPlan
+
+
+class Rollback(Exception):
+    """Raised to discard the synthetic data once the benchmark is done."""
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare DRF serializers with the values()-based fast path on large "
+        "pages of venues and bookings. Data is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1000, help="Rows per page")
+        parser.add_argument("--images", type=int, default=3, help="Images per venue")
+        parser.add_argument("--iterations", type=int, default=20)
+
+    def handle(self, *args, **options):
+        if options["iterations"] < 2:
+            raise CommandError("--iterations must be at least 2.")
+        try:
+            # English, so half the names exercise the translation fallback
+            with transaction.atomic(), translation.override("en"):
+                self._run(options)
+                raise Rollback
+        except Rollback:
+            self.stdout.write("Synthetic data rolled back.")
+
+    def _run(self, options):
+        rows = options["rows"]
+        venues = Venue.objects.bulk_create(
+            [
+                Venue(
+                    name_ru=f"Бенчмарк {i}",
+                    name_en=f"Benchmark {i}" if i % 2 else "",
+                    address_ru=f"Адрес {i}",
+                    description_ru="Описание " * 20,
+                    price_per_hour=Decimal(100000 + i),
+                    amenities_ru=["Wi-Fi", "Parking"],
+                )
+                for i in range(rows)
+            ]
+        )
+        VenueImage.objects.bulk_create(
+            [
+                VenueImage(venue=venue, image=f"venues/images/{venue.pk}-{n}.jpg", is_primary=n == 0)
+                for venue in venues
+                for n in range(options["images"])
+            ]
+        )
+        user, _ = User.objects.get_or_create(phone_number="+998000000001")
+        slots = CLOSING_HOUR - OPENING_HOUR
+        Booking.objects.bulk_create(
+            [
+                Booking(
+                    user=user,
+                    venue=venues[i % len(venues)],
+                    booking_date=date.today() + timedelta(days=i // slots),
+                    start_time=time(OPENING_HOUR + i % slots, 0),
+                    end_time=time(OPENING_HOUR + i % slots + 1, 0),
+                    total_price=Decimal("100000.00"),
+                )
+                for i in range(rows)
+            ]
+        )
+
+        request = Request(APIRequestFactory().get("/", SERVER_NAME="localhost"))
+        context = {"request": request}
+        cases = [
+            (
+                "venue list",
+                VenueListSerializer,
+                Venue.objects.filter(is_active=True).with_primary_image(),
+            ),
+            (
+                "booking list",
+                BookingListSerializer,
+                Booking.objects.filter(user=user).select_related("venue").prefetch_related("venue__images"),
+            ),
+            (
+                "booking full",
+                BookingSerializer,
+                Booking.objects.filter(user=user).select_related("venue").prefetch_related("venue__images"),
+            ),
+        ]
+
+        renderer = JSONRenderer()
+        for label, serializer_class, queryset in cases:
+            queryset = queryset.order_by("-created_at", "-id")
+
+            def slow():
+                return renderer.render(serializer_class(queryset[:rows], many=True, context=context).data)
+
+            def fast():
+                plan = FastPlan(serializer_class(context=context))
+                return renderer.render(plan.serialize(plan.values(queryset)[:rows]))
+
+            if slow() != fast():
+                raise CommandError(f"{label}: fast path output differs from the serializer.")
+
+            timings = {}
+            for name, func in (("serializer", slow), ("fast path", fast)):
+                samples = []
+                for _ in range(options["iterations"]):
+                    started = timer.perf_counter()
+                    func()
+                    samples.append((timer.perf_counter() - started) * 1000)
+                timings[name] = statistics.median(samples)
+                self.stdout.write(f"{label:>14} {name:>10}: p50={timings[name]:.1f}ms")
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{label:>14}: {timings['serializer'] / timings['fast path']:.1f}x faster "
+                    f"for {rows} rows (identical output)"
+                )
+            )
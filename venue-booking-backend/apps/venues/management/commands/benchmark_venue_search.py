@@ -0,0 +1,149 @@
+import random
+import statistics
+import time as timer
+from datetime import date, time, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef
+
+from apps.bookings.availability import CLOSING_HOUR, OPENING_HOUR
+from apps.bookings.models import Booking
+from apps.users.models import User
+from apps.venues.models import Venue
+from apps.venues.search import search_venues
+
+BATCH_SIZE = 10000
+
+
+class Rollback(Exception):
+    """Raised to discard the synthetic data once the benchmark is done."""
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the free-venue search (NOT EXISTS anti-join) and the ranked "
+        "text search against synthetic venues and bookings. Data is rolled back "
+        "unless --keep is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--venues", type=int, default=5000)
+        parser.add_argument("--bookings", type=int, default=1_000_000)
+        parser.add_argument("--days", type=int, default=90, help="Spread bookings over this many days")
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument("--page-size", type=int, default=10)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--keep", action="store_true", help="Keep the generated data")
+
+    def handle(self, *args, **options):
+        if options["iterations"] < 2:
+            raise CommandError("--iterations must be at least 2.")
+        try:
+            with transaction.atomic():
+                self._run(options)
+                if not options["keep"]:
+                    raise Rollback
+        except Rollback:
+            self.stdout.write("Synthetic data rolled back.")
+
+    def _run(self, options):
+        rng = random.Random(options["seed"])
+        start_day = date.today()
+        slots_per_day = CLOSING_HOUR - OPENING_HOUR
+
+        self.stdout.write(f"Creating {options['venues']} venues...")
+        venues = Venue.objects.bulk_create(
+            [
+                Venue(
+                    name_ru=f"Бенчмарк {i}",
+                    name_uz=f"Benchmark {i}",
+                    name_en=f"Benchmark {i}",
+                    address_ru=f"Адрес {i}",
+                    price_per_hour=Decimal(rng.randrange(50, 1500) * 1000),
+                )
+                for i in range(options["venues"])
+            ],
+            batch_size=BATCH_SIZE,
+        )
+        venue_ids = [venue.pk for venue in venues]
+        user, _ = User.objects.get_or_create(phone_number="+998000000000")
+
+        # Sample distinct (venue, day, hour) cells so bookings never overlap
+        capacity = len(venue_ids) * options["days"] * slots_per_day
+        count = min(options["bookings"], capacity)
+        self.stdout.write(f"Creating {count} bookings...")
+        cells = rng.sample(range(capacity), count)
+        started = timer.perf_counter()
+        for offset in range(0, count, BATCH_SIZE):
+            batch = []
+            for cell in cells[offset:offset + BATCH_SIZE]:
+                cell, hour = divmod(cell, slots_per_day)
+                venue_index, day = divmod(cell, options["days"])
+                hour += OPENING_HOUR
+                batch.append(
+                    Booking(
+                        user=user,
+                        venue_id=venue_ids[venue_index],
+                        booking_date=start_day + timedelta(days=day),
+                        start_time=time(hour, 0),
+                        end_time=time(hour + 1, 0),
+                        total_price=Decimal("100000.00"),
+                        status=rng.choice(Booking.Status.values),
+                    )
+                )
+            Booking.objects.bulk_create(batch)
+        self.stdout.write(f"Loaded in {timer.perf_counter() - started:.1f}s")
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE {Venue._meta.db_table}, {Booking._meta.db_table}")
+
+        def search(day, hour, length):
+            conflicting = Booking.objects.filter(venue=OuterRef("pk")).overlapping(
+                day, time(hour, 0), time(hour + length, 0)
+            )
+            return Venue.objects.filter(is_active=True).filter(~Exists(conflicting))
+
+        def window():
+            length = rng.randint(1, 3)
+            hour = rng.randrange(OPENING_HOUR, CLOSING_HOUR - length + 1)
+            return start_day + timedelta(days=rng.randrange(options["days"])), hour, length
+
+        queryset = search(*window())
+        self.stdout.write("\nQuery plan:")
+        self.stdout.write(queryset[: options["page_size"]].explain(analyze=True))
+
+        page_ms, count_ms = [], []
+        for _ in range(options["iterations"]):
+            queryset = search(*window())
+            started = timer.perf_counter()
+            list(queryset[: options["page_size"]])
+            page_ms.append((timer.perf_counter() - started) * 1000)
+            started = timer.perf_counter()
+            queryset.count()
+            count_ms.append((timer.perf_counter() - started) * 1000)
+
+        # Text search: exact Latin names, Cyrillic transliterations and typos
+        def term():
+            number = rng.randrange(options["venues"])
+            return rng.choice([f"Benchmark {number}", f"Бенчмарк {number}", f"Bencmark {number}"])
+
+        active = Venue.objects.filter(is_active=True)
+        self.stdout.write("\nText search plan:")
+        self.stdout.write(search_venues(active, term())[: options["page_size"]].explain(analyze=True))
+
+        text_ms = []
+        for _ in range(options["iterations"]):
+            started = timer.perf_counter()
+            list(search_venues(active, term())[: options["page_size"]])
+            text_ms.append((timer.perf_counter() - started) * 1000)
+
+        for label, samples in (("page", page_ms), ("count", count_ms), ("text", text_ms)):
+            quantiles = statistics.quantiles(samples, n=100)
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{label:>5}: p50={quantiles[49]:.2f}ms "
+                    f"p95={quantiles[94]:.2f}ms max={max(samples):.2f}ms"
+                )
+            )
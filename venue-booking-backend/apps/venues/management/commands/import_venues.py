@@ -0,0 +1,60 @@
+import os
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.venues import importer
+
+
+class Command(BaseCommand):
+    help = "Create or update venues from a CSV, JSON or NDJSON file, matched on external_id"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to import, or - for stdin")
+        parser.add_argument(
+            "--format",
+            choices=importer.FORMATS,
+            default=None,
+            help="Default: from the file extension",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000, help="Venues written per transaction")
+        parser.add_argument(
+            "--copy",
+            action="store_true",
+            help="Load each batch with PostgreSQL COPY instead of a multi-row INSERT",
+        )
+
+    def handle(self, *args, **options):
+        fmt = options["format"]
+        if fmt is None:
+            fmt = os.path.splitext(options["path"])[1].lstrip(".").lower()
+            if fmt not in importer.FORMATS:
+                raise CommandError("Cannot tell the format from the file name; pass --format.")
+
+        def report(number, message):
+            self.stderr.write(f"{'Item' if fmt == 'json' else 'Line'} {number}: {message}")
+
+        started = time.monotonic()
+        file = sys.stdin if options["path"] == "-" else open(options["path"], encoding="utf-8-sig", newline="")
+        try:
+            totals = importer.import_venues(
+                importer.read_records(file, fmt),
+                batch_size=options["batch_size"],
+                use_copy=options["copy"],
+                on_error=report,
+            )
+        except ValueError as exc:  # unreadable file, e.g. broken JSON
+            raise CommandError(str(exc))
+        finally:
+            if file is not sys.stdin:
+                file.close()
+        elapsed = time.monotonic() - started
+
+        imported = totals["created"] + totals["updated"]
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {imported} venues ({totals['created']} created, {totals['updated']} updated, "
+                f"{totals['invalid']} invalid) in {elapsed:.2f}s, {imported / max(elapsed, 1e-9):.0f} venues/s."
+            )
+        )
@@ -0,0 +1,196 @@
+import asyncio
+import http.client
+import itertools
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import date, timedelta
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.venues.models import Venue
+
+DEPLOYMENTS = {
+    "sync": ["config.wsgi:application", "-k", "sync"],
+    "asgi": ["config.asgi:application", "-k", "uvicorn_worker.UvicornWorker"],
+}
+
+SCENARIOS = ["venue-list", "venue-detail", "availability", "send-otp"]
+
+
+class DelayProxy:
+    """TCP proxy that delays traffic each way, to emulate Redis on another host."""
+
+    def __init__(self, host, port, round_trip):
+        self.target = (host, port)
+        self.delay = round_trip / 2
+        self.loop = asyncio.new_event_loop()
+
+    def start(self) -> int:
+        server = self.loop.run_until_complete(asyncio.start_server(self._handle, "127.0.0.1", 0))
+        threading.Thread(target=self.loop.run_forever, daemon=True).start()
+        return server.sockets[0].getsockname()[1]
+
+    async def _handle(self, client_reader, client_writer):
+        upstream_reader, upstream_writer = await asyncio.open_connection(*self.target)
+        await asyncio.gather(
+            self._pipe(client_reader, upstream_writer),
+            self._pipe(upstream_reader, client_writer),
+        )
+
+    async def _pipe(self, reader, writer):
+        try:
+            while data := await reader.read(65536):
+                await asyncio.sleep(self.delay)
+                writer.write(data)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+class Command(BaseCommand):
+    help = (
+        "Start the sync (WSGI) and async (ASGI, uvicorn workers) deployments "
+        "with gunicorn in turn and compare throughput and latency on the hot "
+        "endpoints. Needs seeded venues. The send-otp scenario stores codes "
+        "and queues SMS in the configured cache, so only use it in development."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--deployment", action="append", choices=DEPLOYMENTS, dest="deployments")
+        parser.add_argument(
+            "--scenario",
+            action="append",
+            choices=SCENARIOS,
+            dest="scenarios",
+            help="Repeatable (default: every scenario except send-otp)",
+        )
+        parser.add_argument("--workers", type=int, default=3, help="Gunicorn workers")
+        parser.add_argument("--concurrency", type=int, default=64, help="Concurrent client connections")
+        parser.add_argument("--duration", type=float, default=10, help="Seconds per scenario")
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument(
+            "--redis-latency-ms",
+            type=float,
+            default=0,
+            help="Route the servers' Redis traffic through a proxy adding this round-trip time",
+        )
+        parser.add_argument(
+            "--db-pool-mode",
+            action="append",
+            choices=["persistent", "pgbouncer", "none"],
+            dest="db_pool_modes",
+            help="Repeatable: run each deployment once per DB_POOL_MODE (default: as configured)",
+        )
+
+    def handle(self, *args, **options):
+        venue = Venue.objects.filter(is_active=True).values_list("pk", flat=True).first()
+        if venue is None:
+            raise CommandError("No active venues; run seed_venues first.")
+
+        self.venue = venue
+        self.phones = itertools.count()
+        # Every request comes from 127.0.0.1, so the per-IP limits would cut
+        # the scenarios short
+        self.env = {**os.environ, "THROTTLING": "0"}
+        if options["redis_latency_ms"]:
+            # Servers read the cache location from REDIS_URL (see settings)
+            location = urlsplit(settings.CACHES["default"]["LOCATION"])
+            proxy = DelayProxy(location.hostname, location.port or 6379, options["redis_latency_ms"] / 1000)
+            self.env["REDIS_URL"] = location._replace(netloc=f"127.0.0.1:{proxy.start()}").geturl()
+        scenarios = options["scenarios"] or SCENARIOS[:-1]
+        for deployment in options["deployments"] or list(DEPLOYMENTS):
+            for pool_mode in options["db_pool_modes"] or [settings.DB_POOL_MODE]:
+                self.env["DB_POOL_MODE"] = pool_mode
+                label = f"{deployment}/{pool_mode}"
+                server = self._start(deployment, options)
+                try:
+                    for scenario in scenarios:
+                        self._run(label, scenario, options)
+                finally:
+                    server.terminate()
+                    server.wait()
+
+    def _start(self, deployment, options):
+        app, *worker = DEPLOYMENTS[deployment]
+        command = [
+            sys.executable, "-m", "gunicorn", app, *worker,
+            "--workers", str(options["workers"]),
+            "--bind", f"127.0.0.1:{options['port']}",
+            "--log-level", "warning",
+        ]
+        server = subprocess.Popen(command, cwd=settings.BASE_DIR, env=self.env)
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            try:
+                connection = http.client.HTTPConnection("127.0.0.1", options["port"], timeout=5)
+                connection.request("GET", "/api/venues/")
+                connection.getresponse().read()
+                return server
+            except OSError:
+                time.sleep(0.2)
+        server.terminate()
+        raise CommandError(f"The {deployment} server did not start.")
+
+    def _request(self, scenario):
+        if scenario == "venue-list":
+            return "GET", "/api/venues/", None, {}
+        if scenario == "venue-detail":
+            return "GET", f"/api/venues/{self.venue}/", None, {}
+        if scenario == "availability":
+            day = date.today() + timedelta(days=1)
+            return "GET", f"/api/venues/{self.venue}/availability/?date={day}", None, {}
+        # A fresh phone number each time so the send limit never applies
+        # (the servers run with throttling off)
+        n = next(self.phones)
+        body = json.dumps({"phone_number": f"+99899{n % 10_000_000:07d}"})
+        return "POST", "/api/auth/send-otp/", body, {"Content-Type": "application/json"}
+
+    def _run(self, label, scenario, options):
+        latencies = []
+        statuses = Counter()
+        lock = threading.Lock()
+        deadline = time.monotonic() + options["duration"]
+
+        def client():
+            connection = http.client.HTTPConnection("127.0.0.1", options["port"], timeout=30)
+            while time.monotonic() < deadline:
+                method, path, body, headers = self._request(scenario)
+                start = time.perf_counter()
+                try:
+                    connection.request(method, path, body, headers)
+                    response = connection.getresponse()
+                    response.read()
+                    status = response.status
+                except (OSError, http.client.HTTPException):
+                    connection.close()
+                    status = "error"
+                elapsed = time.perf_counter() - start
+                with lock:
+                    latencies.append(elapsed)
+                    statuses[status] += 1
+            connection.close()
+
+        threads = [threading.Thread(target=client) for _ in range(options["concurrency"])]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        percentiles = statistics.quantiles(latencies, n=100)
+        self.stdout.write(
+            f"{label:16} {scenario:13} {len(latencies) / elapsed:8.0f} req/s   "
+            f"p50 {percentiles[49] * 1000:7.1f} ms   p99 {percentiles[98] * 1000:7.1f} ms   "
+            f"{dict(statuses)}"
+        )
@@ -0,0 +1,41 @@
+import signal
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.venues.images import ImageWorker
+from config.redis_client import get_redis_client
+
+
+class Command(BaseCommand):
+    help = "Render the resized variants of queued venue images"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=None,
+            help="Images rendered in parallel (default: CPU count)",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit once the queue is empty instead of waiting for more",
+        )
+
+    def handle(self, *args, **options):
+        client = get_redis_client()
+        if client is None:
+            raise CommandError("The image queue needs the django_redis cache backend.")
+
+        worker = ImageWorker(client, processes=options["processes"])
+
+        def stop(signum, frame):
+            worker.stopping = True
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+
+        totals = worker.run(once=options["once"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Rendered {totals['rendered']} image(s), {totals['failed']} failed.")
+        )
@@ -2,6 +2,7 @@ from decimal import Decimal
 
 from django.core.management.base import BaseCommand
 
+from apps.venues.cache import bump_venues
 from apps.venues.models import Venue
 
 VENUES_DATA = [
@@ -192,20 +193,25 @@ class Command(BaseCommand):
     help = "Seed the database with sample venue data (12 venues)"
 
     def handle(self, *args, **options):
-        created_count = 0
-
+        # Venues are recognised by their Russian name
+        existing = set(
+            Venue.objects.filter(name_ru__in=[data["name_ru"] for data in VENUES_DATA])
+            .order_by()
+            .values_list("name_ru", flat=True)
+        )
+        new = []
         for data in VENUES_DATA:
-            # Check if venue already exists (by Russian name)
-            if Venue.objects.filter(name_ru=data["name_ru"]).exists():
+            if data["name_ru"] in existing:
                 self.stdout.write(
                     self.style.WARNING(f"Skipping (exists): {data['name_ru']}")
                 )
                 continue
-
-            Venue.objects.create(**data)
-            created_count += 1
+            new.append(Venue(**data))
             self.stdout.write(self.style.SUCCESS(f"Created: {data['name_ru']}"))
 
+        venues = Venue.objects.bulk_create(new)
+        bump_venues([venue.pk for venue in venues])
+
         self.stdout.write(
-            self.style.SUCCESS(f"\nDone! Created {created_count} venues.")
+            self.style.SUCCESS(f"\nDone! Created {len(venues)} venues.")
         )
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.14 on 2026-10-18 11:02
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('venues', '0001_initial'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='venue',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-created_at', '-id'], name='venue_active_created'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.0.14 on 2026-10-18 11:11
+
+import apps.venues.models
+import django.contrib.postgres.indexes
+import django.contrib.postgres.operations
+import django.contrib.postgres.search
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('venues', '0002_venue_active_created'),
+    ]
+
+    operations = [
+        django.contrib.postgres.operations.TrigramExtension(),
+        migrations.AddField(
+            model_name='venue',
+            name='search_text',
+            field=models.GeneratedField(db_persist=True, expression=apps.venues.models.JoinText('name_ru', 'name_uz', 'name_en', 'address_ru', 'address_uz', 'address_en'), output_field=models.TextField()),
+        ),
+        migrations.AddField(
+            model_name='venue',
+            name='search_vector',
+            field=models.GeneratedField(db_persist=True, expression=django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.SearchVector('name_ru', 'name_uz', 'name_en', config='simple', weight='A'), '||', django.contrib.postgres.search.SearchVector('address_ru', 'address_uz', 'address_en', config='simple', weight='B'), django.contrib.postgres.search.SearchConfig('simple')), '||', django.contrib.postgres.search.SearchVector('amenities_ru', 'amenities_uz', 'amenities_en', config='simple', weight='C'), django.contrib.postgres.search.SearchConfig('simple')), '||', django.contrib.postgres.search.SearchVector('description_ru', 'description_uz', 'description_en', config='simple', weight='D'), django.contrib.postgres.search.SearchConfig('simple')), output_field=django.contrib.postgres.search.SearchVectorField()),
+        ),
+        django.contrib.postgres.operations.AddIndexConcurrently(
+            model_name='venue',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='venue_search_vector'),
+        ),
+        django.contrib.postgres.operations.AddIndexConcurrently(
+            model_name='venue',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass('search_text', name='gin_trgm_ops'), name='venue_search_trgm'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.0.14 on 2026-10-18 11:14
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.operations
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('venues', '0003_venue_search'),
+    ]
+
+    operations = [
+        django.contrib.postgres.operations.AddIndexConcurrently(
+            model_name='venue',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['amenities_ru'], name='venue_amenities_ru', opclasses=['jsonb_path_ops']),
+        ),
+        django.contrib.postgres.operations.AddIndexConcurrently(
+            model_name='venue',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['amenities_uz'], name='venue_amenities_uz', opclasses=['jsonb_path_ops']),
+        ),
+        django.contrib.postgres.operations.AddIndexConcurrently(
+            model_name='venue',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['amenities_en'], name='venue_amenities_en', opclasses=['jsonb_path_ops']),
+        ),
+    ]
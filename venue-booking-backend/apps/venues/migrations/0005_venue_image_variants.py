@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-18 11:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('venues', '0004_venue_amenity_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='venueimage',
+            name='variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -1,8 +1,61 @@
+from django.conf import settings
 from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.db import models
 
+SEARCH_CONFIG = "simple"
+
+
+class JoinText(models.Func):
+    """Space-joined text built with ``||``, which unlike ``CONCAT()`` is immutable."""
+
+    template = "(%(expressions)s)"
+    arg_joiner = " || ' ' || "
+    output_field = models.TextField()
+
+    def __init__(self, *fields):
+        super().__init__(
+            *(models.functions.Coalesce(models.F(f), models.Value("")) for f in fields)
+        )
+
+
+def _localized(*fields):
+    return [f"{field}_{lang}" for field in fields for lang in settings.MODELTRANSLATION_LANGUAGES]
+
+
+def search_vector_expression():
+    """Weighted ``tsvector`` over every translation: names > addresses > amenities > descriptions."""
+    return (
+        SearchVector(*_localized("name"), weight="A", config=SEARCH_CONFIG)
+        + SearchVector(*_localized("address"), weight="B", config=SEARCH_CONFIG)
+        + SearchVector(*_localized("amenities"), weight="C", config=SEARCH_CONFIG)
+        + SearchVector(*_localized("description"), weight="D", config=SEARCH_CONFIG)
+    )
+
+
+def primary_image_subquery(venue_ref="pk", field="image"):
+    """``field`` of the venue's primary (else oldest) image, for ``venue_ref``."""
+    primary = (
+        VenueImage.objects.filter(venue=models.OuterRef(venue_ref))
+        .order_by("-is_primary", "created_at")
+        .values(field)[:1]
+    )
+    return models.Subquery(primary)
+
+
+class VenueQuerySet(models.QuerySet):
+    def with_primary_image(self):
+        """Annotate the primary image's path and variants instead of prefetching every image row."""
+        return self.annotate(
+            primary_image_path=primary_image_subquery(),
+            primary_image_variants=primary_image_subquery(field="variants"),
+        )
+
 
 class Venue(models.Model):
+    # The venue's id in a partner's own system; bulk imports upsert on it
+    external_id = models.CharField(max_length=100, unique=True, null=True, blank=True)
     name = models.CharField(max_length=255)
     address = models.CharField(max_length=500)
     description = models.TextField(blank=True, default="")
@@ -11,11 +64,42 @@ class Venue(models.Model):
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Kept up to date by PostgreSQL on every write (see apps/venues/search.py)
+    search_vector = models.GeneratedField(
+        expression=search_vector_expression(),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+    search_text = models.GeneratedField(
+        expression=JoinText(*_localized("name", "address")),
+        output_field=models.TextField(),
+        db_persist=True,
+    )
+
+    objects = VenueQuerySet.as_manager()
 
     class Meta:
         verbose_name = "Venue"
         verbose_name_plural = "Venues"
         ordering = ["-created_at"]
+        indexes = [
+            # Keyset pagination of the public list (see config/pagination.py)
+            models.Index(
+                fields=["-created_at", "-id"],
+                name="venue_active_created",
+                condition=models.Q(is_active=True),
+            ),
+            GinIndex(fields=["search_vector"], name="venue_search_vector"),
+            GinIndex(
+                OpClass("search_text", name="gin_trgm_ops"),
+                name="venue_search_trgm",
+            ),
+            # Amenity containment filters (@>), see filters.py
+            *(
+                GinIndex(fields=[column], opclasses=["jsonb_path_ops"], name=f"venue_{column}")
+                for column in _localized("amenities")
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -28,6 +112,8 @@ class VenueImage(models.Model):
         related_name="images",
     )
     image = models.ImageField(upload_to="venues/images/")
+    # Resized copies of ``image``, written by apps/venues/images.py
+    variants = models.JSONField(default=dict, blank=True, editable=False)
     is_primary = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
@@ -0,0 +1,89 @@
+"""
+Ranked venue search over every translation.
+
+Two generated columns on ``Venue`` are kept current by PostgreSQL itself:
+
+* ``search_vector`` — a weighted ``tsvector`` (names A, addresses B,
+  amenities C, descriptions D) in all languages, GIN indexed;
+* ``search_text`` — names and addresses joined, GIN indexed with
+  ``gin_trgm_ops`` for typo-tolerant ``%>`` (word similarity) matching.
+
+A venue matches when any word-prefix query or any trigram comparison hits.
+Uzbek is written in both Latin and Cyrillic script, so every term is also
+searched in its transliterated form.
+"""
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
+
+from .models import SEARCH_CONFIG
+
+APOSTROPHES = re.compile(r"[‘’ʻʼ`´]")
+WORDS = re.compile(r"[^\W_]+")
+
+# Longest sequences first so "sh" wins over "s" + "h"
+LATIN_TO_CYRILLIC = [
+    ("o'", "ў"), ("g'", "ғ"), ("sh", "ш"), ("ch", "ч"), ("yo", "ё"), ("yu", "ю"),
+    ("ya", "я"), ("ye", "е"), ("ts", "ц"), ("a", "а"), ("b", "б"), ("d", "д"),
+    ("e", "е"), ("f", "ф"), ("g", "г"), ("h", "ҳ"), ("i", "и"), ("j", "ж"),
+    ("k", "к"), ("l", "л"), ("m", "м"), ("n", "н"), ("o", "о"), ("p", "п"),
+    ("q", "қ"), ("r", "р"), ("s", "с"), ("t", "т"), ("u", "у"), ("v", "в"),
+    ("x", "х"), ("y", "й"), ("z", "з"), ("'", "ъ"),
+]
+CYRILLIC_TO_LATIN = {
+    "а": "a", "б": "b", "в": "v", "г": "g", "ғ": "g'", "д": "d", "е": "e",
+    "ё": "yo", "ж": "j", "з": "z", "и": "i", "й": "y", "к": "k", "қ": "q",
+    "л": "l", "м": "m", "н": "n", "о": "o", "п": "p", "р": "r", "с": "s",
+    "т": "t", "у": "u", "ў": "o'", "ф": "f", "х": "x", "ҳ": "h", "ц": "ts",
+    "ч": "ch", "ш": "sh", "щ": "sh", "ъ": "'", "ы": "i", "ь": "", "э": "e",
+    "ю": "yu", "я": "ya",
+}
+_LATIN_PATTERN = re.compile("|".join(re.escape(latin) for latin, _ in LATIN_TO_CYRILLIC))
+_LATIN_MAP = dict(LATIN_TO_CYRILLIC)
+
+
+def to_cyrillic(text: str) -> str:
+    return _LATIN_PATTERN.sub(lambda match: _LATIN_MAP[match.group()], text)
+
+
+def to_latin(text: str) -> str:
+    return "".join(CYRILLIC_TO_LATIN.get(char, char) for char in text)
+
+
+def search_variants(term: str) -> list[str]:
+    """The normalised term plus its Latin and Cyrillic transliterations."""
+    term = APOSTROPHES.sub("'", " ".join(term.lower().split()))
+    variants = []
+    for variant in (term, to_latin(term), to_cyrillic(term)):
+        if WORDS.search(variant) and variant not in variants:
+            variants.append(variant)
+    return variants
+
+
+def prefix_query(variants) -> SearchQuery:
+    """``(a:* & b:*) | (а:* & б:*)`` — every word as a prefix, any variant."""
+    groups = [" & ".join(f"{word}:*" for word in WORDS.findall(variant)) for variant in variants]
+    raw = " | ".join(f"({group})" for group in groups)
+    return SearchQuery(raw, search_type="raw", config=SEARCH_CONFIG)
+
+
+def search_venues(queryset, term: str):
+    """Filter ``queryset`` to venues matching ``term``, best matches first."""
+    variants = search_variants(term)
+    if not variants:
+        return queryset
+
+    query = prefix_query(variants)
+    matches = Q(search_vector=query)
+    for variant in variants:
+        matches |= Q(search_text__trigram_word_similar=variant)
+
+    similarities = [TrigramWordSimilarity(variant, "search_text") for variant in variants]
+    similarity = Greatest(*similarities) if len(similarities) > 1 else similarities[0]
+    return (
+        queryset.filter(matches)
+        .annotate(search_rank=SearchRank(F("search_vector"), query) + similarity)
+        .order_by("-search_rank", "-created_at", "-id")
+    )
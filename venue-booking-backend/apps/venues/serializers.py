@@ -1,16 +1,144 @@
+from datetime import time
+
+from django.core.files.storage import default_storage
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 
-from .models import Venue, VenueImage
+from apps.bookings.availability import CLOSING_HOUR, OPENING_HOUR
+
+from config.fast_serialization import file_url_converter
+
+from .models import Venue, VenueImage, primary_image_subquery
+
+
+def srcset_converter(request):
+    """Turn ``VenueImage.variants`` into ``{format: {width: url}}``."""
+    url = file_url_converter(VenueImage._meta.get_field("image").storage, request)
+
+    def convert(variants):
+        if not variants:
+            return {}
+        return {
+            fmt: {width: url(name) for width, name in files.items()}
+            for fmt, files in variants.items()
+            if fmt != "source"
+        }
+
+    return convert
+
+
+# {"webp": {"320": url, ...}, "jpeg": {...}}
+SRCSET_SCHEMA = {
+    "type": "object",
+    "additionalProperties": {
+        "type": "object",
+        "additionalProperties": {"type": "string", "format": "uri"},
+    },
+}
+
+
+@extend_schema_field(SRCSET_SCHEMA)
+class SrcsetField(serializers.Field):
+    """URLs of an image's resized copies by format and width, ``{}`` until they are made."""
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault("source", "variants")
+        kwargs["read_only"] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, variants):
+        return srcset_converter(self.context.get("request"))(variants)
+
+    def compile_fast(self, plan, model, prefix):
+        column = plan.column(prefix + self.source)
+        convert = srcset_converter(self.context.get("request"))
+        return lambda row: convert(row[column])
 
 
 class VenueImageSerializer(serializers.ModelSerializer):
+    srcset = SrcsetField()
+
     class Meta:
         model = VenueImage
-        fields = ["id", "image", "is_primary"]
+        fields = ["id", "image", "srcset", "is_primary"]
 
 
-class VenueListSerializer(serializers.ModelSerializer):
-    images = VenueImageSerializer(many=True, read_only=True)
+@extend_schema_field(SRCSET_SCHEMA)
+class PrimarySrcsetField(serializers.Field):
+    """``SrcsetField`` of a venue's primary image, read like ``PrimaryImageField``."""
+
+    def __init__(self, **kwargs):
+        kwargs["source"] = "*"
+        kwargs["read_only"] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, venue):
+        if hasattr(venue, "primary_image_variants"):
+            variants = venue.primary_image_variants
+        else:
+            image = next(iter(venue.images.all()), None)
+            variants = image.variants if image else None
+        return srcset_converter(self.context.get("request"))(variants)
+
+    def compile_fast(self, plan, model, prefix):
+        column = plan.annotate(primary_image_subquery(f"{prefix}pk", field="variants"))
+        convert = srcset_converter(self.context.get("request"))
+        return lambda row: convert(row[column])
+
+
+class PrimaryImageField(serializers.Field):
+    """
+    Absolute URL of a venue's primary image.
+
+    Reads the ``primary_image_path`` annotation from
+    ``Venue.objects.with_primary_image()`` and falls back to the first of
+    the (prefetched) ``images`` otherwise.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs["source"] = "*"
+        kwargs["read_only"] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, venue):
+        if hasattr(venue, "primary_image_path"):
+            path = venue.primary_image_path
+        else:
+            image = next(iter(venue.images.all()), None)
+            path = image.image.name if image else None
+        if not path:
+            return None
+        url = default_storage.url(path)
+        request = self.context.get("request")
+        return request.build_absolute_uri(url) if request else url
+
+    def compile_fast(self, plan, model, prefix):
+        column = plan.annotate(primary_image_subquery(f"{prefix}pk"))
+        convert = file_url_converter(default_storage, self.context.get("request"))
+        return lambda row: convert(row[column])
+
+
+class SparseFieldsetMixin:
+    """Drop every field not listed in the request's ``?fields=a,b,c``."""
+
+    fields_query_param = "fields"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get("request")
+        requested = request.query_params.get(self.fields_query_param) if request else None
+        if not requested:
+            return
+        allowed = {name.strip() for name in requested.split(",")}
+        for name in set(self.fields) - allowed:
+            self.fields.pop(name)
+
+
+class VenueListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """Slim card representation used by the venue list endpoints."""
+
+    primary_image = PrimaryImageField()
+    primary_image_srcset = PrimarySrcsetField()
 
     class Meta:
         model = Venue
@@ -18,16 +146,26 @@ class VenueListSerializer(serializers.ModelSerializer):
             "id",
             "name",
             "address",
-            "description",
             "price_per_hour",
             "amenities",
-            "images",
+            "primary_image",
+            "primary_image_srcset",
             "is_active",
             "created_at",
-            "updated_at",
         ]
 
 
+class VenueCompactSerializer(serializers.ModelSerializer):
+    """Minimal venue reference nested in booking lists."""
+
+    primary_image = PrimaryImageField()
+    primary_image_srcset = PrimarySrcsetField()
+
+    class Meta:
+        model = Venue
+        fields = ["id", "name", "address", "primary_image", "primary_image_srcset"]
+
+
 class VenueDetailSerializer(serializers.ModelSerializer):
     images = VenueImageSerializer(many=True, read_only=True)
 
@@ -48,6 +186,54 @@ class VenueDetailSerializer(serializers.ModelSerializer):
 
 
 class AvailabilityQuerySerializer(serializers.Serializer):
+    MAX_RANGE_DAYS = 31
+
     date = serializers.DateField(
-        help_text="Date to check availability for (YYYY-MM-DD)"
+        required=False,
+        help_text="Date to check availability for (YYYY-MM-DD)",
+    )
+    date_from = serializers.DateField(
+        required=False,
+        help_text="First day of a date range (YYYY-MM-DD)",
     )
+    date_to = serializers.DateField(
+        required=False,
+        help_text="Last day of a date range, inclusive (YYYY-MM-DD)",
+    )
+
+    def validate(self, attrs):
+        if "date" in attrs:
+            return attrs
+
+        date_from = attrs.get("date_from")
+        date_to = attrs.get("date_to")
+        if date_from is None or date_to is None:
+            raise serializers.ValidationError(
+                "Provide either date or both date_from and date_to."
+            )
+        if date_to < date_from:
+            raise serializers.ValidationError(
+                {"date_to": "date_to must not be before date_from."}
+            )
+        if (date_to - date_from).days + 1 > self.MAX_RANGE_DAYS:
+            raise serializers.ValidationError(
+                {"date_to": f"Date range cannot exceed {self.MAX_RANGE_DAYS} days."}
+            )
+        return attrs
+
+
+class VenueAvailabilitySearchSerializer(serializers.Serializer):
+    date = serializers.DateField(help_text="Date to search (YYYY-MM-DD)")
+    start_time = serializers.TimeField(help_text="Window start (HH:MM)")
+    end_time = serializers.TimeField(help_text="Window end (HH:MM)")
+
+    def validate(self, attrs):
+        if attrs["end_time"] <= attrs["start_time"]:
+            raise serializers.ValidationError(
+                {"end_time": "End time must be after start time."}
+            )
+        if attrs["start_time"] < time(OPENING_HOUR, 0) or attrs["end_time"] > time(CLOSING_HOUR, 0):
+            raise serializers.ValidationError(
+                f"Venues can only be booked between {OPENING_HOUR}:00 and {CLOSING_HOUR}:00."
+            )
+        return attrs
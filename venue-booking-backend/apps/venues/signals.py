@@ -0,0 +1,27 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import images
+from .cache import bump_venue
+from .models import Venue, VenueImage
+
+
+@receiver([post_save, post_delete], sender=Venue)
+def invalidate_venue_responses(sender, instance, **kwargs):
+    bump_venue(instance.pk)
+    # Again once committed, in case a miss meanwhile cached the old rows
+    # under the new generation
+    transaction.on_commit(lambda: bump_venue(instance.pk))
+
+
+@receiver([post_save, post_delete], sender=VenueImage)
+def invalidate_venue_image_responses(sender, instance, **kwargs):
+    bump_venue(instance.venue_id)
+    transaction.on_commit(lambda: bump_venue(instance.venue_id))
+
+
+@receiver(post_save, sender=VenueImage)
+def queue_image_variants(sender, instance, **kwargs):
+    if instance.image and not images.is_current(instance):
+        images.enqueue(instance.pk)
@@ -1,14 +1,42 @@
+import os
+import shutil
+import tempfile
+import json
+from datetime import date, time, timedelta
 from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest.mock import patch
 
-from django.test import TestCase
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
 from rest_framework import status
 from rest_framework.test import APIClient
 from rest_framework_simplejwt.tokens import RefreshToken
 
+from apps.bookings.models import Booking
 from apps.users.models import User
-from apps.venues.models import Venue
+from apps.users.tokens import UserRefreshToken
+from apps.venues import images, importer
+from apps.venues.models import Venue, VenueImage
+from apps.venues.filters import has_amenity
+from apps.venues.serializers import VenueListSerializer
+from config.db_router import ReplicaRouter
+from config.fast_serialization import FastPlan
 
 
+@override_settings(
+    CACHES={
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+)
 class VenueTests(TestCase):
     """Tests for venue endpoints."""
 
@@ -36,6 +64,21 @@ class VenueTests(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data["count"], 1)
 
+    def test_list_is_slim_with_primary_image(self):
+        VenueImage.objects.create(venue=self.venue, image="venues/images/b.jpg")
+        VenueImage.objects.create(venue=self.venue, image="venues/images/a.jpg", is_primary=True)
+        with self.assertNumQueries(2):  # count + page, no image prefetch
+            response = self.client.get("/api/venues/")
+        venue = response.data["results"][0]
+        self.assertNotIn("description", venue)
+        self.assertNotIn("images", venue)
+        self.assertEqual(venue["primary_image"], "http://testserver/media/venues/images/a.jpg")
+
+    def test_list_sparse_fieldset(self):
+        response = self.client.get("/api/venues/", {"fields": "id,name"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data["results"][0]), {"id", "name"})
+
     def test_venue_detail(self):
         response = self.client.get(f"/api/venues/{self.venue.pk}/")
         self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -65,10 +108,314 @@ class VenueTests(TestCase):
         self.assertEqual(len(response.data["slots"]), 13)  # 9AM-10PM = 13 slots
         self.assertTrue(all(s["is_available"] for s in response.data["slots"]))
 
+    def test_venue_availability_with_booking(self):
+        user = User.objects.create_user(phone_number="+998901234567")
+        Booking.objects.create(
+            user=user,
+            venue=self.venue,
+            booking_date=date(2026, 3, 16),
+            start_time=time(10, 0),
+            end_time=time(12, 0),
+        )
+        response = self.client.get(
+            f"/api/venues/{self.venue.pk}/availability/",
+            {"date": "2026-03-16"},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        unavailable = [s["start_time"] for s in response.data["slots"] if not s["is_available"]]
+        self.assertEqual(unavailable, ["10:00", "11:00"])
+
+    def test_venue_availability_range(self):
+        user = User.objects.create_user(phone_number="+998901234567")
+        for day in (date(2026, 4, 2), date(2026, 4, 4)):
+            Booking.objects.create(
+                user=user,
+                venue=self.venue,
+                booking_date=day,
+                start_time=time(9, 0),
+                end_time=time(10, 30),
+            )
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                f"/api/venues/{self.venue.pk}/availability/",
+                {"date_from": "2026-04-01", "date_to": "2026-04-05"},
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["days"]), 5)
+        busy = {
+            d["date"]: [s["start_time"] for s in d["slots"] if not s["is_available"]]
+            for d in response.data["days"]
+        }
+        self.assertEqual(busy["2026-04-01"], [])
+        self.assertEqual(busy["2026-04-02"], ["09:00", "10:00"])
+        self.assertEqual(busy["2026-04-04"], ["09:00", "10:00"])
+
+        # Second request is served from the cached bitmaps
+        with self.assertNumQueries(1):
+            self.client.get(
+                f"/api/venues/{self.venue.pk}/availability/",
+                {"date_from": "2026-04-01", "date_to": "2026-04-05"},
+            )
+
+    def test_venue_availability_range_too_long(self):
+        response = self.client.get(
+            f"/api/venues/{self.venue.pk}/availability/",
+            {"date_from": "2026-04-01", "date_to": "2026-06-01"},
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_venue_availability_missing_date(self):
         response = self.client.get(f"/api/venues/{self.venue.pk}/availability/")
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
+    def test_available_venue_search(self):
+        other = Venue.objects.create(
+            name_ru="Другой зал",
+            address_ru="Адрес",
+            price_per_hour=Decimal("300000.00"),
+        )
+        user = User.objects.create_user(phone_number="+998901234567")
+        Booking.objects.create(
+            user=user,
+            venue=self.venue,
+            booking_date=date(2026, 3, 15),
+            start_time=time(10, 0),
+            end_time=time(12, 0),
+        )
+        Booking.objects.create(
+            user=user,
+            venue=other,
+            booking_date=date(2026, 3, 15),
+            start_time=time(11, 0),
+            end_time=time(12, 0),
+            status=Booking.Status.CANCELLED,
+        )
+
+        response = self.client.get(
+            "/api/venues/available/",
+            {"date": "2026-03-15", "start_time": "11:00", "end_time": "13:00"},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([v["id"] for v in response.data["results"]], [other.pk])
+
+        # Back-to-back windows do not conflict
+        response = self.client.get(
+            "/api/venues/available/",
+            {"date": "2026-03-15", "start_time": "12:00", "end_time": "13:00"},
+        )
+        self.assertEqual(len(response.data["results"]), 2)
+
+        # VenueFilter still applies
+        response = self.client.get(
+            "/api/venues/available/",
+            {"date": "2026-03-15", "start_time": "12:00", "end_time": "13:00", "max_price": 200000},
+        )
+        self.assertEqual([v["id"] for v in response.data["results"]], [self.venue.pk])
+
+    def test_available_venue_search_invalid_window(self):
+        response = self.client.get(
+            "/api/venues/available/",
+            {"date": "2026-03-15", "start_time": "13:00", "end_time": "12:00"},
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get("/api/venues/available/")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_keyset_pagination_walks_all_venues(self):
+        for i in range(24):
+            Venue.objects.create(
+                name_ru=f"Зал {i}",
+                address_ru="Адрес",
+                price_per_hour=Decimal("100000.00"),
+            )
+        expected = list(
+            Venue.objects.filter(is_active=True)
+            .order_by("-created_at", "-id")
+            .values_list("id", flat=True)
+        )
+
+        seen = []
+        url = "/api/venues/?pagination=cursor"
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn("count", response.data)
+            seen.extend(v["id"] for v in response.data["results"])
+            last_page = response.data
+            url = response.data["next"]
+        self.assertEqual(seen, expected)
+
+        # Walking back from the last page returns the previous page
+        response = self.client.get(last_page["previous"])
+        self.assertEqual([v["id"] for v in response.data["results"]], expected[10:20])
+        self.assertIsNotNone(response.data["next"])
+
+    def test_keyset_pagination_falls_back_for_custom_ordering(self):
+        response = self.client.get(
+            "/api/venues/", {"pagination": "cursor", "ordering": "price_per_hour"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 1)
+
+    def test_keyset_pagination_invalid_cursor(self):
+        response = self.client.get("/api/venues/", {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_list_response_cached_and_invalidated(self):
+        self.client.get("/api/venues/", {"page": 1})
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/venues/", {"page": 1})
+        self.assertEqual(response.data["results"][0]["name"], "Тестовый зал")
+
+        self.venue.name_ru = "Новое имя"
+        self.venue.save()
+        response = self.client.get("/api/venues/", {"page": 1})
+        self.assertEqual(response.data["results"][0]["name"], "Новое имя")
+
+    def test_venue_change_invalidates_again_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.venue.name_ru = "Новое имя"
+            self.venue.save()
+            # A miss before the commit, which elsewhere could read the old row
+            self.client.get("/api/venues/", {"page": 1})
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get("/api/venues/", {"page": 1})
+        self.assertTrue(queries)
+
+    def test_fast_list_matches_serializer_output(self):
+        FastPlan(VenueListSerializer())  # compiles, i.e. no silent fallback
+        VenueImage.objects.create(venue=self.venue, image="venues/images/a.jpg")
+        Venue.objects.create(
+            name_ru="Только русский",
+            address_ru="Адрес",
+            price_per_hour=Decimal("99.5"),
+            is_active=True,
+        )
+        for params in ({}, {"fields": "id,name,primary_image"}, {"pagination": "cursor"}):
+            for language in ("ru", "en"):
+                with self.settings(FAST_SERIALIZATION=True):
+                    cache.clear()
+                    fast = self.client.get("/api/venues/", params, HTTP_ACCEPT_LANGUAGE=language)
+                with self.settings(FAST_SERIALIZATION=False):
+                    cache.clear()
+                    slow = self.client.get("/api/venues/", params, HTTP_ACCEPT_LANGUAGE=language)
+                self.assertEqual(fast.status_code, status.HTTP_200_OK)
+                self.assertEqual(fast.content, slow.content, (params, language))
+
+    def test_search_ranks_and_tolerates_typos_and_script(self):
+        arena = Venue.objects.create(
+            name_ru="Юнусобод Арена",
+            address_ru="Юнусабадский район",
+            price_per_hour=Decimal("100000.00"),
+        )
+        Venue.objects.create(
+            name_ru="Спортзал",
+            address_ru="Чиланзар",
+            description_ru="Крытая арена для мини-футбола",
+            price_per_hour=Decimal("100000.00"),
+        )
+        for term in ("Юнусобод", "Yunusobod", "yunusobot", "арена"):
+            response = self.client.get("/api/venues/", {"search": term})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.data["results"][0]["id"], arena.pk, term)
+
+        response = self.client.get("/api/venues/", {"search": "Wi-Fi"})
+        self.assertEqual([v["id"] for v in response.data["results"]], [self.venue.pk])
+
+        # Ranked results are paged by number even when a cursor is asked for
+        response = self.client.get("/api/venues/", {"search": "арена", "pagination": "cursor"})
+        self.assertEqual(response.data["count"], 2)
+
+    def _amenity_venues(self):
+        parking = Venue.objects.create(
+            name_ru="Парковка",
+            address_ru="Адрес",
+            price_per_hour=Decimal("100000.00"),
+            amenities_ru=["Wi-Fi", "Парковка"],
+            amenities_en=["Wi-Fi", "Parking"],
+        )
+        shower = Venue.objects.create(
+            name_ru="Душ",
+            address_ru="Адрес",
+            price_per_hour=Decimal("100000.00"),
+            amenities_ru=["Душ"],
+        )
+        return parking, shower
+
+    def test_amenity_filters(self):
+        parking, shower = self._amenity_venues()
+
+        response = self.client.get("/api/venues/", {"amenities_all": "Wi-Fi,Parking"})
+        self.assertEqual([v["id"] for v in response.data["results"]], [parking.pk])
+
+        response = self.client.get("/api/venues/", {"amenities_any": "Душ,Parking"})
+        self.assertEqual({v["id"] for v in response.data["results"]}, {parking.pk, shower.pk})
+
+    def test_amenity_facets(self):
+        self._amenity_venues()
+
+        response = self.client.get("/api/venues/", {"facets": "amenities"}, HTTP_ACCEPT_LANGUAGE="en")
+        # The shower venue has no English amenities and falls back to Russian
+        self.assertEqual(
+            response.data["facets"]["amenities"],
+            [
+                {"name": "Wi-Fi", "count": 2},
+                {"name": "Parking", "count": 1},
+                {"name": "Душ", "count": 1},
+            ],
+        )
+
+        response = self.client.get(
+            "/api/venues/", {"facets": "amenities", "amenities_any": "Parking"}, HTTP_ACCEPT_LANGUAGE="en"
+        )
+        self.assertEqual(
+            response.data["facets"]["amenities"],
+            [{"name": "Parking", "count": 1}, {"name": "Wi-Fi", "count": 1}],
+        )
+        self.assertNotIn("facets", self.client.get("/api/venues/").data)
+
+    def test_amenity_filter_uses_gin_indexes(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+        plan = Venue.objects.filter(has_amenity("Wi-Fi")).explain()
+        for column in ("amenities_ru", "amenities_uz", "amenities_en"):
+            self.assertIn(f"venue_{column}", plan)
+
+    def test_detail_response_cached_per_language(self):
+        url = f"/api/venues/{self.venue.pk}/"
+        self.client.get(url, HTTP_ACCEPT_LANGUAGE="en")
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_ACCEPT_LANGUAGE="en")
+        self.assertEqual(response.data["name"], "Test Hall")
+        response = self.client.get(url, HTTP_ACCEPT_LANGUAGE="uz")
+        self.assertEqual(response.data["name"], "Test zal")
+
+    def test_etag_not_modified(self):
+        url = f"/api/venues/{self.venue.pk}/"
+        etag = self.client.get(url)["ETag"]
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        VenueImage.objects.create(venue=self.venue, image="venues/images/a.jpg")
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(len(response.data["images"]), 1)
+
+    async def test_async_views_match_sync_client(self):
+        paths = [
+            "/api/venues/",
+            f"/api/venues/{self.venue.pk}/",
+            f"/api/venues/{self.venue.pk}/availability/?date=2030-01-01",
+            f"/api/venues/{self.venue.pk}/availability/?date_from=2030-01-01&date_to=2030-01-03",
+        ]
+        for path in paths:
+            asgi = await self.async_client.get(path)
+            wsgi = await sync_to_async(self.client.get)(path)
+            self.assertEqual(asgi.status_code, status.HTTP_200_OK, path)
+            self.assertEqual(asgi.content, wsgi.content, path)
+
     def test_venue_not_found(self):
         response = self.client.get("/api/venues/99999/")
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -81,3 +428,326 @@ class VenueTests(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         # name field should return the English value
         self.assertEqual(response.data["name"], "Test Hall")
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+    DATABASE_REPLICAS=["replica_1"],
+)
+class ReplicaRoutingTests(TestCase):
+    """Which alias the router picks; queries themselves still run on default."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(phone_number="+998901234567")
+        self.venue = Venue.objects.create(
+            name_ru="Зал", name_uz="Zal", name_en="Hall",
+            address_ru="Адрес", address_uz="Manzil", address_en="Address",
+            price_per_hour=Decimal("100000.00"),
+            is_active=True,
+        )
+        cache.clear()  # creating the venue pinned venue responses to the primary
+
+        self.reads = []
+        route = ReplicaRouter.db_for_read
+
+        def record(router, model, **hints):
+            self.reads.append(route(router, model, **hints))
+            return "default"
+
+        patcher = patch.object(ReplicaRouter, "db_for_read", record)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def authenticate(self):
+        token = UserRefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def test_public_reads_use_replica(self):
+        paths = [f"/api/venues/{self.venue.pk}/", f"/api/venues/{self.venue.pk}/availability/?date=2030-01-01"]
+        for path in paths:
+            response = self.client.get(path)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(self.reads), {"replica_1"})
+
+    def test_other_reads_use_primary(self):
+        self.authenticate()
+        self.client.get("/api/bookings/")
+        self.assertEqual(set(self.reads), {"default"})
+
+        router = ReplicaRouter()
+        self.assertEqual(router.db_for_write(Venue), "default")
+        self.assertFalse(router.allow_migrate("replica_1", "venues"))
+
+    def test_booking_pins_user_to_primary(self):
+        self.authenticate()
+        self.client.get(f"/api/venues/{self.venue.pk}/")
+        self.assertIn("replica_1", self.reads)
+
+        response = self.client.post(
+            "/api/bookings/",
+            {
+                "venue": self.venue.pk,
+                "booking_date": (date.today() + timedelta(days=7)).isoformat(),
+                "start_time": "10:00",
+                "end_time": "12:00",
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.reads.clear()
+        self.client.get(f"/api/venues/{self.venue.pk}/")
+        self.assertEqual(set(self.reads), {"default"})
+
+    def test_profile_update_pins_user_to_primary(self):
+        self.authenticate()
+        response = self.client.patch("/api/auth/me/", {"name": "New"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.client.get(f"/api/venues/{self.venue.pk}/")
+        self.assertEqual(set(self.reads), {"default"})
+
+    def test_venue_change_renders_misses_from_primary(self):
+        self.venue.save()
+        self.client.get(f"/api/venues/{self.venue.pk}/")
+        self.assertEqual(set(self.reads), {"default"})
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+    VENUE_IMAGE_WIDTHS=[320, 640],
+)
+class VenueImageVariantTests(TestCase):
+    """Resized copies; without Redis they are rendered when the upload commits."""
+
+    def setUp(self):
+        cache.clear()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.client = APIClient()
+        self.venue = Venue.objects.create(
+            name_ru="Зал", name_uz="Zal", name_en="Hall",
+            address_ru="Адрес", address_uz="Manzil", address_en="Address",
+            price_per_hour=Decimal("100000.00"),
+            is_active=True,
+        )
+
+    def upload(self, width=800, height=600, mode="RGB", name="hall.png"):
+        buffer = BytesIO()
+        Image.new(mode, (width, height), "red").save(buffer, "PNG")
+        with self.captureOnCommitCallbacks(execute=True):
+            return VenueImage.objects.create(
+                venue=self.venue,
+                image=SimpleUploadedFile(name, buffer.getvalue(), content_type="image/png"),
+                is_primary=True,
+            )
+
+    def test_variants_rendered_on_upload(self):
+        image = self.upload(mode="RGBA")
+        image.refresh_from_db()
+        self.assertTrue(images.is_current(image))
+        self.assertEqual(set(image.variants["webp"]), {"320", "640"})
+        storage = image.image.storage
+        with storage.open(image.variants["jpeg"]["320"]) as file:
+            rendered = Image.open(file)
+            self.assertEqual((rendered.format, rendered.size), ("JPEG", (320, 240)))
+        with storage.open(image.variants["webp"]["640"]) as file:
+            self.assertEqual(Image.open(file).format, "WEBP")
+
+    def test_small_originals_not_upscaled(self):
+        image = self.upload(width=200, height=100)
+        image.refresh_from_db()
+        self.assertEqual(set(image.variants["webp"]), {"200"})
+
+    def test_srcset_in_responses(self):
+        image = self.upload()
+        image.refresh_from_db()
+        webp = f"http://testserver/media/{image.variants['webp']['320']}"
+
+        detail = self.client.get(f"/api/venues/{self.venue.pk}/").data
+        self.assertEqual(detail["images"][0]["srcset"]["webp"]["320"], webp)
+        venue = self.client.get("/api/venues/").data["results"][0]
+        self.assertEqual(venue["primary_image_srcset"]["webp"]["320"], webp)
+
+    def test_srcset_empty_until_rendered(self):
+        VenueImage.objects.create(venue=self.venue, image="venues/images/pending.jpg", is_primary=True)
+        venue = self.client.get("/api/venues/").data["results"][0]
+        self.assertEqual(venue["primary_image_srcset"], {})
+
+    def test_duplicate_upload_reuses_variants(self):
+        first = self.upload()
+        first.refresh_from_db()
+        with patch.object(images, "render_variants") as render:
+            second = self.upload()
+        render.assert_not_called()
+        second.refresh_from_db()
+        self.assertEqual(second.variants, first.variants)
+
+    def test_backfill_renders_stale_images(self):
+        image = self.upload()
+        VenueImage.objects.filter(pk=image.pk).update(variants={})
+        out = StringIO()
+        call_command("backfill_image_variants", processes=1, stdout=out)
+        self.assertIn("Rendered 1 image(s), 0 failed", out.getvalue())
+        image.refresh_from_db()
+        self.assertTrue(images.is_current(image))
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class MediaTests(TestCase):
+    """Content-hashed uploads and how ``/media/`` serves them."""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.media_root = media_root
+        self.venue = Venue.objects.create(
+            name_ru="Зал", name_uz="Zal", name_en="Hall",
+            address_ru="Адрес", address_uz="Manzil", address_en="Address",
+            price_per_hour=Decimal("100000.00"),
+        )
+        buffer = BytesIO()
+        Image.new("RGB", (40, 30), "blue").save(buffer, "PNG")
+        self.png = buffer.getvalue()
+
+    def upload(self, name):
+        return VenueImage.objects.create(
+            venue=self.venue, image=SimpleUploadedFile(name, self.png, content_type="image/png")
+        )
+
+    def test_identical_uploads_share_a_file(self):
+        first = self.upload("hall.PNG")
+        second = self.upload("copy.png")
+        self.assertRegex(first.image.name, r"^venues/images/[0-9a-f]{32}\.png$")
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertEqual(os.listdir(os.path.join(self.media_root, "venues/images")), [os.path.basename(first.image.name)])
+
+    def test_hashed_names_are_immutable(self):
+        url = self.upload("hall.png").image.url
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "image/png")
+        self.assertEqual(response["Cache-Control"], "max-age=315360000, public, immutable")
+        self.assertEqual(b"".join(response.streaming_content), self.png)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_byte_ranges(self):
+        url = self.upload("hall.png").image.url
+        response = self.client.get(url, HTTP_RANGE="bytes=0-9")
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(response["Content-Range"], f"bytes 0-9/{len(self.png)}")
+        self.assertEqual(b"".join(response.streaming_content), self.png[:10])
+
+        response = self.client.get(url, HTTP_RANGE=f"bytes={len(self.png)}-")
+        self.assertEqual(response.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+
+    def test_other_names_revalidate(self):
+        os.makedirs(os.path.join(self.media_root, "venues/images"))
+        with open(os.path.join(self.media_root, "venues/images/hall.png"), "wb") as file:
+            file.write(self.png)
+        response = self.client.get("/media/venues/images/hall.png")
+        self.assertEqual(response["Cache-Control"], "max-age=3600, public")
+
+    def test_missing_and_outside_files(self):
+        self.assertEqual(self.client.get("/media/venues/images/nope.png").status_code, 404)
+        self.assertEqual(self.client.get("/media/../config/settings.py").status_code, 404)
+        self.assertEqual(self.client.get("/media/venues/").status_code, 404)
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class VenueImportTests(TestCase):
+    """Bulk upserts of partner venue files."""
+
+    CSV = (
+        "external_id,name_ru,name_uz,name_en,address_ru,address_uz,address_en,"
+        "description_ru,price_per_hour,amenities_ru,amenities_en,is_active\n"
+        "p-1,Зал 1,Zal 1,Hall 1,Адрес 1,Manzil 1,Address 1,\"Два\nабзаца\",150000,Wi-Fi; Парковка,Wi-Fi; Parking,yes\n"
+        "p-2,Зал 2,,Hall 2,Адрес 2,,,,90000.5,,,0\n"
+        "p-3,,,,Адрес 3,,,,100,,,\n"
+        "p-4,Зал 4,,,Адрес 4,,,,cheap,,,\n"
+    )
+
+    def setUp(self):
+        cache.clear()
+        self.errors = []
+
+    def run_import(self, data=CSV, fmt="csv", **kwargs):
+        return importer.import_venues(
+            importer.read_records(StringIO(data), fmt),
+            on_error=lambda number, message: self.errors.append((number, message)),
+            **kwargs,
+        )
+
+    def test_csv_upsert(self):
+        for use_copy in (False, True):
+            with self.subTest(use_copy=use_copy):
+                Venue.objects.all().delete()
+                self.errors = []
+                self.assertEqual(self.run_import(use_copy=use_copy), {"created": 2, "updated": 0, "invalid": 2})
+                self.assertEqual([number for number, _ in self.errors], [5, 6])
+                self.assertIn("name_ru", self.errors[0][1])
+                self.assertIn("price_per_hour", self.errors[1][1])
+
+                hall = Venue.objects.get(external_id="p-1")
+                self.assertEqual((hall.name_ru, hall.name_en, hall.address_uz), ("Зал 1", "Hall 1", "Manzil 1"))
+                self.assertEqual(hall.description_ru, "Два\nабзаца")
+                self.assertEqual(hall.amenities_en, ["Wi-Fi", "Parking"])
+                self.assertEqual(hall.price_per_hour, Decimal("150000"))
+                second = Venue.objects.get(external_id="p-2")
+                self.assertFalse(second.is_active)
+                self.assertIsNone(second.name_uz)
+                self.assertEqual((second.description_ru, second.amenities_ru), ("", []))
+                # untranslated columns follow the default language
+                self.assertEqual(
+                    Venue.objects.filter(external_id="p-1").values_list("name", "amenities").get(),
+                    ("Зал 1", ["Wi-Fi", "Парковка"]),
+                )
+                self.assertTrue(Venue.objects.filter(search_vector="Парковка").exists())
+
+                updated = self.CSV.replace("150000", "175000")
+                self.assertEqual(self.run_import(updated, use_copy=use_copy)["updated"], 2)
+                self.assertEqual(Venue.objects.count(), 2)
+                self.assertEqual(Venue.objects.get(external_id="p-1").price_per_hour, Decimal("175000"))
+
+    def test_json_and_ndjson(self):
+        records = [
+            {"external_id": "j-1", "name_ru": "Зал", "address_ru": "Адрес", "price_per_hour": 100, "amenities_ru": ["Wi-Fi"]},
+            {"external_id": "j-1", "name_ru": "Зал (новый)", "address_ru": "Адрес", "price_per_hour": 120},
+            ["not", "an", "object"],
+        ]
+        self.assertEqual(self.run_import(json.dumps(records), "json"), {"created": 1, "updated": 0, "invalid": 1})
+        self.assertEqual(Venue.objects.get(external_id="j-1").name_ru, "Зал (новый)")
+
+        ndjson = "\n".join(json.dumps(record) for record in records[:1]) + "\n\n"
+        self.assertEqual(self.run_import(ndjson, "ndjson"), {"created": 0, "updated": 1, "invalid": 0})
+
+    def test_batches_cost_constant_queries(self):
+        rows = "".join(f"b-{index},Зал {index},,,Адрес,,,,100,,,\n" for index in range(50))
+        data = self.CSV.splitlines(keepends=True)[0] + rows
+        with self.assertNumQueries(2 * 4):  # per batch: savepoint, existing keys, upsert, release
+            self.run_import(data, batch_size=25)
+
+    def test_command(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False, encoding="utf-8") as file:
+            file.write(self.CSV)
+        self.addCleanup(os.unlink, file.name)
+        out, err = StringIO(), StringIO()
+        call_command("import_venues", file.name, "--copy", stdout=out, stderr=err)
+        self.assertIn("Imported 2 venues (2 created, 0 updated, 2 invalid)", out.getvalue())
+        self.assertIn("Line 5: name_ru", err.getvalue())
+
+    def test_seed_venues_queries(self):
+        with self.assertNumQueries(2):
+            call_command("seed_venues", stdout=StringIO())
+        self.assertEqual(Venue.objects.count(), 12)
+        with self.assertNumQueries(1):
+            call_command("seed_venues", stdout=StringIO())
+        self.assertEqual(Venue.objects.count(), 12)
@@ -4,6 +4,7 @@ from . import views
 
 urlpatterns = [
     path("", views.VenueListView.as_view(), name="venue-list"),
+    path("available/", views.AvailableVenueListView.as_view(), name="venue-available"),
     path("<int:pk>/", views.VenueDetailView.as_view(), name="venue-detail"),
     path(
         "<int:pk>/availability/",
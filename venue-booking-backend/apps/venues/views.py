@@ -1,47 +1,128 @@
-from datetime import time
-
+from django.db.models import Exists, OuterRef
+from django_filters.rest_framework import DjangoFilterBackend
 from drf_spectacular.utils import OpenApiParameter, extend_schema
-from rest_framework import generics, permissions, status
+from rest_framework import filters, generics, permissions, status
 from rest_framework.response import Response
-from rest_framework.views import APIView
 
+from apps.bookings import availability
 from apps.bookings.models import Booking
+from config.async_views import AsyncAPIView
+from config.db_router import ReplicaReadMixin
+from config.fast_serialization import FastListMixin
 
-from .filters import VenueFilter
+from .cache import LIST_GENERATION_KEY, CachedResponseMixin, venue_generation_key
+from .filters import VenueFilter, VenueSearchFilter, amenity_facets
 from .models import Venue
 from .serializers import (
     AvailabilityQuerySerializer,
+    VenueAvailabilitySearchSerializer,
     VenueDetailSerializer,
     VenueListSerializer,
 )
 
 
-class VenueListView(generics.ListAPIView):
+FACETS_PARAMETER = OpenApiParameter(
+    name="facets",
+    type=str,
+    location=OpenApiParameter.QUERY,
+    description="Set to 'amenities' to add per-amenity counts for the current filters",
+    enum=["amenities"],
+)
+
+
+class VenueListView(ReplicaReadMixin, CachedResponseMixin, FastListMixin, generics.ListAPIView, AsyncAPIView):
     """List all active venues with pagination, filtering, and search."""
 
-    queryset = Venue.objects.filter(is_active=True).prefetch_related("images")
+    queryset = Venue.objects.filter(is_active=True).with_primary_image()
     serializer_class = VenueListSerializer
     permission_classes = [permissions.AllowAny]
+    filter_backends = [DjangoFilterBackend, VenueSearchFilter, filters.OrderingFilter]
     filterset_class = VenueFilter
-    search_fields = ["name", "name_ru", "name_uz", "name_en"]
     ordering_fields = ["price_per_hour", "created_at", "name"]
 
+    @extend_schema(parameters=[FACETS_PARAMETER])
+    async def get(self, request, *args, **kwargs):
+        return await super().get(request, *args, **kwargs)
+
+    def get_generation_key(self):
+        return LIST_GENERATION_KEY
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        self.filtered_queryset = queryset
+        return queryset
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if "amenities" in self.request.query_params.get("facets", "").split(","):
+            response.data["facets"] = {"amenities": amenity_facets(self.filtered_queryset)}
+        return response
+
+
+class AvailableVenueListView(VenueListView):
+    """List active venues with no pending or confirmed booking in a time window."""
+
+    # Counting every free venue costs as much as the search itself
+    pagination_mode = "cursor"
+    # Depends on bookings, which do not bump the venue generations
+    response_cache_enabled = False
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="date",
+                type=str,
+                location=OpenApiParameter.QUERY,
+                description="Date to search (YYYY-MM-DD)",
+                required=True,
+            ),
+            OpenApiParameter(
+                name="start_time",
+                type=str,
+                location=OpenApiParameter.QUERY,
+                description="Window start (HH:MM)",
+                required=True,
+            ),
+            OpenApiParameter(
+                name="end_time",
+                type=str,
+                location=OpenApiParameter.QUERY,
+                description="Window end (HH:MM)",
+                required=True,
+            ),
+            FACETS_PARAMETER,
+        ],
+    )
+    async def get(self, request, *args, **kwargs):
+        return await super().get(request, *args, **kwargs)
+
+    def get_queryset(self):
+        serializer = VenueAvailabilitySearchSerializer(data=self.request.query_params)
+        serializer.is_valid(raise_exception=True)
+        window = serializer.validated_data
 
-class VenueDetailView(generics.RetrieveAPIView):
+        # Anti-join: a venue qualifies when no overlapping booking exists
+        conflicting = Booking.objects.filter(venue=OuterRef("pk")).overlapping(
+            window["date"], window["start_time"], window["end_time"]
+        )
+        return super().get_queryset().filter(~Exists(conflicting))
+
+
+class VenueDetailView(ReplicaReadMixin, CachedResponseMixin, generics.RetrieveAPIView, AsyncAPIView):
     """Get single venue details."""
 
     queryset = Venue.objects.filter(is_active=True).prefetch_related("images")
     serializer_class = VenueDetailSerializer
     permission_classes = [permissions.AllowAny]
 
+    def get_generation_key(self):
+        return venue_generation_key(self.kwargs["pk"])
 
-class VenueAvailabilityView(APIView):
-    """Get available time slots for a venue on a specific date."""
 
-    permission_classes = [permissions.AllowAny]
+class VenueAvailabilityView(ReplicaReadMixin, AsyncAPIView):
+    """Get available time slots for a venue on a specific date or date range."""
 
-    OPENING_HOUR = 9   # 9 AM
-    CLOSING_HOUR = 22  # 10 PM
+    permission_classes = [permissions.AllowAny]
 
     @extend_schema(
         parameters=[
@@ -50,15 +131,29 @@ class VenueAvailabilityView(APIView):
                 type=str,
                 location=OpenApiParameter.QUERY,
                 description="Date to check (YYYY-MM-DD)",
-                required=True,
-            )
+            ),
+            OpenApiParameter(
+                name="date_from",
+                type=str,
+                location=OpenApiParameter.QUERY,
+                description="First day of a range to check (YYYY-MM-DD), used with date_to",
+            ),
+            OpenApiParameter(
+                name="date_to",
+                type=str,
+                location=OpenApiParameter.QUERY,
+                description=(
+                    "Last day of the range, inclusive (YYYY-MM-DD). "
+                    f"At most {AvailabilityQuerySerializer.MAX_RANGE_DAYS} days."
+                ),
+            ),
         ],
         responses={200: dict},
     )
-    def get(self, request, pk):
+    async def get(self, request, pk):
         # Validate venue exists
         try:
-            venue = Venue.objects.get(pk=pk, is_active=True)
+            venue = await Venue.objects.aget(pk=pk, is_active=True)
         except Venue.DoesNotExist:
             return Response(
                 {"detail": "Venue not found."},
@@ -67,44 +162,41 @@ class VenueAvailabilityView(APIView):
 
         serializer = AvailabilityQuerySerializer(data=request.query_params)
         serializer.is_valid(raise_exception=True)
-        date = serializer.validated_data["date"]
 
-        # Get existing bookings for this venue on this date
-        bookings = Booking.objects.filter(
-            venue=venue,
-            booking_date=date,
-            status__in=["pending", "confirmed"],
-        ).values_list("start_time", "end_time")
-
-        booked_slots = [(b[0], b[1]) for b in bookings]
-
-        # Generate available 1-hour slots
-        available_slots = []
-        for hour in range(self.OPENING_HOUR, self.CLOSING_HOUR):
-            slot_start = time(hour, 0)
-            slot_end = time(hour + 1, 0)
-
-            is_available = True
-            for booked_start, booked_end in booked_slots:
-                # Check overlap
-                if slot_start < booked_end and slot_end > booked_start:
-                    is_available = False
-                    break
-
-            available_slots.append(
-                {
-                    "start_time": slot_start.strftime("%H:%M"),
-                    "end_time": slot_end.strftime("%H:%M"),
-                    "is_available": is_available,
-                }
+        if "date" not in serializer.validated_data:
+            return await self._range_response(
+                venue,
+                serializer.validated_data["date_from"],
+                serializer.validated_data["date_to"],
             )
 
+        date = serializer.validated_data["date"]
+
+        # Occupancy bitmap for the day (cached, rebuilt from bookings on a miss)
+        bitmap = await availability.aget_bitmap(venue.pk, date)
+
         return Response(
             {
                 "venue_id": venue.pk,
                 "venue_name": venue.name,
                 "date": str(date),
                 "price_per_hour": str(venue.price_per_hour),
-                "slots": available_slots,
+                "slots": availability.build_slots(bitmap),
+            }
+        )
+
+    async def _range_response(self, venue, date_from, date_to):
+        bitmaps = await availability.aget_bitmaps(venue.pk, date_from, date_to)
+        return Response(
+            {
+                "venue_id": venue.pk,
+                "venue_name": venue.name,
+                "date_from": str(date_from),
+                "date_to": str(date_to),
+                "price_per_hour": str(venue.price_per_hour),
+                "days": [
+                    {"date": str(day), "slots": availability.build_slots(bitmap)}
+                    for day, bitmap in bitmaps.items()
+                ],
             }
         )
@@ -0,0 +1,19 @@
+import os
+
+from django.core.asgi import ASGIHandler, get_asgi_application
+from django.core.signals import request_finished
+from django.db import connections
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+application = get_asgi_application()
+
+
+def close_connections(**kwargs):
+    # Each ASGI request runs its sync code (and async ORM calls) on a thread
+    # of its own, and connections are per thread: one kept for CONN_MAX_AGE
+    # would never be reused, only leaked until the server runs out. Reuse
+    # across requests under ASGI comes from pgbouncer instead.
+    connections.close_all()
+
+
+request_finished.connect(close_connections, sender=ASGIHandler)
@@ -0,0 +1,63 @@
+"""
+The default cache for async views.
+
+With django_redis every call is a single command on the ``redis.asyncio``
+client, encoding values the way django_redis does, so sync and async code
+share entries. Other backends use Django's own ``cache.a*`` methods.
+"""
+from django.core.cache import cache
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+
+from .redis_client import get_async_redis_client
+
+
+def _px(timeout):
+    if timeout is DEFAULT_TIMEOUT:
+        timeout = cache.default_timeout
+    return None if timeout is None else max(int(timeout * 1000), 1)
+
+
+async def aget(key, default=None):
+    client = get_async_redis_client()
+    if client is None:
+        return await cache.aget(key, default)
+    value = await client.get(cache.make_key(key))
+    return default if value is None else cache.client.decode(value)
+
+
+async def aget_many(keys) -> dict:
+    client = get_async_redis_client()
+    if client is None:
+        return await cache.aget_many(keys)
+    if not keys:
+        return {}
+    values = await client.mget([cache.make_key(key) for key in keys])
+    return {key: cache.client.decode(value) for key, value in zip(keys, values) if value is not None}
+
+
+async def aset(key, value, timeout=DEFAULT_TIMEOUT):
+    client = get_async_redis_client()
+    if client is None:
+        return await cache.aset(key, value, timeout)
+    await client.set(cache.make_key(key), cache.client.encode(value), px=_px(timeout))
+
+
+async def aadd(key, value, timeout=DEFAULT_TIMEOUT) -> bool:
+    client = get_async_redis_client()
+    if client is None:
+        return await cache.aadd(key, value, timeout)
+    return bool(await client.set(cache.make_key(key), cache.client.encode(value), px=_px(timeout), nx=True))
+
+
+async def aadd_many(mapping, timeout=DEFAULT_TIMEOUT):
+    """``aadd`` for every item, in one round trip with django_redis."""
+    client = get_async_redis_client()
+    if client is None:
+        for key, value in mapping.items():
+            await cache.aadd(key, value, timeout)
+        return
+    px = _px(timeout)
+    async with client.pipeline(transaction=False) as pipe:
+        for key, value in mapping.items():
+            pipe.set(cache.make_key(key), cache.client.encode(value), px=px, nx=True)
+        await pipe.execute()
@@ -0,0 +1,109 @@
+"""
+Read replicas.
+
+Every read goes to the primary unless a view opts in with
+``ReplicaReadMixin``: its safe requests then read from a random replica in
+``DATABASE_REPLICAS``. Writes always go to the primary.
+
+Replicas lag behind. A user whose write went through a ``PrimaryPinMixin``
+view (bookings, profile updates) reads from the primary everywhere for the
+next ``DATABASE_REPLICA_PIN_SECONDS``, so they see what they just wrote.
+Data written back into the cache must be built from the primary, since a
+stale copy would outlive the lag.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.permissions import SAFE_METHODS
+
+from config import async_cache
+
+PIN_PREFIX = "db:primary:"
+
+_replica_reads = ContextVar("replica_reads", default=False)
+
+
+def replicas_enabled() -> bool:
+    return bool(getattr(settings, "DATABASE_REPLICAS", None))
+
+
+def pin_key(scope) -> str:
+    return f"{PIN_PREFIX}{scope}"
+
+
+def pin_primary(scope):
+    """Read ``scope`` (a user id, or a name) from the primary for a while."""
+    if replicas_enabled():
+        cache.set(pin_key(scope), 1, timeout=getattr(settings, "DATABASE_REPLICA_PIN_SECONDS", 5))
+
+
+async def ais_pinned(scope) -> bool:
+    return await async_cache.aget(pin_key(scope)) is not None
+
+
+@contextmanager
+def primary_reads():
+    """Read from the primary inside the block, even in a replica view."""
+    token = _replica_reads.set(False)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if _replica_reads.get() and replicas_enabled():
+            return random.choice(settings.DATABASE_REPLICAS)
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        # Also catches instances that were read from a replica
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Every alias holds the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaReadMixin:
+    """
+    Serve safe requests from a replica unless the user is pinned.
+
+    For async views (``config.async_views.AsyncAPIView``); the choice
+    carries into ``sync_to_async`` calls made by the handler.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        token = _replica_reads.set(False)
+        try:
+            return await super().dispatch(request, *args, **kwargs)
+        finally:
+            _replica_reads.reset(token)
+
+    async def ainitial(self, request, *args, **kwargs):
+        await super().ainitial(request, *args, **kwargs)
+        if request.method in SAFE_METHODS and replicas_enabled():
+            pinned = request.user.is_authenticated and await ais_pinned(request.user.pk)
+            _replica_reads.set(not pinned)
+
+
+class PrimaryPinMixin:
+    """Pin the user to the primary after a successful write."""
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if (
+            request.method not in SAFE_METHODS
+            and response.status_code < 400
+            and request.user.is_authenticated
+        ):
+            pin_primary(request.user.pk)
+        return response
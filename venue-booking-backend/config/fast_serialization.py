@@ -0,0 +1,364 @@
+"""
+Read-only fast path for DRF serializers.
+
+``ModelSerializer.to_representation`` instantiates a model per row and walks
+every field through ``get_attribute``/``to_representation``. For read-only
+endpoints that work is pure overhead: the output is fully determined by a
+handful of columns. ``FastPlan`` compiles a serializer *instance* into:
+
+* the list of ``QuerySet.values()`` columns it needs (the modeltranslation
+  column for each translated field, in fallback order; ``venue__…`` joins
+  for nested serializers; subquery annotations contributed by custom fields),
+* one precompiled converter per output key that reproduces the DRF field's
+  ``to_representation`` exactly (Decimal quantisation, timezone-aware ISO
+  datetimes, file URLs, …),
+* one extra query per nested ``many=True`` serializer, grouped by parent key.
+
+Fields the compiler does not know raise ``UnsupportedField`` and the caller
+falls back to the regular serializer, so output is always identical.
+Custom fields can opt in by implementing ``compile_fast(plan, model, prefix)``.
+"""
+import decimal
+from collections import defaultdict
+
+from django.conf import settings
+from django.http import Http404
+from django.utils import timezone
+from django.utils.translation import get_language
+from rest_framework import ISO_8601, serializers
+from rest_framework.permissions import BasePermission
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+
+class UnsupportedField(Exception):
+    """The serializer contains a field the fast path cannot reproduce."""
+
+
+def _translation_options(model):
+    try:
+        from modeltranslation.translator import NotRegistered, translator
+    except ImportError:  # pragma: no cover - modeltranslation is a hard dependency
+        return ()
+    try:
+        return translator.get_options_for_model(model).fields
+    except NotRegistered:
+        return ()
+
+
+def _nullable(convert):
+    return lambda value: None if value is None else convert(value)
+
+
+def _decimal_converter(field):
+    coerce_to_string = getattr(field, "coerce_to_string", api_settings.COERCE_DECIMAL_TO_STRING)
+    if field.localize or field.decimal_places is None:
+        return field.to_representation
+    exponent = decimal.Decimal(".1") ** field.decimal_places
+    rounding = field.rounding
+
+    def convert(value):
+        if not isinstance(value, decimal.Decimal):
+            value = decimal.Decimal(str(value).strip())
+        context = decimal.getcontext().copy()
+        if field.max_digits is not None:
+            context.prec = field.max_digits
+        quantized = value.quantize(exponent, rounding=rounding, context=context)
+        return "{:f}".format(quantized) if coerce_to_string else quantized
+
+    return _nullable(convert)
+
+
+def _datetime_converter(field):
+    output_format = getattr(field, "format", api_settings.DATETIME_FORMAT)
+    if output_format is None or output_format.lower() != ISO_8601:
+        return field.to_representation
+    field_timezone = field.timezone if hasattr(field, "timezone") else field.default_timezone()
+
+    def convert(value):
+        if not value:
+            return None
+        if field_timezone is not None and timezone.is_aware(value):
+            value = value.astimezone(field_timezone)
+        value = value.isoformat()
+        if value.endswith("+00:00"):
+            value = value[:-6] + "Z"
+        return value
+
+    return convert
+
+
+def _isoformat_converter(field, setting):
+    output_format = getattr(field, "format", setting)
+    if output_format is None or output_format.lower() != ISO_8601:
+        return field.to_representation
+    return lambda value: value.isoformat() if value else None
+
+
+def file_url_converter(storage, request, use_url=True):
+    """Turn a stored file name into the URL DRF's ``FileField`` would render."""
+    if not use_url:
+        return lambda name: name or None
+
+    def convert(name):
+        if not name:
+            return None
+        url = storage.url(name)
+        return request.build_absolute_uri(url) if request is not None else url
+
+    return convert
+
+
+def _identity(value):
+    return value
+
+
+class FastPlan:
+    """A serializer compiled down to ``values()`` columns and converters."""
+
+    def __init__(self, serializer, model=None):
+        if isinstance(serializer, serializers.ListSerializer):
+            serializer = serializer.child
+        self.context = serializer.context
+        self.request = self.context.get("request")
+        self.model = model or serializer.Meta.model
+        self.columns = []
+        self.annotations = {}
+        self.relations = []
+        self.build = self._compile(serializer, self.model, prefix="")
+
+    # ── Registration helpers used by the compiler and custom fields ──
+
+    def column(self, name):
+        if name not in self.columns:
+            self.columns.append(name)
+        return name
+
+    def annotate(self, expression):
+        alias = f"_fast_{len(self.annotations)}"
+        self.annotations[alias] = expression
+        return self.column(alias)
+
+    # ── Execution ──
+
+    def values(self, queryset, extra_columns=()):
+        """Return a ``values()`` queryset producing this plan's rows."""
+        columns = list(self.columns)
+        for name in extra_columns:
+            if name not in columns:
+                columns.append(name)
+        return (
+            queryset.prefetch_related(None)
+            .annotate(**self.annotations)
+            .values(*columns)
+        )
+
+    def serialize(self, rows):
+        rows = list(rows)
+        for relation in self.relations:
+            relation.load(rows)
+        build = self.build
+        return [build(row) for row in rows]
+
+    # ── Compiler ──
+
+    def _compile(self, serializer, model, prefix):
+        translated = _translation_options(model)
+        getters = [
+            (field.field_name, self._getter(field, model, prefix, translated))
+            for field in serializer._readable_fields
+        ]
+
+        def build(row):
+            return {key: getter(row) for key, getter in getters}
+
+        return build
+
+    def _getter(self, field, model, prefix, translated):
+        if hasattr(field, "compile_fast"):
+            return field.compile_fast(self, model, prefix)
+
+        if field.source == "*" or "." in field.source:
+            raise UnsupportedField(field.field_name)
+        source = field.source
+
+        if isinstance(field, serializers.ListSerializer):
+            return self._many_getter(field, model, prefix)
+        if isinstance(field, serializers.BaseSerializer):
+            return self._nested_getter(field, model, prefix)
+
+        convert = self._converter(field, model, source)
+        if source in translated:
+            return self._translated_getter(model, source, prefix, convert)
+
+        column = self.column(prefix + source)
+        return lambda row: convert(row[column])
+
+    def _converter(self, field, model, source):
+        kind = type(field)
+        if kind is serializers.BigIntegerField and getattr(
+            field, "coerce_to_string", getattr(api_settings, "COERCE_BIGINT_TO_STRING", False)
+        ):
+            return field.to_representation
+        if kind in (
+            serializers.IntegerField,
+            serializers.BigIntegerField,
+            serializers.BooleanField,
+            serializers.ReadOnlyField,
+        ):
+            return _identity
+        if kind is serializers.CharField:
+            return _nullable(str)
+        if kind is serializers.ChoiceField:
+            return lambda value: value if value in ("", None) else field.choice_strings_to_values.get(str(value), value)
+        if kind is serializers.JSONField and not field.binary:
+            return _identity
+        if kind is serializers.PrimaryKeyRelatedField and field.pk_field is None:
+            return _identity
+        if kind is serializers.DecimalField:
+            return _decimal_converter(field)
+        if kind is serializers.DateTimeField:
+            return _datetime_converter(field)
+        if kind is serializers.DateField:
+            return _isoformat_converter(field, api_settings.DATE_FORMAT)
+        if kind is serializers.TimeField:
+            return _isoformat_converter(field, api_settings.TIME_FORMAT)
+        if kind in (serializers.ImageField, serializers.FileField):
+            storage = model._meta.get_field(source).storage
+            use_url = getattr(field, "use_url", api_settings.UPLOADED_FILES_USE_URL)
+            return file_url_converter(storage, self.request, use_url)
+        raise UnsupportedField(field.field_name)
+
+    def _translated_getter(self, model, source, prefix, convert):
+        """Mirror modeltranslation's descriptor: first meaningful value in fallback order."""
+        from modeltranslation.fields import NONE
+        from modeltranslation.utils import (
+            build_localized_fieldname,
+            fallbacks_enabled,
+            resolution_order,
+        )
+
+        descriptor = model.__dict__[source]
+        default = NONE
+        undefined = descriptor.fallback_undefined
+        if undefined is NONE:
+            default = descriptor.field.get_default()
+            undefined = default
+        if fallbacks_enabled() and descriptor.fallback_value is not NONE:
+            fallback = descriptor.fallback_value
+        else:
+            fallback = descriptor.field.get_default() if default is NONE else default
+
+        columns = [
+            self.column(prefix + build_localized_fieldname(source, lang))
+            for lang in resolution_order(get_language() or settings.LANGUAGE_CODE, descriptor.fallback_languages)
+        ]
+        meaningful = descriptor.meaningful_value
+
+        def get(row):
+            for column in columns:
+                value = row[column]
+                if meaningful(value, undefined):
+                    return convert(value)
+            return convert(fallback)
+
+        return get
+
+    def _nested_getter(self, field, model, prefix):
+        relation = model._meta.get_field(field.source)
+        if not relation.many_to_one and not relation.one_to_one:
+            raise UnsupportedField(field.field_name)
+        nested_prefix = f"{prefix}{field.source}__"
+        key_column = self.column(f"{prefix}{relation.attname}")
+        build = self._compile(field, relation.related_model, nested_prefix)
+        return lambda row: None if row[key_column] is None else build(row)
+
+    def _many_getter(self, field, model, prefix):
+        relation = model._meta.get_field(field.source)
+        if not relation.one_to_many:
+            raise UnsupportedField(field.field_name)
+        parent_column = self.column(f"{prefix}{model._meta.pk.name}")
+        many = _ManyRelation(field.child, relation, parent_column)
+        self.relations.append(many)
+        return lambda row: many.get(row[parent_column])
+
+
+class _ManyRelation:
+    """A reverse foreign key serialized with ``many=True``, loaded in one query."""
+
+    def __init__(self, child_serializer, relation, parent_column):
+        self.related_model = relation.related_model
+        self.fk_name = relation.field.name
+        self.fk_attname = relation.field.attname
+        self.parent_column = parent_column
+        self.plan = FastPlan(child_serializer, model=self.related_model)
+        self.groups = {}
+
+    def load(self, rows):
+        keys = {row[self.parent_column] for row in rows}
+        self.groups = defaultdict(list)
+        if not keys:
+            return
+        queryset = self.related_model._default_manager.filter(**{f"{self.fk_name}__in": keys})
+        children = list(self.plan.values(queryset, extra_columns=[self.fk_attname]))
+        for relation in self.plan.relations:
+            relation.load(children)
+        for child in children:
+            self.groups[child[self.fk_attname]].append(self.plan.build(child))
+
+    def get(self, key):
+        return self.groups.get(key, [])
+
+
+def fast_serialization_enabled() -> bool:
+    return getattr(settings, "FAST_SERIALIZATION", True)
+
+
+class FastListMixin:
+    """``ListAPIView`` mixin that serializes pages through a ``FastPlan``."""
+
+    def list(self, request, *args, **kwargs):
+        if not fast_serialization_enabled():
+            return super().list(request, *args, **kwargs)
+        try:
+            plan = FastPlan(self.get_serializer())
+        except UnsupportedField:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        extra = getattr(self.paginator, "required_fields", lambda: ())()
+        rows = plan.values(queryset, extra_columns=extra)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(plan.serialize(page))
+        return Response(plan.serialize(rows))
+
+
+def _checks_objects(permission) -> bool:
+    return type(permission).has_object_permission is not BasePermission.has_object_permission
+
+
+class FastRetrieveMixin:
+    """
+    ``RetrieveAPIView`` mixin that serializes the object through a ``FastPlan``.
+
+    The row is never a model instance, so views with object-level permissions
+    take the regular path, where ``get_object()`` checks them.
+    """
+
+    def retrieve(self, request, *args, **kwargs):
+        if not fast_serialization_enabled() or any(map(_checks_objects, self.get_permissions())):
+            return super().retrieve(request, *args, **kwargs)
+        try:
+            plan = FastPlan(self.get_serializer())
+        except UnsupportedField:
+            return super().retrieve(request, *args, **kwargs)
+
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.filter_queryset(self.get_queryset()).filter(
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        )
+        rows = plan.serialize(plan.values(queryset)[:2])
+        if len(rows) != 1:
+            raise Http404
+        return Response(rows[0])
@@ -0,0 +1,99 @@
+"""
+Uploaded media: content-addressed storage and serving.
+
+``ContentHashStorage`` (the default storage) names every saved file after
+the SHA-256 of its bytes, keeping the directory and extension:
+``venues/images/hall.jpg`` is stored as
+``venues/images/3f1c…e0a9.jpg``. Identical uploads share one file, and a
+name never gets different content, so files are never deleted with the
+rows pointing at them.
+
+``serve`` answers ``MEDIA_URL`` requests with WhiteNoise's responder, which
+handles ``HEAD``, ``ETag`` / ``Last-Modified`` conditional requests and
+byte ranges. Content-hashed names are cached as immutable; anything else
+(files from before hashed names) for ``MEDIA_MAX_AGE`` seconds.
+"""
+import hashlib
+import os
+import re
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.base import File
+from django.core.files.storage import FileSystemStorage
+from django.http import Http404
+from django.utils._os import safe_join
+from whitenoise.base import WhiteNoise
+from whitenoise.middleware import WhiteNoiseFileResponse
+from whitenoise.responders import NotARegularFileError
+
+HASH_LENGTH = 32  # hex digits of the SHA-256 kept in names
+
+HASHED_NAME = re.compile(rf"(^|/)[0-9a-f]{{{HASH_LENGTH}}}\.\w+$")
+
+
+def content_hash(content) -> str:
+    digest = hashlib.sha256()
+    for chunk in content.chunks():
+        digest.update(chunk)
+    return digest.hexdigest()[:HASH_LENGTH]
+
+
+class ContentHashStorage(FileSystemStorage):
+    """``FileSystemStorage`` that names files after their content."""
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, "chunks"):
+            content = File(content, name)
+        directory, base = os.path.split(str(name).replace("\\", "/"))
+        extension = os.path.splitext(base)[1].lower()
+        name = os.path.join(directory, content_hash(content) + extension)
+        if self.exists(name):
+            return name
+        # Two first uploads of the same bytes at once still end up as two
+        # files, the later under a suffixed name
+        return super().save(name, content, max_length)
+
+
+class MediaFileResponse(WhiteNoiseFileResponse):
+    """Reads the file in a thread under ASGI instead of loading it whole."""
+
+    async def __aiter__(self):
+        if self.file_to_stream is None:
+            return
+        read = sync_to_async(self.file_to_stream.read, thread_sensitive=False)
+        while chunk := await read(self.block_size):
+            yield chunk
+
+
+class _MediaFiles(WhiteNoise):
+    # Files are looked up per request, as uploads keep arriving
+
+    def immutable_file_test(self, path, url):
+        return bool(HASHED_NAME.search(url))
+
+
+_files = None
+
+
+def _media_files():
+    global _files
+    if _files is None:
+        _files = _MediaFiles(None, max_age=getattr(settings, "MEDIA_MAX_AGE", 3600))
+    return _files
+
+
+def serve(request, path):
+    try:
+        static_file = _media_files().get_static_file(safe_join(settings.MEDIA_ROOT, path), path)
+    except (NotARegularFileError, SuspiciousFileOperation):
+        raise Http404
+    response = static_file.get_response(request.method, request.META)
+    http_response = MediaFileResponse(response.file or (), status=int(response.status))
+    del http_response["content-type"]
+    for key, value in response.headers:
+        http_response[key] = value
+    return http_response
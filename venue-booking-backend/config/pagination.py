@@ -0,0 +1,234 @@
+"""
+Pagination shared by the list endpoints.
+
+``PageNumberPagination`` runs a ``COUNT(*)`` plus an ``OFFSET`` scan that
+grows with the page number. ``KeysetPagination`` instead seeks past the last
+row seen on the ``(-created_at, -id)`` ordering, so every page costs the same
+as the first one. ``HybridPagination`` picks between the two per request.
+"""
+import base64
+import json
+from collections import OrderedDict
+from functools import reduce
+from operator import or_
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Seek-based pagination over a fixed, unique ordering.
+
+    The opaque ``cursor`` query parameter encodes the ordering values of the
+    row at the page boundary and the direction to read in. No total count is
+    returned.
+    """
+
+    ordering = ("-created_at", "-id")
+    page_size = api_settings.PAGE_SIZE
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor."
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        position, reverse = self.decode_cursor(request, queryset.model)
+
+        ordering = self._reversed(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self._after(ordering, position))
+
+        rows = list(queryset[: self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+        if reverse:
+            rows.reverse()
+
+        # Reading backwards, there is always a next page: the one we came from
+        self.has_next = has_more if not reverse else True
+        self.has_previous = position is not None if not reverse else has_more
+        self.first = rows[0] if rows else None
+        self.last = rows[-1] if rows else None
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response(
+            OrderedDict(
+                [
+                    ("next", self.get_next_link()),
+                    ("previous", self.get_previous_link()),
+                    ("results", data),
+                ]
+            )
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+            # Tells it apart from the page-number envelope, which adds "count"
+            "additionalProperties": False,
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "The pagination cursor value.",
+                "schema": {"type": "string"},
+            }
+        ]
+
+    def get_next_link(self):
+        if not self.has_next or self.last is None:
+            return None
+        return self.encode_cursor(self.last, reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or self.first is None:
+            return None
+        return self.encode_cursor(self.first, reverse=True)
+
+    # ── Cursor encoding ──────────────────────────
+
+    def encode_cursor(self, obj, reverse):
+        position = [self._field_value(obj, field) for field in self.ordering]
+        payload = json.dumps({"p": position, "r": reverse}, default=str, separators=(",", ":"))
+        token = base64.urlsafe_b64encode(payload.encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request, model):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(token.encode()))
+            values = payload["p"]
+            if len(values) != len(self.ordering):
+                raise ValueError
+            position = [
+                model._meta.get_field(field.lstrip("-")).to_python(value)
+                for field, value in zip(self.ordering, values)
+            ]
+            return position, bool(payload.get("r"))
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    # ── Helpers ──────────────────────────────────
+
+    def required_fields(self):
+        """Columns a ``values()`` queryset must select to build cursors."""
+        return tuple(field.lstrip("-") for field in self.ordering)
+
+    @staticmethod
+    def _field_value(obj, field):
+        if isinstance(obj, dict):
+            return obj[field.lstrip("-")]
+        return getattr(obj, field.lstrip("-"))
+
+    @staticmethod
+    def _reversed(ordering):
+        return tuple(field[1:] if field.startswith("-") else f"-{field}" for field in ordering)
+
+    @staticmethod
+    def _after(ordering, position):
+        """
+        Lexicographic "comes after ``position``" predicate for ``ordering``.
+
+        The redundant non-strict bound on the leading field gives the planner
+        an index range condition instead of a bare ``OR``.
+        """
+        clauses = []
+        for i, field in enumerate(ordering):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+            equal = {f.lstrip("-"): value for f, value in zip(ordering[:i], position[:i])}
+            clauses.append(Q(**equal, **{f"{name}__{lookup}": position[i]}))
+        leading = ordering[0]
+        bound = Q(**{f"{leading.lstrip('-')}__{'lte' if leading.startswith('-') else 'gte'}": position[0]})
+        return bound & reduce(or_, clauses)
+
+
+class HybridPagination(BasePagination):
+    """
+    Page numbers by default, keyset pagination on request.
+
+    Keyset mode is used when the view sets ``pagination_mode = "cursor"``,
+    when the request passes ``?pagination=cursor`` or a ``cursor``, unless an
+    explicit ``ordering`` other than the keyset one is requested or results
+    are ranked by ``search``: arbitrary orderings always fall back to page
+    numbers.
+    """
+
+    mode_query_param = "pagination"
+
+    def __init__(self):
+        self.page_number = PageNumberPagination()
+        self.keyset = KeysetPagination()
+        self.paginator = self.page_number
+
+    def use_keyset(self, request, view):
+        if request.query_params.get(api_settings.SEARCH_PARAM):
+            return False
+        ordering = request.query_params.get(api_settings.ORDERING_PARAM)
+        if ordering and tuple(ordering.split(",")) not in (
+            self.keyset.ordering,
+            self.keyset.ordering[:1],
+        ):
+            return False
+        if self.keyset.cursor_query_param in request.query_params:
+            return True
+        mode = request.query_params.get(self.mode_query_param) or getattr(
+            view, "pagination_mode", "page"
+        )
+        return mode == "cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.paginator = self.keyset if self.use_keyset(request, view) else self.page_number
+        results = self.paginator.paginate_queryset(queryset, request, view)
+        if self.paginator is self.keyset:
+            # The mode is implied by the cursor on follow-up links
+            self.keyset.base_url = remove_query_param(self.keyset.base_url, self.mode_query_param)
+        return results
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    def required_fields(self):
+        return self.keyset.required_fields()
+
+    def get_paginated_response_schema(self, schema):
+        # Any request can switch modes, whatever the view's default
+        return {
+            "oneOf": [
+                self.page_number.get_paginated_response_schema(schema),
+                self.keyset.get_paginated_response_schema(schema),
+            ]
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            *self.page_number.get_schema_operation_parameters(view),
+            *self.keyset.get_schema_operation_parameters(view),
+            {
+                "name": self.mode_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Set to 'cursor' for keyset pagination (no total count).",
+                "schema": {"type": "string", "enum": ["page", "cursor"]},
+            },
+        ]
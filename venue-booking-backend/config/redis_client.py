@@ -0,0 +1,35 @@
+import asyncio
+import weakref
+
+from django.conf import settings
+
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_redis_client():
+    """The raw Redis client behind the default cache, or None for other backends."""
+    try:
+        from django_redis import get_redis_connection
+
+        return get_redis_connection("default")
+    except (ImportError, NotImplementedError):
+        return None
+
+
+def get_async_redis_client():
+    """
+    A ``redis.asyncio`` client for the default cache's server, or None for
+    other backends. Connection pools belong to an event loop, so there is one
+    client per running loop.
+    """
+    if get_redis_client() is None:
+        return None
+    import redis.asyncio
+
+    location = settings.CACHES["default"]["LOCATION"]
+    if isinstance(location, (list, tuple)):
+        location = location[0]  # the primary
+    clients = _async_clients.setdefault(asyncio.get_running_loop(), {})
+    if location not in clients:
+        clients[location] = redis.asyncio.Redis.from_url(location)
+    return clients[location]
@@ -2,6 +2,7 @@ import os
 from datetime import timedelta
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -26,6 +27,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     # Third-party
     "rest_framework",
     "rest_framework_simplejwt",
@@ -70,6 +72,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "config.wsgi.application"
+ASGI_APPLICATION = "config.asgi.application"
 
 # ──────────────────────────────────────────────
 # Database
@@ -82,9 +85,44 @@ DATABASES = {
         "PASSWORD": os.getenv("POSTGRES_PASSWORD", "postgres"),
         "HOST": os.getenv("POSTGRES_HOST", "localhost"),
         "PORT": os.getenv("POSTGRES_PORT", "5432"),
+        "CONN_HEALTH_CHECKS": True,
     }
 }
 
+# Connection reuse, by DB_POOL_MODE:
+#   persistent  keep each worker thread's connection for DB_CONN_MAX_AGE
+#               seconds; sync (WSGI) workers only, as config/asgi.py closes
+#               connections after every request
+#   pgbouncer   POSTGRES_HOST/PORT point at pgbouncer in transaction mode;
+#               the only pooling the ASGI deployment gets
+#   none        a new connection per request
+DB_POOL_MODE = os.getenv("DB_POOL_MODE", "persistent")
+if DB_POOL_MODE == "persistent":
+    DATABASES["default"]["CONN_MAX_AGE"] = int(os.getenv("DB_CONN_MAX_AGE", 60))
+elif DB_POOL_MODE == "pgbouncer":
+    DATABASES["default"]["CONN_MAX_AGE"] = int(os.getenv("DB_CONN_MAX_AGE", 60))
+    # Consecutive transactions may run on different server connections, so
+    # cursors must not outlive one (prepared statements are off by default)
+    DATABASES["default"]["DISABLE_SERVER_SIDE_CURSORS"] = True
+elif DB_POOL_MODE != "none":
+    raise ImproperlyConfigured(f"Unknown DB_POOL_MODE {DB_POOL_MODE!r}.")
+
+# Read replicas (config/db_router.py): POSTGRES_REPLICA_HOSTS=host[:port],...
+# Users who just wrote read from the primary for DATABASE_REPLICA_PIN_SECONDS
+DATABASE_REPLICAS = []
+for index, address in enumerate(filter(None, os.getenv("POSTGRES_REPLICA_HOSTS", "").split(",")), 1):
+    host, _, port = address.strip().partition(":")
+    alias = f"replica_{index}"
+    DATABASES[alias] = {
+        **DATABASES["default"],
+        "HOST": host,
+        "PORT": port or DATABASES["default"]["PORT"],
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(alias)
+DATABASE_ROUTERS = ["config.db_router.ReplicaRouter"]
+DATABASE_REPLICA_PIN_SECONDS = int(os.getenv("DATABASE_REPLICA_PIN_SECONDS", 5))
+
 # ──────────────────────────────────────────────
 # Cache / Redis
 # ──────────────────────────────────────────────
@@ -136,11 +174,23 @@ LOCALE_PATHS = [BASE_DIR / "locale"]
 # ──────────────────────────────────────────────
 STATIC_URL = "/static/"
 STATIC_ROOT = BASE_DIR / "staticfiles"
-STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+STORAGES = {
+    # Uploads are named after their content hash (config/media.py)
+    "default": {"BACKEND": "config.media.ContentHashStorage"},
+    "staticfiles": {"BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage"},
+}
+
+# MEDIA_URL is served by config.media.serve: byte ranges, conditional
+# requests, immutable caching of content-hashed names. Turn it off when a
+# web server or CDN serves MEDIA_ROOT itself.
+SERVE_MEDIA = os.getenv("SERVE_MEDIA", "1") == "1"
+# Cache lifetime of media under names that are not content hashes
+MEDIA_MAX_AGE = int(os.getenv("MEDIA_MAX_AGE", 3600))
+
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 # ──────────────────────────────────────────────
@@ -148,12 +198,12 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 # ──────────────────────────────────────────────
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "apps.users.authentication.TokenUserAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.IsAuthenticatedOrReadOnly",
     ),
-    "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
+    "DEFAULT_PAGINATION_CLASS": "config.pagination.HybridPagination",
     "PAGE_SIZE": 10,
     "DEFAULT_FILTER_BACKENDS": (
         "django_filters.rest_framework.DjangoFilterBackend",
@@ -162,8 +212,21 @@ REST_FRAMEWORK = {
     ),
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     "DEFAULT_THROTTLE_CLASSES": [],
-    "DEFAULT_THROTTLE_RATES": {},
+    # GCRA limits, see config/throttling.py ("3/10m" = 3 per 10 minutes)
+    "DEFAULT_THROTTLE_RATES": {
+        "otp_send_ip": "20/h",
+        "otp_send_phone": "3/10m",
+        "otp_verify_ip": "30/10m",
+        "otp_verify_phone": "5/10m",
+        "bookings": "60/m",
+    },
+    # Proxies in front of the app that append to X-Forwarded-For. With 0 the
+    # header is ignored and throttles key on REMOTE_ADDR.
+    "NUM_PROXIES": int(os.getenv("NUM_PROXIES", 0)),
 }
+if os.getenv("THROTTLING", "1") != "1":
+    # Lifts every limit; only load tests should set it
+    REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"] = dict.fromkeys(REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"])
 
 # ──────────────────────────────────────────────
 # Simple JWT
@@ -179,6 +242,11 @@ SIMPLE_JWT = {
     "BLACKLIST_AFTER_ROTATION": False,
 }
 
+# request.user is built from access token claims; the User row, when a view
+# needs it, comes from these caches (see apps/users/authentication.py)
+USER_CACHE_TIMEOUT = 300  # Redis, dropped whenever the user is saved
+USER_LOCAL_CACHE_TIMEOUT = 5  # per process
+
 # ──────────────────────────────────────────────
 # CORS
 # ──────────────────────────────────────────────
@@ -195,6 +263,11 @@ SPECTACULAR_SETTINGS = {
     "SERVE_INCLUDE_SCHEMA": False,
     "SCHEMA_PATH_PREFIX": "/api/",
     "COMPONENT_SPLIT_REQUEST": True,
+    "ENUM_NAME_OVERRIDES": {
+        "StatusEnum": "apps.bookings.models.Booking.Status",
+        "BookingBatchModeEnum": "apps.bookings.batch.MODES",
+        "BookingBatchStatusEnum": "apps.bookings.batch.STATUSES",
+    },
 }
 
 # ──────────────────────────────────────────────
@@ -202,8 +275,59 @@ SPECTACULAR_SETTINGS = {
 # ──────────────────────────────────────────────
 OTP_LENGTH = 6
 OTP_EXPIRY_SECONDS = 300  # 5 minutes
+# Codes per phone number: the "otp_send_phone" throttle rate above
 
 # Test phone numbers that bypass OTP (use fixed OTP "000000")
 OTP_TEST_BYPASS_PHONES = [
     "+998901090019",
 ]
+
+# ──────────────────────────────────────────────
+# SMS delivery
+# ──────────────────────────────────────────────
+# Requests queue SMS in Redis; `manage.py run_sms_worker` sends them
+# (see apps/users/sms.py)
+SMS_GATEWAY = os.getenv("SMS_GATEWAY", "apps.users.sms.ConsoleGateway")
+SMS_BATCH_SIZE = 100
+SMS_WORKER_CONCURRENCY = 16  # sends in flight per worker
+SMS_MAX_ATTEMPTS = 5  # then the message goes to the dead-letter list...
+SMS_DEAD_LETTER_MAX = 1000  # ...which keeps this many, newest last
+SMS_RETRY_BACKOFF_SECONDS = 2  # doubled after every failed attempt...
+SMS_RETRY_BACKOFF_MAX_SECONDS = 300  # ...up to this
+
+# apps.users.sms.FakeGateway, for load testing
+SMS_FAKE_GATEWAY_LATENCY_MS = int(os.getenv("SMS_FAKE_GATEWAY_LATENCY_MS", 200))
+SMS_FAKE_GATEWAY_FAILURE_RATE = float(os.getenv("SMS_FAKE_GATEWAY_FAILURE_RATE", 0))
+
+# ──────────────────────────────────────────────
+# Availability cache
+# ──────────────────────────────────────────────
+# Per-venue, per-day occupancy bitmaps (see apps/bookings/availability.py)
+AVAILABILITY_CACHE_TIMEOUT = 600  # 10 minutes
+
+# Most bookings one batch request may create (see apps/bookings/batch.py)
+BOOKING_BATCH_MAX_ITEMS = 100
+
+# Pending bookings hold their slot this long unless confirmed; 0 holds
+# forever. manage.py expire_holds sweeps expired holds (apps/bookings/holds.py).
+# Off by default: bookings are only confirmed from the admin, so enable it
+# only where something confirms them in time.
+BOOKING_HOLD_MINUTES = int(os.getenv("BOOKING_HOLD_MINUTES", 0))
+BOOKING_HOLD_SWEEP_INTERVAL = 30  # seconds
+BOOKING_HOLD_SWEEP_BATCH_SIZE = 1000
+
+# Rows fetched from the export cursor and written out at a time (see apps/bookings/export.py)
+BOOKING_EXPORT_CHUNK_SIZE = 2000
+
+# Widths of the WebP/JPEG copies made of venue images (see apps/venues/images.py)
+VENUE_IMAGE_WIDTHS = [320, 640, 1280]
+
+# Anonymous venue list/detail responses (see apps/venues/cache.py)
+VENUE_RESPONSE_CACHE_TIMEOUT = 300  # 5 minutes
+
+# ──────────────────────────────────────────────
+# Fast serialization
+# ──────────────────────────────────────────────
+# Serialize read-only list/detail pages from values() rows instead of model
+# instances (see config/fast_serialization.py); output is byte-identical
+FAST_SERIALIZATION = True
@@ -0,0 +1,159 @@
+"""
+Redis-backed rate limiting for DRF views.
+
+Limits use GCRA (the generic cell rate algorithm), a token bucket stored as
+a single timestamp per key: the "theoretical arrival time" of the next
+request. A rate of ``N/period`` lets a burst of ``N`` requests through and
+then refills one request every ``period / N``, which behaves like a sliding
+window without keeping a per-request history. With django_redis each check
+is one atomic Lua call timed by the Redis server clock; other cache
+backends use the same arithmetic through the cache API.
+
+Rates accept a multiplier on the period, e.g. ``"3/10m"``. Clients are told
+apart by ``REMOTE_ADDR`` unless ``NUM_PROXIES`` trusted proxies sit in
+front of the app.
+"""
+import re
+
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+from .redis_client import get_async_redis_client, get_redis_client
+
+# KEYS: bucket. ARGV: emission interval ms, burst size.
+# Returns {allowed, retry after ms}.
+GCRA_SCRIPT = """
+local clock = redis.call('TIME')
+local now = clock[1] * 1000 + math.floor(clock[2] / 1000)
+local interval = tonumber(ARGV[1])
+local tat = math.max(tonumber(redis.call('GET', KEYS[1]) or now), now)
+local allow_at = tat + interval - tonumber(ARGV[2]) * interval
+if allow_at > now then
+    return {0, allow_at - now}
+end
+redis.call('SET', KEYS[1], tat + interval, 'PX', math.ceil(tat + interval - now))
+return {1, 0}
+"""
+
+RATE_PATTERN = re.compile(r"^(\d+)/(\d*)([smhd])")
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+class RedisRateThrottle(SimpleRateThrottle):
+    """GCRA throttle; subclasses implement ``get_ident_for(request)``."""
+
+    cache_format = "throttle:%(scope)s:%(ident)s"
+
+    def parse_rate(self, rate):
+        if rate is None:
+            return (None, None)
+        match = RATE_PATTERN.match(rate)
+        if match is None:
+            raise ValueError(f"Invalid throttle rate {rate!r}")
+        num, multiplier, unit = match.groups()
+        return int(num), int(multiplier or 1) * PERIODS[unit]
+
+    def get_ident_for(self, request):
+        raise NotImplementedError
+
+    def get_ident(self, request):
+        """
+        The client address: ``REMOTE_ADDR``, or the ``X-Forwarded-For``
+        entry added by the outermost of ``NUM_PROXIES`` proxies. A header
+        shorter than that did not come through them all and is ignored.
+        """
+        remote_addr = request.META.get("REMOTE_ADDR")
+        num_proxies = api_settings.NUM_PROXIES or 0
+        forwarded = request.META.get("HTTP_X_FORWARDED_FOR", "")
+        addresses = [address.strip() for address in forwarded.split(",")] if forwarded else []
+        if num_proxies <= 0 or len(addresses) < num_proxies:
+            return remote_addr
+        return addresses[-num_proxies] or remote_addr
+
+    def get_cache_key(self, request, view):
+        ident = self.get_ident_for(request)
+        if ident is None:
+            return None
+        return self.cache_format % {"scope": self.scope, "ident": ident}
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        interval_ms = self.duration * 1000 / self.num_requests
+        client = get_redis_client()
+        if client is not None:
+            script = client.register_script(GCRA_SCRIPT)
+            allowed, retry_ms = script(
+                keys=[self.cache.make_key(self.key)],
+                args=[interval_ms, self.num_requests],
+            )
+        else:
+            allowed, retry_ms = self._allow_with_cache(interval_ms)
+        return self._result(allowed, retry_ms)
+
+    async def aallow_request(self, request, view):
+        """``allow_request`` for async views (see config/async_views.py)."""
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        interval_ms = self.duration * 1000 / self.num_requests
+        client = get_async_redis_client()
+        if client is not None:
+            script = client.register_script(GCRA_SCRIPT)
+            allowed, retry_ms = await script(
+                keys=[self.cache.make_key(self.key)],
+                args=[interval_ms, self.num_requests],
+            )
+        else:
+            allowed, retry_ms = self._allow_with_cache(interval_ms)
+        return self._result(allowed, retry_ms)
+
+    def _result(self, allowed, retry_ms):
+        # Sub-millisecond waits still need a Retry-After
+        self.retry_after = None if allowed else max(retry_ms, 1) / 1000
+        return bool(allowed)
+
+    def _allow_with_cache(self, interval_ms):
+        now = self.timer() * 1000
+        tat = max(self.cache.get(self.key, now), now)
+        allow_at = tat + interval_ms - self.num_requests * interval_ms
+        if allow_at > now:
+            return 0, allow_at - now
+        self.cache.set(self.key, tat + interval_ms, timeout=(tat + interval_ms - now) / 1000)
+        return 1, 0
+
+    def wait(self):
+        return self.retry_after
+
+
+class IPRateThrottle(RedisRateThrottle):
+    """Keyed by client IP."""
+
+    def get_ident_for(self, request):
+        return self.get_ident(request)
+
+
+class UserRateThrottle(RedisRateThrottle):
+    """Keyed by user id, or by IP for anonymous requests."""
+
+    def get_ident_for(self, request):
+        if request.user and request.user.is_authenticated:
+            return f"user:{request.user.pk}"
+        return f"ip:{self.get_ident(request)}"
+
+
+class PhoneRateThrottle(RedisRateThrottle):
+    """Keyed by the ``phone_number`` in the request body; skipped when absent."""
+
+    def get_ident_for(self, request):
+        phone_number = request.data.get("phone_number") if hasattr(request.data, "get") else None
+        if not isinstance(phone_number, str) or not phone_number.strip():
+            return None
+        return re.sub(r"[^\d+]", "", phone_number)
@@ -0,0 +1,24 @@
+"""
+Gunicorn settings. The default deployment serves the WSGI application with
+sync workers and keeps database connections between requests
+(DB_POOL_MODE=persistent):
+
+    gunicorn
+
+GUNICORN_ASGI=1 serves the ASGI application with uvicorn workers instead,
+so async views (see config/async_views.py) share an event loop per worker.
+Connections are then closed after each request (see config/asgi.py), so
+run it behind pgbouncer (DB_POOL_MODE=pgbouncer).
+"""
+import os
+
+ASGI = os.getenv("GUNICORN_ASGI", "0") == "1"
+
+wsgi_app = "config.asgi:application" if ASGI else "config.wsgi:application"
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("GUNICORN_WORKERS", 3))
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "uvicorn_worker.UvicornWorker" if ASGI else "sync")
+keepalive = 5
+# Restart workers now and then to cap slow memory growth
+max_requests = 10000
+max_requests_jitter = 1000